@@ -1,21 +1,102 @@
-from fastapi import FastAPI, Query
-from selenium_parser.parsers.wildberries_price_range_parser import run_price_range_parser
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from selenium_parser.utils.browser_pool import get_browser_pool
+from selenium_parser.utils.jobs import JobQueueFull, get_job_manager
+from selenium_parser.utils.metrics import registry
 
 app = FastAPI(title="API для парсера ценовых диапазонов Wildberries")
 
+
+class JobRequest(BaseModel):
+    url: str = Field(..., description="Ссылка на категорию Wildberries")
+    step: Optional[float] = Field(None, description="Шаг цены первой пробы блока; по умолчанию диапазоны подбирает "
+                                                     "планировщик по гистограмме цен")
+    max_products: int = Field(6000, description="Максимальное количество товаров в одном блоке")
+    backend: Optional[str] = Field(None, description="Бэкенд загрузки: selenium или http")
+    concurrency: Optional[int] = Field(None, description="Число параллельных загрузчиков")
+    resume: bool = Field(False, description="Продолжить с последней контрольной точки")
+    incremental: bool = Field(False, description="Обойти заново только изменившиеся ценовые диапазоны")
+    sink: Optional[str] = Field(None, description="Приемник товаров: clickhouse или file")
+
+
+@app.on_event("startup")
+def start_jobs():
+    # Задания, прерванные прошлой остановкой сервера, снова ставятся в очередь
+    get_job_manager()
+
+
+@app.on_event("shutdown")
+def close_browsers():
+    get_job_manager().close()
+    get_browser_pool().close()
+
+
+@app.get("/browsers/")
+def browsers():
+    """Состояние пула браузеров: время запуска и память каждого браузера."""
+    return get_browser_pool().stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Метрики обхода в текстовом формате Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _submit(request: JobRequest):
+    try:
+        return get_job_manager().submit(request.url, **request.dict(exclude={"url"}))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@app.post("/jobs", status_code=202)
+def create_job(request: JobRequest):
+    """Ставит обход категории в очередь и сразу возвращает задание с его id."""
+    return _submit(request)
+
+
+@app.get("/jobs")
+def list_jobs(limit: int = Query(100, description="Сколько последних заданий вернуть")):
+    return {"jobs": get_job_manager().list(limit), "executor": get_job_manager().stats()}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Состояние задания и прогресс: блоки, страницы, товаров в секунду, ETA."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Отменяет задание; выполняющийся обход останавливается после текущей страницы."""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    return job
+
+
 @app.get("/parse/")
 def parse(
     url: str = Query(..., description="Ссылка на категорию Wildberries"),
-    step: float = Query(5000, description="Шаг цены"),
+    step: Optional[float] = Query(None, description="Шаг цены первой пробы блока (по умолчанию — планировщик)"),
     max_products: int = Query(6000, description="Максимальное количество товаров в одном блоке"),
+    resume: bool = Query(False, description="Продолжить с последней контрольной точки"),
 ):
-    try:
-        run_price_range_parser(url=url, step=step, max_products=max_products)
-        return {
-            "status": "Парсинг успешно завершен",
-            "url": url,
-            "step": step,
-            "max_products": max_products
-        }
-    except Exception as e:
-        return {"error": str(e)}
+    """Совместимость со старыми клиентами: ставит задание в очередь вместо синхронного обхода."""
+    job = _submit(JobRequest(url=url, step=step, max_products=max_products, resume=resume))
+    return {
+        "status": "Парсинг поставлен в очередь",
+        "job_id": job["id"],
+        "url": url,
+        "step": step,
+        "max_products": max_products,
+        "resume": resume
+    }
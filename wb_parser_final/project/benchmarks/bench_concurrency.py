@@ -0,0 +1,64 @@
+# benchmarks/bench_concurrency.py
+"""
+Бенчмарк параллельного обхода: пропускная способность ConcurrentCrawler
+в зависимости от числа воркеров на фейковом каталоге с задержкой ответа.
+
+Запуск: python -m benchmarks.bench_concurrency --latency 0.05 --workers 1 2 4 8 16
+"""
+import argparse
+
+from benchmarks.fake_catalog import FakeCatalog, start_fake_catalog
+from selenium_parser import settings
+from selenium_parser.backends.http_backend import HttpBackend
+from selenium_parser.parsers.concurrent_crawler import ConcurrentCrawler
+from selenium_parser.utils.article_index import ArticleIndex
+
+
+def run_once(server, start_url, ranges, workers, rate_limit):
+    def backend_factory():
+        return HttpBackend(server.base_url, "bench", api_url=f"{server.base_url}/api/catalog")
+
+    index = ArticleIndex()
+    crawler = ConcurrentCrawler(start_url, backend_factory, concurrency=workers, rate_limit=rate_limit)
+    stats = crawler.run(ranges, lambda range_url, page_number, products: sum(index.add(p.article) for p in products))
+    return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк параллельного обхода")
+    arg_parser.add_argument("--products", type=int, default=30000)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа сервера, с")
+    arg_parser.add_argument("--rate-limit", type=float, default=1000.0, help="запросов в секунду к хосту")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = arg_parser.parse_args()
+
+    # Пробы фейкового каталога не должны попасть в кэш и состояние диапазонов рабочего каталога
+    settings.PROBE_CACHE_PATH = ""
+    settings.RANGE_STATE_PATH = ""
+    server = start_fake_catalog(FakeCatalog(args.products), latency=args.latency)
+    start_url = f"{server.base_url}/catalog/bench/category?sort=popular&page=1&priceU=100%3B1000000000"
+
+    # Разбиение планируется один раз и переиспользуется во всех прогонах
+    with HttpBackend(server.base_url, "bench", api_url=f"{server.base_url}/api/catalog") as backend:
+        ranges = ConcurrentCrawler(start_url, None).plan(backend)
+
+    results = []
+    for workers in args.workers:
+        stats = run_once(server, start_url, ranges, workers, args.rate_limit)
+        results.append((workers, stats))
+    server.shutdown()
+
+    base_rate = results[0][1]["pages"] / results[0][1]["elapsed"]
+    print(f"\nЗадержка {args.latency * 1000:.0f} мс, лимит {args.rate_limit:.0f} запр/с")
+    stages = list(results[0][1]["stages"])
+    print(f"{'воркеров':>9} {'страниц':>8} {'время, с':>9} {'стр/с':>8} {'ускорение':>10}"
+          + "".join(f"{name:>9}" for name in stages))
+    for workers, stats in results:
+        rate = stats["pages"] / stats["elapsed"]
+        # Загруженность стадий: узкое место — стадия, близкая к 100%
+        print(f"{workers:>9} {stats['pages']:>8} {stats['elapsed']:>9.2f} {rate:>8.1f} {rate / base_rate:>9.1f}x"
+              + "".join(f"{stats['stages'][name]['utilization'] * 100:>8.0f}%" for name in stages))
+
+
+if __name__ == "__main__":
+    main()
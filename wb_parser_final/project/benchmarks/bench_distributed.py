@@ -0,0 +1,136 @@
+# benchmarks/bench_distributed.py
+"""
+Бенчмарк распределенного обхода: несколько процессов-воркеров разбирают общую очередь
+заданий (SqliteWorkQueue) по нескольким категориям фейкового каталога.
+Проверяется, что каждая категория собрана полностью и без повторов, и как растет скорость с числом процессов.
+
+Запуск: python -m benchmarks.bench_distributed --categories 8 --processes 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.fake_catalog import FakeCatalog, start_fake_catalog
+from selenium_parser.utils.work_queue import SqliteWorkQueue
+
+
+class CountingWriter:
+    """Замена приемника товаров: считает строки и подтверждает их сброс каждые max_rows строк."""
+
+    def __init__(self, on_flush, max_rows=2000):
+        self.on_flush = on_flush
+        self.max_rows = max_rows
+        self.rows = 0
+        self.total_rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def add(self, data):
+        self.rows += 1
+        return True
+
+    def add_many(self, products):
+        self.rows += len(products)
+        return len(products)
+
+    def flush_if_due(self):
+        if self.rows >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        rows, self.rows = self.rows, 0
+        self.total_rows += rows
+        if rows:
+            self.on_flush(rows)
+        return rows
+
+    def close(self):
+        self.flush()
+
+
+def empty_index(category_name):
+    from selenium_parser.utils.article_index import ArticleIndex
+    return ArticleIndex()
+
+
+def worker_process(queue_path, api_url, run_id, rate_limit, results):
+    from selenium_parser import settings
+    from selenium_parser.parsers.distributed import QueueWorker
+
+    settings.HTTP_CATALOG_API_URL = api_url
+    settings.PROBE_CACHE_PATH = ""
+    settings.RANGE_STATE_PATH = ""
+    # Категории фейкового каталога состоят из одних и тех же артикулов: проверяем полноту каждой категории
+    settings.DEDUP_SCOPE = "category"
+    queue = SqliteWorkQueue(queue_path)
+    worker = QueueWorker(queue, backend="http", run_id=run_id, writer_factory=CountingWriter,
+                         index_loader=empty_index, rate_limit=rate_limit, poll_interval=0.05)
+    results.put(worker.run())
+    queue.close()
+
+
+def run_once(server, category_urls, processes, rate_limit):
+    from selenium_parser.parsers.distributed import schedule_categories
+
+    queue_path = os.path.join(tempfile.mkdtemp(prefix="bench-queue-"), "queue.sqlite3")
+    queue = SqliteWorkQueue(queue_path)
+    run_id = f"bench-{processes}"
+    schedule_categories(queue, category_urls, run_id)
+
+    results = multiprocessing.Queue()
+    started = time.monotonic()
+    workers = [multiprocessing.Process(target=worker_process,
+                                       args=(queue_path, f"{server.base_url}/api/catalog", run_id, rate_limit, results))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    stats = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    queue_stats = queue.stats(run_id)
+    queue.close()
+    return {
+        "pages": sum(s["pages"] for s in stats),
+        "new_items": sum(s["new_items"] for s in stats),
+        "errors": sum(s["errors"] for s in stats),
+        "elapsed": elapsed,
+        "queue": queue_stats,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк распределенного обхода")
+    arg_parser.add_argument("--categories", type=int, default=8)
+    arg_parser.add_argument("--products", type=int, default=5000, help="товаров в каждой категории")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа сервера, с")
+    arg_parser.add_argument("--rate-limit", type=float, default=1000.0, help="запросов в секунду на воркер")
+    arg_parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    args = arg_parser.parse_args()
+
+    server = start_fake_catalog(FakeCatalog(args.products), latency=args.latency)
+    category_urls = [f"{server.base_url}/catalog/bench/category-{i}?sort=popular&page=1&priceU=100%3B1000000000"
+                     for i in range(args.categories)]
+    expected = args.categories * args.products
+
+    results = []
+    for processes in args.processes:
+        results.append((processes, run_once(server, category_urls, processes, args.rate_limit)))
+    server.shutdown()
+
+    base_rate = results[0][1]["pages"] / results[0][1]["elapsed"]
+    print(f"\n{args.categories} категорий по {args.products} товаров, задержка {args.latency * 1000:.0f} мс")
+    print(f"{'процессов':>10} {'страниц':>8} {'товаров':>8} {'время, с':>9} {'стр/с':>8} {'ускорение':>10}  очередь")
+    for processes, stats in results:
+        rate = stats["pages"] / stats["elapsed"]
+        complete = "полностью" if stats["new_items"] == expected else f"ожидалось {expected}"
+        print(f"{processes:>10} {stats['pages']:>8} {stats['new_items']:>8} {stats['elapsed']:>9.2f} {rate:>8.1f} "
+              f"{rate / base_rate:>9.1f}x  {stats['queue']} ({complete})")
+
+
+if __name__ == "__main__":
+    main()
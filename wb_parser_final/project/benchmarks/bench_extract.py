@@ -0,0 +1,182 @@
+# benchmarks/bench_extract.py
+"""
+Бенчмарк извлечения ссылок на товары из HTML страницы каталога:
+сравнивает пропускную способность и пиковую память способов разбора (regex и bs4)
+и проверяет, что их результаты совпадают.
+
+Скорость измеряется на сохраненных страницах каталога benchmarks/fixtures/*.html. Если их нет,
+используются сгенерированные страницы, по объему и разметке близкие к полностью прокрученной
+странице Wildberries (--generated добавляет их и к сохраненным).
+Совпадение результатов проверяется еще и на страницах benchmarks/fixtures/edge_cases/*.html
+с необычной разметкой (секции CDATA, '<a/href=', незакрытые комментарии и т.п.);
+при любом расхождении бенчмарк печатает различающиеся ссылки и завершается с кодом 1.
+
+Сохранить полностью прокрученную страницу каталога через браузер (бэкенд selenium):
+python -m benchmarks.bench_extract --save https://www.wildberries.ru/catalog/obuv/detskaya --pages 3
+
+Запуск: python -m benchmarks.bench_extract --repeat 5
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+from selenium_parser.parsers.wildberries_parser_v2 import EXTRACTORS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+EDGE_CASES_DIR = os.path.join(FIXTURES_DIR, "edge_cases")
+BASE_DOMAIN = "https://www.wildberries.ru"
+
+
+def generate_catalog_page(cards=100, seed=0):
+    """Страница каталога с карточками товаров, навигацией и крупным встроенным состоянием в <script>."""
+    rnd = random.Random(seed)
+    nav = "".join(f'<li class="menu__item"><a class="menu__link" href="/catalog/section-{i}">Раздел {i}</a></li>'
+                  for i in range(300))
+    card_list = []
+    for _ in range(cards):
+        article = rnd.randint(10_000_000, 400_000_000)
+        images = "".join(
+            f'<img class="j-thumbnail" src="https://basket-01.wbbasket.ru/vol{article // 100000}/part{article // 1000}/'
+            f'{article}/images/c516x688/{n}.webp" alt="Товар" loading="lazy">'
+            for n in range(1, 6)
+        )
+        card_list.append(
+            f'<article id="c{article}" class="product-card j-card-item" data-nm-id="{article}" data-card-index="1">'
+            f'<div class="product-card__wrapper"><a draggable="false" class="product-card__link j-card-link j-open-full-product-card"'
+            f' href="https://www.wildberries.ru/catalog/{article}/detail.aspx?targetUrl=GP&amp;size=0" aria-label="Товар"></a>'
+            f'<div class="product-card__top-wrap"><div class="product-card__img-wrap img-plug j-thumbnail-wrap">{images}</div>'
+            f'<button class="product-card__fast-view hide-mobile j-open-product-popup" type="button">Быстрый просмотр</button></div>'
+            f'<div class="product-card__middle-wrap"><p class="product-card__price price"><span class="price__wrap">'
+            f'<ins class="price__lower-price">{rnd.randint(100, 50000)}&nbsp;₽</ins><del>{rnd.randint(100, 90000)}&nbsp;₽</del></span></p>'
+            f'<h2 class="product-card__brand-wrap"><span class="product-card__brand">Бренд {article % 97}</span>'
+            f'<span class="product-card__name">&nbsp;/ Товар для проверки разбора страницы {article}</span></h2>'
+            f'<p class="product-card__rating-wrap"><span class="address-rate-mini">4.{article % 10}</span>'
+            f'<span class="product-card__count">{article % 5000}&nbsp;оценок</span></p></div>'
+            f'<div class="product-card__bottom-wrap"><p class="product-card__order-wrap">'
+            f'<a class="product-card__add-basket j-add-to-basket btn-main" href="/lk/basket">В корзину</a></p></div></div></article>'
+        )
+    state = json.dumps({"products": [{"id": rnd.randint(1, 10 ** 9), "link": f"/catalog/{n}/detail.aspx",
+                                      "name": "x" * 200} for n in range(3000)]})
+    return (
+        "<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\"><title>Каталог</title>"
+        f"<script>window.__INITIAL_STATE__ = {state};</script>"
+        "<style>.product-card{display:block}a[href*=\"detail.aspx\"]{color:red}</style></head><body>"
+        f"<header><nav><ul class=\"menu\">{nav}</ul></nav></header>"
+        "<!-- <a href=\"/catalog/1/detail.aspx\">закомментированная ссылка</a> -->"
+        "<main><div class=\"catalog-title-wrap\"><h1>Каталог</h1><p class=\"goods-count\">143 816 товаров</p></div>"
+        f"<div class=\"product-card-list\">{''.join(card_list)}</div>"
+        "<div class=\"pagination\"><a class=\"pagination-next pagination__next j-next-page\" href=\"?page=2\">Следующая страница</a></div>"
+        "</main></body></html>"
+    )
+
+
+def read_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def load_pages(generated):
+    """Сохраненные страницы каталога; без них — 5 сгенерированных (если число не задано явно)."""
+    pages = read_pages(FIXTURES_DIR)
+    if generated is None:
+        generated = 0 if pages else 5
+    for seed in range(generated):
+        pages.append((f"generated-{seed}", generate_catalog_page(seed=seed)))
+    return pages
+
+
+def save_pages(url, pages):
+    """Загружает первые страницы категории браузером (с полной прокруткой) и сохраняет их в FIXTURES_DIR."""
+    from selenium_parser.backends.selenium_backend import SeleniumBackend
+
+    parsed = urlparse(url)
+    category = re.sub(r"[^a-zA-Z0-9]+", "-", parsed.path.replace("/catalog/", "")).strip("-")
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with SeleniumBackend(f"{parsed.scheme}://{parsed.netloc}", category) as backend:
+        for page_number in range(1, pages + 1):
+            html = backend.fetch_raw(url, page_number)
+            path = os.path.join(FIXTURES_DIR, f"{category}-{page_number}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"Сохранена страница {page_number}: {path} "
+                  f"({len(EXTRACTORS['bs4'](html, backend.base_domain, 'bench'))} товаров)")
+
+
+def compare_extractors(pages):
+    """Сравнивает regex с эталоном bs4 на каждой странице; возвращает имена страниц с расхождениями."""
+    mismatched = []
+    for name, html in pages:
+        expected = [p.link for p in EXTRACTORS["bs4"](html, BASE_DOMAIN, "bench")]
+        actual = [p.link for p in EXTRACTORS["regex"](html, BASE_DOMAIN, "bench")]
+        if actual == expected:
+            continue
+        mismatched.append(name)
+        print(f"❌ {name}: результаты regex и bs4 различаются")
+        print(f"   только в regex: {sorted(set(actual) - set(expected))[:10]}")
+        print(f"   только в bs4: {sorted(set(expected) - set(actual))[:10]}")
+        if set(actual) == set(expected):
+            print("   те же ссылки в другом порядке или с другим числом повторов")
+    return mismatched
+
+
+def measure(extractor, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            extractor(html, BASE_DOMAIN, "bench")
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _, html in pages:
+        extractor(html, BASE_DOMAIN, "bench")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк извлечения ссылок на товары")
+    arg_parser.add_argument("--generated", type=int,
+                            help="число сгенерированных страниц (по умолчанию 5, если нет сохраненных)")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--save", metavar="URL", help="сохранить страницы категории в benchmarks/fixtures")
+    arg_parser.add_argument("--pages", type=int, default=3, help="сколько страниц сохранить с --save")
+    args = arg_parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, args.pages)
+        return
+
+    pages = load_pages(args.generated)
+    total_mb = sum(len(html.encode()) for _, html in pages) / 1024 / 1024
+    print(f"Страниц: {len(pages)} ({', '.join(name for name, _ in pages)}), объем: {total_mb:.1f} МБ")
+
+    # Результаты быстрого разбора должны совпадать с эталонным, в том числе на необычной разметке
+    edge_cases = read_pages(EDGE_CASES_DIR)
+    if compare_extractors(pages + edge_cases):
+        sys.exit(1)
+    print(f"Результаты regex и bs4 совпадают ({len(pages)} страниц и {len(edge_cases)} с необычной разметкой)")
+
+    rows = []
+    for name, extractor in EXTRACTORS.items():
+        elapsed, peak = measure(extractor, pages, args.repeat)
+        processed = len(pages) * args.repeat
+        rows.append((name, processed / elapsed, total_mb * args.repeat / elapsed, peak / 1024 / 1024))
+
+    print(f"{'способ':>8} {'стр/с':>8} {'МБ/с':>8} {'пик памяти, МБ':>15}")
+    for name, pages_per_sec, mb_per_sec, peak_mb in rows:
+        print(f"{name:>8} {pages_per_sec:>8.1f} {mb_per_sec:>8.1f} {peak_mb:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_fetch_control.py
+"""
+Бенчмарк управления запросами (FetchControl) на фейковом каталоге, который ограничивает клиента
+как настоящий сайт: сверх throttle_rate запросов в секунду отвечает 429, часть ответов — случайные 429,
+задержка ответа плавает.
+
+Сравниваются:
+- adaptive — адаптивная частота и параллельность (AIMD) с медленным стартом;
+- fixed-high — постоянная частота выше лимита сайта (завышенный CRAWL_RATE_LIMIT без адаптации);
+- fixed-low — постоянная частота с запасом ниже лимита.
+
+Для каждого режима выводятся страниц в секунду, число ответов 429, повторы, итоговая частота и потерянные
+страницы. Проверяется, что адаптивный обход и разбиение под 429 собрали все товары каталога.
+
+Запуск: python -m benchmarks.bench_fetch_control --throttle-rate 40 --error-rate 0.02
+"""
+import argparse
+
+from benchmarks.fake_catalog import FakeCatalog, start_fake_catalog
+from selenium_parser import settings
+from selenium_parser.backends.controlled import controlled
+from selenium_parser.backends.http_backend import HttpBackend
+from selenium_parser.parsers.concurrent_crawler import ConcurrentCrawler
+from selenium_parser.utils.article_index import ArticleIndex
+from selenium_parser.utils.fetch_control import FetchControl
+from selenium_parser.utils.log import configure_logging
+
+
+def make_backend(server):
+    return HttpBackend(server.base_url, "bench", api_url=f"{server.base_url}/api/catalog")
+
+
+def run_once(server, start_url, ranges, workers, control):
+    index = ArticleIndex()
+    throttled_before = server.throttled_total
+    crawler = ConcurrentCrawler(start_url, lambda: controlled(make_backend(server), control), concurrency=workers)
+    stats = crawler.run(ranges, lambda range_url, page_number, products: sum(index.add(p.article) for p in products))
+    stats["articles"] = len(index)
+    stats["throttled"] = server.throttled_total - throttled_before
+    return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк управления запросами")
+    arg_parser.add_argument("--products", type=int, default=20000)
+    arg_parser.add_argument("--throttle-rate", type=float, default=40.0, help="лимит сайта, запросов в секунду")
+    arg_parser.add_argument("--error-rate", type=float, default=0.02, help="доля случайных 429")
+    arg_parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа сервера, с")
+    arg_parser.add_argument("--latency-jitter", type=float, default=0.03, help="случайная добавка к задержке, с")
+    arg_parser.add_argument("--workers", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    configure_logging(level="WARNING")
+    # Пробы фейкового каталога не должны попасть в кэш и состояние диапазонов рабочего каталога
+    settings.PROBE_CACHE_PATH = ""
+    settings.RANGE_STATE_PATH = ""
+    # Короткие паузы, чтобы прогон занимал секунды; соотношение режимов от этого не меняется
+    settings.FETCH_BACKOFF_BASE = 0.1
+    settings.FETCH_BACKOFF_MAX = 2.0
+    settings.FETCH_CIRCUIT_COOLDOWN = 1.0
+    settings.FETCH_CIRCUIT_MAX_COOLDOWN = 8.0
+
+    catalog = FakeCatalog(args.products)
+    server = start_fake_catalog(catalog, latency=args.latency, latency_jitter=args.latency_jitter,
+                                throttle_rate=args.throttle_rate, error_rate=args.error_rate)
+    start_url = f"{server.base_url}/catalog/bench/category?sort=popular&page=1&priceU=100%3B1000000000"
+
+    # Разбиение идет через те же ограничения: 429 на пробах повторяются, ни один диапазон не теряется
+    planner_control = FetchControl("planner", max_rate=1000.0)
+    with controlled(make_backend(server), planner_control) as backend:
+        ranges = ConcurrentCrawler(start_url, None).plan(backend)
+    planned = sum(count for _, _, count in ranges)
+    assert planned == len(catalog), f"разбиение покрыло {planned} товаров из {len(catalog)}"
+    print(f"Разбиение: {len(ranges)} диапазонов, {planned} товаров, 429 на пробах: "
+          f"{planner_control.stats['throttled']}, повторов: {planner_control.stats['retries']}")
+
+    modes = [
+        ("adaptive", FetchControl("adaptive", max_rate=1000.0, max_concurrency=args.workers)),
+        ("fixed-high", FetchControl("fixed-high", max_rate=args.throttle_rate * 2, initial_rate=args.throttle_rate * 2,
+                                    initial_concurrency=args.workers, adaptive=False)),
+        ("fixed-low", FetchControl("fixed-low", max_rate=args.throttle_rate / 2, initial_rate=args.throttle_rate / 2,
+                                   initial_concurrency=args.workers, adaptive=False)),
+    ]
+    results = []
+    for name, control in modes:
+        results.append((name, control, run_once(server, start_url, ranges, args.workers, control)))
+    server.shutdown()
+
+    print(f"\nЛимит сайта {args.throttle_rate:.0f} запр/с, случайных 429: {args.error_rate:.0%}, "
+          f"воркеров {args.workers}")
+    print(f"{'режим':>11} {'страниц':>8} {'время, с':>9} {'стр/с':>7} {'429':>6} {'повторов':>9} "
+          f"{'пауз':>5} {'частота':>8} {'потеряно':>9}")
+    for name, control, stats in results:
+        rate = stats["pages"] / stats["elapsed"]
+        print(f"{name:>11} {stats['pages']:>8} {stats['elapsed']:>9.2f} {rate:>7.1f} {stats['throttled']:>6} "
+              f"{control.stats['retries']:>9} {control.stats['circuit_opens']:>5} {control.rate:>8.1f} "
+              f"{stats['errors']:>9}")
+
+    adaptive = results[0][2]
+    assert adaptive["articles"] == len(catalog), f"адаптивный обход собрал {adaptive['articles']} из {len(catalog)}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_incremental.py
+"""
+Бенчмарк инкрементального обновления: полный обход категории фейкового каталога,
+затем серия запусков с --incremental после того, как в части ценовых диапазонов появились новые товары.
+Показывает, что число загрузок страниц растет с долей изменившихся диапазонов, а не с размером категории,
+и что все новые товары при этом собраны.
+
+Запуск: python -m benchmarks.bench_incremental --products 60000 --churn 0 0.1 0.3 1
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.bench_suite import MemoryClickHouse
+from benchmarks.fake_catalog import FakeCatalog, start_fake_catalog
+from selenium_parser import settings
+from selenium_parser.parsers.wildberries_price_range_parser import WildberriesPriceRangeParser
+from selenium_parser.utils.log import configure_logging
+from selenium_parser.utils.probe_cache import category_key
+from selenium_parser.utils.range_state import get_range_state
+
+
+def run_once(server, start_url, clickhouse, args, incremental):
+    requests_before, rows_before = server.requests_total, clickhouse.rows
+    started = time.monotonic()
+    parser = WildberriesPriceRangeParser(start_url, backend="http", concurrency=args.concurrency,
+                                         max_products=args.max_products, incremental=incremental,
+                                         ch_client=clickhouse)
+    complete = parser.run()
+    return {
+        "complete": complete,
+        "requests": server.requests_total - requests_before,
+        "new_items": clickhouse.rows - rows_before,
+        "elapsed": time.monotonic() - started,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк инкрементального обновления")
+    arg_parser.add_argument("--products", type=int, default=60000)
+    arg_parser.add_argument("--max-products", type=int, default=6000, help="товаров в одном блоке")
+    arg_parser.add_argument("--churn", type=float, nargs="+", default=[0, 0.1, 0.3, 1.0],
+                            help="доли диапазонов с новыми товарами перед каждым инкрементальным запуском")
+    arg_parser.add_argument("--new-per-range", type=int, default=20, help="новых товаров в изменившемся диапазоне")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа сервера, с")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    configure_logging(level="WARNING")
+    workdir = tempfile.mkdtemp(prefix="bench-incremental-")
+    settings.RANGE_STATE_PATH = f"{workdir}/range_state.sqlite3"
+    settings.CHECKPOINT_DIR = f"{workdir}/checkpoints"
+    settings.PROBE_CACHE_PATH = ""
+    settings.CRAWL_RATE_LIMIT = 1000.0
+    settings.FETCH_INITIAL_RATE = 1000.0
+
+    catalog = FakeCatalog(args.products)
+    server = start_fake_catalog(catalog, latency=args.latency)
+    settings.HTTP_CATALOG_API_URL = f"{server.base_url}/api/catalog"
+    start_url = f"{server.base_url}/catalog/bench/category?sort=popular&page=1&priceU=100%3B1000000000"
+    clickhouse = MemoryClickHouse()
+
+    rnd = random.Random(1)
+    rows = [("полный", "—", run_once(server, start_url, clickhouse, args, incremental=False))]
+    for churn in args.churn:
+        # Новые товары появляются в случайной доле диапазонов прошлого обхода
+        ranges = get_range_state().ranges(category_key(start_url))
+        changed = rnd.sample(ranges, round(len(ranges) * churn))
+        catalog.add_products(rnd.randint(r["lower"], r["upper"]) for r in changed for _ in range(args.new_per_range))
+        stats = run_once(server, start_url, clickhouse, args, incremental=True)
+        rows.append(("инкремент", f"{len(changed)}/{len(ranges)}", stats))
+    server.shutdown()
+
+    full_requests = rows[0][2]["requests"]
+    print(f"\n{'запуск':>10} {'изменено':>9} {'запросов':>9} {'от полного':>11} {'новых':>7} {'время, с':>9}")
+    for mode, changed, stats in rows:
+        assert stats["complete"], f"{mode}: обход не завершен"
+        print(f"{mode:>10} {changed:>9} {stats['requests']:>9} {stats['requests'] / full_requests * 100:>10.1f}% "
+              f"{stats['new_items']:>7} {stats['elapsed']:>9.2f}")
+    assert clickhouse.rows == len(catalog), f"собрано {clickhouse.rows} товаров из {len(catalog)}"
+    print(f"Все {len(catalog)} товаров собраны без повторов")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_probes.py
+"""
+Бенчмарк числа проб при разбиении категории на ценовые диапазоны.
+Сравнивает прежний подбор делением пополам (legacy_find_suitable_upper) с RangePlanner
+на синтетических распределениях цен. Пробы считаются без сети — по модели каталога в памяти.
+
+Запуск: python -m benchmarks.bench_probes --products 200000
+"""
+import argparse
+import re
+
+from benchmarks.fake_catalog import FakeCatalog
+from selenium_parser.utils import price_range_utils
+from selenium_parser.utils.price_range_utils import build_range_url, get_max_upper_price
+from selenium_parser.utils.range_planner import RangePlanner
+
+START_URL = "https://www.wildberries.ru/catalog/bench/category?sort=popular&page=1&priceU=100%3B1000000000"
+
+
+class CatalogCountBackend:
+    """Бэкенд, отвечающий на пробы количеством товаров из модели каталога и считающий загрузки."""
+
+    name = "bench"
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.loads = 0
+
+    def count_products(self, url):
+        self.loads += 1
+        lower, upper = re.search(r'priceU=(\d+)%3B(\d+)', url).groups()
+        return self.catalog.count(int(lower), int(upper))
+
+
+def legacy_find_suitable_upper(backend, base_url, lower_price):
+    """Прежний алгоритм find_suitable_upper: бисекция с шагом 0.1 руб и повторной пробой в конце."""
+    low_price = lower_price
+    high_price = get_max_upper_price(base_url)
+    suitable_upper = None
+    suitable_count = None
+
+    def load_and_count(lower, upper):
+        return backend.count_products(build_range_url(base_url, lower, upper))
+
+    total_count = load_and_count(low_price, high_price)
+    if total_count is None:
+        return None, None
+    if total_count < price_range_utils.target_min_count:
+        return high_price, total_count
+
+    left = low_price
+    right = high_price
+    while left <= right:
+        mid = (left + right) / 2.0
+        count = load_and_count(low_price, mid)
+        if count is None:
+            break
+        if price_range_utils.target_min_count <= count <= price_range_utils.target_max_count:
+            suitable_upper = mid
+            suitable_count = count
+            break
+        if count > price_range_utils.target_max_count:
+            suitable_upper = mid
+            right = mid - 0.1
+        else:
+            left = mid + 0.1
+        if (right - left) < 0.1:
+            break
+
+    if suitable_upper is not None:
+        suitable_upper = round(suitable_upper, 2)
+        final_count = load_and_count(low_price, suitable_upper)
+        suitable_count = final_count if final_count is not None else suitable_count
+    return suitable_upper, suitable_count
+
+
+def run_legacy(catalog):
+    backend = CatalogCountBackend(catalog)
+    lower = 1.0
+    max_upper = get_max_upper_price(START_URL)
+    blocks = 0
+    while lower < max_upper:
+        upper, _ = legacy_find_suitable_upper(backend, START_URL, lower)
+        if upper is None:
+            break
+        blocks += 1
+        lower = upper
+    return blocks, backend.loads
+
+
+def run_planner(catalog):
+    backend = CatalogCountBackend(catalog)
+    ranges = RangePlanner(backend, START_URL, cache=False).plan()
+    covered = sum(count for _, _, count in ranges)
+    assert covered == len(catalog), f"разбиение потеряло товары: {covered} из {len(catalog)}"
+    return len(ranges), backend.loads
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк числа проб разбиения по цене")
+    arg_parser.add_argument("--products", type=int, default=200000)
+    arg_parser.add_argument("--distributions", nargs="+", default=["lognormal", "uniform", "bimodal"])
+    args = arg_parser.parse_args()
+
+    rows = []
+    for distribution in args.distributions:
+        catalog = FakeCatalog(args.products, distribution)
+        legacy_blocks, legacy_loads = run_legacy(catalog)
+        planner_blocks, planner_loads = run_planner(catalog)
+        rows.append((distribution, legacy_blocks, legacy_loads, planner_blocks, planner_loads))
+
+    print(f"\nТоваров в категории: {args.products}")
+    print(f"{'распределение':>14} {'бисекция: блоков/проб':>22} {'на блок':>8} "
+          f"{'планировщик: блоков/проб':>25} {'на блок':>8} {'выигрыш':>8}")
+    for distribution, lb, ll, pb, pl in rows:
+        print(f"{distribution:>14} {lb:>12}/{ll:<9} {ll / max(lb, 1):>8.1f} "
+              f"{pb:>15}/{pl:<9} {pl / max(pb, 1):>8.1f} {ll / max(pl, 1):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
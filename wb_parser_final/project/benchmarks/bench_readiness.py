@@ -0,0 +1,258 @@
+# benchmarks/bench_readiness.py
+"""
+Бенчмарк ожидания готовности страницы в SeleniumBackend: фиксированные паузы (PAGE_READINESS = "sleep")
+против ожидания по событиям (MutationObserver, незавершенные запросы, стабильность карточек — "events").
+
+Браузер заменен фейковым драйвером с моделью страницы каталога: документ загружается за load секунд,
+первые карточки отрисовываются через render секунд, остальные подгружаются пачками запросами по мере прокрутки.
+Ожидание по событиям выполняется тем же алгоритмом, что и WAIT_JS, на модели страницы. Время виртуальное
+(паузы бэкенда не ждут по-настоящему), поэтому прогон занимает секунды, а результаты повторяемы.
+
+Для каждого профиля задержек и режима выводятся секунды на страницу, время фаз ожидания и прокрутки,
+собранные карточки (из CATALOG_PAGE_SIZE) и число неполных страниц: фиксированные паузы теряют карточки,
+если сайт отвечает медленнее, чем рассчитаны паузы, и тратят лишнее время, если быстрее.
+
+Запуск: python -m benchmarks.bench_readiness --pages 20
+"""
+import argparse
+import random
+
+from selenium_parser import settings
+from selenium_parser.backends import selenium_backend
+from selenium_parser.backends.selenium_backend import SeleniumBackend
+from selenium_parser.parsers.wildberries_parser_v2 import parse_products_from_page
+from selenium_parser.utils import page_readiness, phase_timer
+from selenium_parser.utils.browser_pool import BrowserPool
+from selenium_parser.utils.log import configure_logging
+
+# Профили задержек сайта, секунды: загрузка документа, отрисовка первых карточек, подгрузка пачки (от и до);
+# poll — сайт держит постоянно открытый запрос (long polling), который никогда не завершается
+PROFILES = {
+    "fast": {"load": 0.4, "render": 0.2, "batch": (0.15, 0.3)},
+    "typical": {"load": 0.8, "render": 0.5, "batch": (0.3, 0.8)},
+    "slow": {"load": 1.5, "render": 1.2, "batch": (0.8, 2.0)},
+    "polling": {"load": 0.8, "render": 0.5, "batch": (0.3, 0.8), "poll": True},
+}
+VIEWPORT_HEIGHT = 900
+HEADER_HEIGHT = 600
+ROW_HEIGHT = 450
+CARDS_PER_ROW = 4
+FIRST_BATCH = 32
+BATCH = 16
+# Подгрузка начинается, когда до конца документа остается меньше этого расстояния
+LAZY_MARGIN = 1200
+TICK = 0.05
+
+
+class VirtualClock:
+    """Виртуальное время: sleep() не ждет, а сдвигает часы. Подменяет модуль time в бэкенде и PhaseTimer."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def perf_counter(self):
+        return self.now
+
+    monotonic = time = perf_counter
+
+
+class FakeCatalogPage:
+    """Модель страницы каталога: отрисовка карточек, высота документа, прокрутка и подгрузка пачками."""
+
+    def __init__(self, clock, profile, rnd, page_number):
+        self.clock = clock
+        self.profile = profile
+        self.rnd = rnd
+        self.page_number = page_number
+        self.opened_at = clock.now
+        self.scroll_y = 0
+        self.cards = 0
+        self.last_mutation = self.opened_at
+        self.loading_started = self.loading_until = None
+        self.rendered = False
+
+    @property
+    def ready_state(self):
+        return "complete" if self.clock.now >= self.opened_at + self.profile["load"] else "loading"
+
+    @property
+    def height(self):
+        rows = -(-self.cards // CARDS_PER_ROW)
+        return HEADER_HEIGHT + rows * ROW_HEIGHT + VIEWPORT_HEIGHT
+
+    def pending_requests(self):
+        """Время начала незавершенных запросов, как их видит инструментирование INSTRUMENT_JS."""
+        loaded_at = self.opened_at + self.profile["load"]
+        pending = []
+        if self.clock.now >= loaded_at:
+            # Первые карточки тоже приходят запросом к API каталога
+            if not self.rendered:
+                pending.append(loaded_at)
+            if self.profile.get("poll"):
+                pending.append(loaded_at)
+        if self.loading_until is not None:
+            pending.append(self.loading_started)
+        return pending
+
+    def advance(self):
+        """Применяет события страницы, случившиеся к текущему времени."""
+        now = self.clock.now
+        render_at = self.opened_at + self.profile["load"] + self.profile["render"]
+        if not self.rendered and now >= render_at:
+            self.rendered = True
+            self.cards = FIRST_BATCH
+            self.last_mutation = render_at
+        if self.loading_until is not None and now >= self.loading_until:
+            self.cards = min(settings.CATALOG_PAGE_SIZE, self.cards + BATCH)
+            self.last_mutation = self.loading_until
+            self.loading_until = None
+        # Как IntersectionObserver на сайте: конец списка близко к экрану — запрашиваем следующую пачку
+        near_bottom = self.scroll_y + VIEWPORT_HEIGHT >= self.height - LAZY_MARGIN
+        if self.rendered and near_bottom and self.loading_until is None and self.cards < settings.CATALOG_PAGE_SIZE:
+            self.loading_started = now
+            self.loading_until = now + self.rnd.uniform(*self.profile["batch"])
+
+    def scroll_by(self, dy):
+        self.advance()
+        self.scroll_y = max(0, min(self.height - VIEWPORT_HEIGHT, self.scroll_y + dy))
+        self.advance()
+
+    def first_card(self):
+        return f"/catalog/{self.page_number}00000/detail.aspx" if self.cards else None
+
+    def html(self):
+        self.advance()
+        cards = "".join(f'<a class="product-card__link" href="/catalog/{self.page_number}{n:05d}/detail.aspx"></a>'
+                        for n in range(self.cards))
+        return (f"<html><body><p class=\"goods-count\">{settings.CATALOG_PAGE_SIZE * 50} товаров</p>"
+                f"<div class=\"product-card-list\">{cards}</div></body></html>")
+
+
+class FakeDriver:
+    """Драйвер Selenium, отвечающий на скрипты SeleniumBackend по модели страницы вместо браузера."""
+
+    def __init__(self, clock, profile, rnd):
+        self.clock = clock
+        self.profile = profile
+        self.rnd = rnd
+        self.page = None
+        self.opened = 0
+
+    def get(self, url):
+        # Как и Selenium, get() возвращается после события load документа
+        self.opened += 1
+        self.page = FakeCatalogPage(self.clock, self.profile, self.rnd, self.opened)
+        self.clock.sleep(self.profile["load"])
+
+    @property
+    def page_source(self):
+        return self.page.html()
+
+    def execute_script(self, script, *args):
+        page = self.page
+        if script == "return 1":
+            return 1
+        page.advance()
+        if script == "window.scrollBy(0, 450);":
+            page.scroll_by(450)
+            return None
+        if script == "return window.pageYOffset + window.innerHeight":
+            return page.scroll_y + VIEWPORT_HEIGHT
+        if script == "return document.body.scrollHeight":
+            return page.height
+        if script == page_readiness.FIRST_CARD_JS:
+            return page.first_card()
+        raise NotImplementedError(script)
+
+    def execute_async_script(self, script, selector, quiet_ms, timeout_ms, previous_first, scroll, grace_ms):
+        """Алгоритм WAIT_JS: опрос каждые 50 мс на модели страницы."""
+        assert script == page_readiness.WAIT_JS
+        page = self.page
+        quiet, timeout, grace = quiet_ms / 1000, timeout_ms / 1000, grace_ms / 1000
+        started = self.clock.now
+        last_cards, last_height, stable_since, steps = -1, -1, started, 0
+        while True:
+            page.advance()
+            now = self.clock.now
+            first = page.first_card()
+            if page.cards != last_cards or page.height != last_height:
+                last_cards, last_height, stable_since = page.cards, page.height, now
+            stable_for = now - stable_since
+            at_bottom = page.scroll_y + VIEWPORT_HEIGHT >= page.height - 10
+            loading = sum(1 for started_at in page.pending_requests() if now - started_at < grace)
+            idle = loading == 0 and now - page.last_mutation >= quiet
+            # Счетчик товаров есть в документе сразу после загрузки
+            loaded = page.ready_state != "loading"
+            changed = previous_first is None or first != previous_first
+            if scroll and not at_bottom and (loading == 0 or stable_for >= quiet):
+                page.scroll_by(VIEWPORT_HEIGHT * 2)
+                steps += 1
+            ready = loaded and changed and stable_for >= quiet and idle and (not scroll or at_bottom)
+            if ready or now - started >= timeout:
+                return {"cards": page.cards, "height": page.height, "first": first, "steps": steps,
+                        "elapsed": (now - started) * 1000, "timedOut": not ready}
+            self.clock.sleep(TICK)
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_cdp_cmd(self, cmd, params):
+        pass
+
+    def quit(self):
+        pass
+
+
+def run_mode(mode, profile, pages, seed):
+    clock = VirtualClock()
+    rnd = random.Random(seed)
+    pool = BrowserPool(size=1, max_pages=pages + 1, driver_factory=lambda: FakeDriver(clock, profile, rnd))
+    backend = SeleniumBackend("https://www.wildberries.ru", "bench", pool=pool, readiness=mode)
+    cards = []
+    real_time = selenium_backend.time, phase_timer.time
+    selenium_backend.time = phase_timer.time = clock
+    try:
+        for page_number in range(1, pages + 1):
+            html = backend.fetch_raw("https://www.wildberries.ru/catalog/bench?page=1", page_number)
+            cards.append(len(parse_products_from_page(html, backend.base_domain, "bench")))
+    finally:
+        selenium_backend.time, phase_timer.time = real_time
+    elapsed = clock.now
+    result = {
+        "seconds_per_page": elapsed / pages,
+        "ready": backend.timer.average("ready"),
+        "scroll": backend.timer.average("scroll"),
+        "cards": sum(cards) / pages,
+        "incomplete": sum(1 for n in cards if n < settings.CATALOG_PAGE_SIZE),
+        "timeouts": backend.readiness.timeouts if mode == "events" else 0,
+    }
+    backend.close()
+    pool.close()
+    return result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк ожидания готовности страницы")
+    arg_parser.add_argument("--pages", type=int, default=20, help="страниц на профиль и режим")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    configure_logging(level="WARNING")
+    print(f"{'профиль':>8} {'режим':>7} {'с/стр':>7} {'ожидание':>9} {'прокрутка':>10} {'карточек':>9} "
+          f"{'неполных':>9} {'таймаутов':>10}")
+    for name, profile in PROFILES.items():
+        results = {mode: run_mode(mode, profile, args.pages, args.seed) for mode in ("sleep", "events")}
+        for mode, r in results.items():
+            print(f"{name:>8} {mode:>7} {r['seconds_per_page']:>7.2f} {r['ready']:>9.2f} {r['scroll']:>10.2f} "
+                  f"{r['cards']:>9.1f} {r['incomplete']:>9} {r['timeouts']:>10}")
+        share = results["events"]["seconds_per_page"] / results["sleep"]["seconds_per_page"]
+        print(f"{'':>8} время events — {share:.0%} от sleep")
+        # Ожидание по событиям не должно терять карточки ни при каких задержках
+        assert results["events"]["incomplete"] == 0, f"{name}: неполных страниц {results['events']['incomplete']}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_sinks.py
+"""
+Бенчмарк приемников товаров: скорость записи страниц (add_many по 100 товаров) в каждый приемник,
+размер файлов на диске и время загрузки индекса артикулов из них.
+
+- clickhouse — ClickHouseSink с ClickHouse в памяти процесса (MemoryClickHouse): только накладные расходы буфера;
+- file/ndjson, file/parquet, file/arrow — FileSink во временном каталоге (parquet и arrow — при установленном pyarrow).
+
+Запуск: python -m benchmarks.bench_sinks --rows 500000 --batch-rows 100000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_suite import MemoryClickHouse
+from selenium_parser.sinks.clickhouse_sink import ClickHouseSink
+from selenium_parser.sinks.file_sink import FileSink, pyarrow
+from selenium_parser.utils.log import configure_logging
+from selenium_parser.utils.product_record import ProductRecord
+
+CATEGORIES = ["obuv_detskaya_sandalii", "obuv_muzhskaya_kedy-i-krossovki", "zhenshchinam_odezhda_platya",
+              "elektronika_smartfony-i-telefony_vse-smartfony", "dom-i-dacha_kuhnya_posuda"]
+
+
+def make_pages(rows, page_size=100):
+    """Страницы товаров как из каталога: у всех товаров страницы одна категория."""
+    rnd = random.Random(3)
+    articles = rnd.sample(range(10_000_000, 400_000_000), rows)
+    pages = []
+    for start in range(0, rows, page_size):
+        category = rnd.choice(CATEGORIES)
+        pages.append([ProductRecord(str(article), f"https://www.wildberries.ru/catalog/{article}/detail.aspx",
+                                    category) for article in articles[start:start + page_size]])
+    return pages
+
+
+def run_sink(sink, pages):
+    started = time.perf_counter()
+    with sink:
+        for products in pages:
+            sink.add_many(products)
+            sink.flush_if_due()
+    return time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк приемников товаров")
+    arg_parser.add_argument("--rows", type=int, default=500_000)
+    arg_parser.add_argument("--batch-rows", type=int, default=100_000, help="строк в пакете (и в файле)")
+    args = arg_parser.parse_args()
+
+    configure_logging(level="WARNING")
+    pages = make_pages(args.rows)
+    batch = {"max_rows": args.batch_rows, "max_bytes": 1 << 40, "max_seconds": 3600}
+
+    results = []
+    clickhouse = MemoryClickHouse()
+    elapsed = run_sink(ClickHouseSink(ch_client=clickhouse, **batch), pages)
+    assert clickhouse.rows == args.rows, f"записано {clickhouse.rows} строк из {args.rows}"
+    results.append(("clickhouse", elapsed, clickhouse.inserts, None, None))
+
+    formats = ["ndjson"] + (["parquet", "arrow"] if pyarrow is not None else [])
+    for file_format in formats:
+        directory = tempfile.mkdtemp(prefix=f"bench-sink-{file_format}-")
+        try:
+            sink = FileSink(directory, file_format, **batch)
+            elapsed = run_sink(sink, pages)
+            started = time.perf_counter()
+            index = sink.load_index()
+            load_seconds = time.perf_counter() - started
+            assert len(index) == args.rows, f"{file_format}: в файлах {len(index)} артикулов из {args.rows}"
+            size = sum(os.path.getsize(path) for path in sink.files)
+            results.append((f"file/{file_format}", elapsed, len(sink.files), size, load_seconds))
+        finally:
+            shutil.rmtree(directory)
+    if pyarrow is None:
+        print("pyarrow не установлен: parquet и arrow пропущены")
+
+    print(f"\n{args.rows} строк, пакет {args.batch_rows}")
+    print(f"{'приемник':>14} {'строк/с':>10} {'пакетов':>8} {'МБ':>8} {'байт/стр':>9} {'индекс, с':>10}")
+    for name, elapsed, batches, size, load_seconds in results:
+        size_text = f"{size / 1024 / 1024:>8.1f} {size / args.rows:>9.1f}" if size else f"{'—':>8} {'—':>9}"
+        load_text = f"{load_seconds:>10.2f}" if load_seconds is not None else f"{'—':>10}"
+        print(f"{name:>14} {args.rows / elapsed:>10.0f} {batches:>8} {size_text} {load_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# benchmarks/bench_suite.py
+"""
+Офлайн-набор бенчмарков всего конвейера на фейковом каталоге (benchmarks/fake_catalog.py):
+
+- planner — разбиение категории RangePlanner'ом, пробы читают строку «N товаров» из HTML;
+- extract — разбор HTML-страниц каталога, отданных сервером;
+- dedup   — проверка артикулов по ArticleIndex с заданной долей повторов;
+- writer  — ClickHouseSink с ClickHouse в памяти процесса (MemoryClickHouse);
+- crawl   — полный обход: разбиение, ConcurrentCrawler, дедупликация и пакетная запись.
+
+Каждый сценарий выполняется в отдельном процессе, поэтому процессорное время и пиковая память (RSS)
+относятся только к нему. Сценарий повторяется --runs раз, в сравнение идет лучший результат. Перед сценарием
+процесс измеряет скорость эталонного цикла (calibration): скорости и процессорное время сравниваются
+с базовым прогоном benchmarks/baseline.json с поправкой на нее, поэтому загрузка машины не выглядит ухудшением.
+Базовый прогон все равно привязан к машине (другой процессор — другие соотношения). При ухудшении ключевой
+метрики больше допуска процесс завершается с кодом 1.
+
+Запуск: python -m benchmarks.bench_suite
+        python -m benchmarks.bench_suite --scenarios crawl planner --save-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+from benchmarks.fake_catalog import FakeCatalog, start_fake_catalog
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Ключевые метрики сценариев и направление: True — чем больше, тем лучше
+KEY_METRICS = {
+    "planner": {"probes_per_block": False},
+    "extract": {"pages_per_second": True},
+    "dedup": {"ops_per_second": True},
+    "writer": {"rows_per_second": True},
+    "crawl": {"pages_per_second": True, "cpu_seconds": False, "peak_rss_mb": False},
+}
+# Метрики, зависящие от скорости процессора: сравниваются с поправкой на калибровку
+SPEED_METRICS = {"pages_per_second", "ops_per_second", "rows_per_second"}
+TIME_METRICS = {"cpu_seconds"}
+
+
+class MemoryClickHouse:
+    """
+    ClickHouse в памяти процесса: принимает колоночные INSERT от ClickHouseSink
+    и отдает артикулы потоком блоков для ArticleIndex.load_from_clickhouse.
+    """
+
+    def __init__(self, articles=(), block_size=65536):
+        self.articles = list(articles)
+        self.block_size = block_size
+        self.inserts = 0
+        self.rows = 0
+
+    def insert(self, table, data, column_names, column_oriented=False):
+        columns = data if column_oriented else list(zip(*data))
+        self.inserts += 1
+        self.rows += len(columns[0])
+        self.articles.extend(int(article) for article in columns[column_names.index("article")])
+
+    def query_column_block_stream(self, query, parameters=None):
+        articles = sorted(set(self.articles))
+        return _BlockStream([[articles[i:i + self.block_size]] for i in range(0, len(articles), self.block_size)])
+
+
+class _BlockStream:
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def __enter__(self):
+        return iter(self.blocks)
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def _catalog_url(base_url, category="bench/category"):
+    return f"{base_url}/catalog/{category}?sort=popular&page=1&priceU=100%3B1000000000"
+
+
+def _html_backend(base_url):
+    """HTTP-бэкенд без JSON API: количество и товары берутся из HTML, как со страницы Wildberries."""
+    from selenium_parser.backends.http_backend import HttpBackend
+    return HttpBackend(base_url, "bench_category", api_url="")
+
+
+def bench_planner(base_url, args):
+    from selenium_parser.utils.range_planner import RangePlanner
+
+    with _html_backend(base_url) as backend:
+        started = time.perf_counter()
+        planner = RangePlanner(backend, _catalog_url(base_url), cache=False)
+        ranges = planner.plan()
+        elapsed = time.perf_counter() - started
+    covered = sum(count for _, _, count in ranges)
+    assert covered == args.products, f"разбиение потеряло товары: {covered} из {args.products}"
+    return {"blocks": len(ranges), "probes": planner.probes, "probes_per_block": planner.probes / len(ranges),
+            "seconds": elapsed}
+
+
+def bench_extract(base_url, args):
+    from selenium_parser.backends.base import set_page_param
+    from selenium_parser.parsers.wildberries_parser_v2 import get_extractor
+
+    extractor = get_extractor()
+    with _html_backend(base_url) as backend:
+        pages = [backend.session.get(set_page_param(_catalog_url(base_url), n)).text for n in range(1, 21)]
+    started = time.perf_counter()
+    items = 0
+    for _ in range(args.repeat):
+        for html in pages:
+            items += len(extractor(html, base_url, "bench_category"))
+    elapsed = time.perf_counter() - started
+    assert items == len(pages) * args.repeat * 100, f"извлечено {items} товаров"
+    processed = len(pages) * args.repeat
+    return {"pages": processed, "seconds": elapsed, "pages_per_second": processed / elapsed,
+            "mb_per_second": sum(len(html.encode()) for html in pages) * args.repeat / elapsed / 1024 / 1024}
+
+
+def bench_dedup(base_url, args):
+    from selenium_parser.utils.article_index import ArticleIndex
+
+    rnd = random.Random(7)
+    known = rnd.sample(range(10_000_000, 400_000_000), args.known_articles)
+    index = ArticleIndex(known)
+    # Половина проверяемых артикулов уже известна, половина — новые
+    stream = [str(rnd.choice(known)) if rnd.random() < 0.5 else str(rnd.randint(400_000_001, 900_000_000))
+              for _ in range(args.dedup_ops)]
+    started = time.perf_counter()
+    new = sum(index.add(article) for article in stream)
+    elapsed = time.perf_counter() - started
+    return {"ops": len(stream), "new": new, "seconds": elapsed, "ops_per_second": len(stream) / elapsed,
+            "index_mb": index.memory_bytes() / 1024 / 1024}
+
+
+def bench_writer(base_url, args):
+    from selenium_parser.sinks.clickhouse_sink import ClickHouseSink
+
+    products = [{"article": str(10_000_000 + i), "link": f"{base_url}/catalog/{10_000_000 + i}/detail.aspx",
+                 "category": "bench_category_subcategory"} for i in range(args.writer_rows)]
+    clickhouse = MemoryClickHouse()
+    started = time.perf_counter()
+    with ClickHouseSink(ch_client=clickhouse, max_seconds=3600) as writer:
+        for product in products:
+            writer.add(product)
+    elapsed = time.perf_counter() - started
+    assert clickhouse.rows == len(products), f"записано {clickhouse.rows} строк из {len(products)}"
+    return {"rows": clickhouse.rows, "batches": clickhouse.inserts, "seconds": elapsed,
+            "rows_per_second": clickhouse.rows / elapsed}
+
+
+def bench_crawl(base_url, args):
+    from selenium_parser.parsers.concurrent_crawler import ConcurrentCrawler
+    from selenium_parser.parsers.wildberries_price_range_parser import WildberriesPriceRangeParser
+    from selenium_parser.utils.article_index import load_article_index
+    from selenium_parser.sinks.clickhouse_sink import ClickHouseSink
+
+    start_url = _catalog_url(base_url)
+    clickhouse = MemoryClickHouse()
+    article_index = load_article_index(clickhouse, "bench_category")
+    crawler = ConcurrentCrawler(start_url, lambda: _html_backend(base_url), concurrency=args.concurrency,
+                                rate_limit=1000.0)
+    started = time.perf_counter()
+    with _html_backend(base_url) as backend:
+        ranges = crawler.plan(backend)
+    with ClickHouseSink(ch_client=clickhouse) as writer:
+        stats = crawler.run(ranges, lambda range_url, page_number, products:
+                            WildberriesPriceRangeParser._store_products(products, writer, article_index))
+    elapsed = time.perf_counter() - started
+    assert clickhouse.rows == args.products, f"записано {clickhouse.rows} товаров из {args.products}"
+    return {"pages": stats["pages"], "items": clickhouse.rows, "errors": stats["errors"], "seconds": elapsed,
+            "pages_per_second": stats["pages"] / elapsed, "items_per_second": clickhouse.rows / elapsed}
+
+
+SCENARIOS = {
+    "planner": bench_planner,
+    "extract": bench_extract,
+    "dedup": bench_dedup,
+    "writer": bench_writer,
+    "crawl": bench_crawl,
+}
+
+
+def calibrate(rounds=5):
+    """
+    Скорость эталонного цикла на Python (прогонов в секунду, лучший из rounds) — сколько процессора
+    досталось процессу сейчас. Цикл похож на нагрузку конвейера: сортировка, строки и словарь.
+    """
+    rnd = random.Random(0)
+    values = [rnd.random() for _ in range(50_000)]
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        index = {f"{value:.12f}": i for i, value in enumerate(sorted(values))}
+        sum(index[f"{value:.12f}"] for value in values)
+        best = min(best, time.perf_counter() - started)
+    return 1 / best
+
+
+def _scenario_process(name, base_url, args, results):
+    from selenium_parser import settings
+    from selenium_parser.utils.log import configure_logging
+
+    settings.PROBE_CACHE_PATH = ""
+    settings.RANGE_STATE_PATH = ""
+    configure_logging(level="WARNING")
+    calibration = calibrate()
+    cpu_started = time.process_time()
+    result = SCENARIOS[name](base_url, args)
+    result["calibration"] = calibration
+    result["cpu_seconds"] = time.process_time() - cpu_started
+    # ru_maxrss в Linux — в килобайтах
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put(result)
+
+
+def run_scenario(name, base_url, args):
+    """Запускает сценарий в отдельном (spawn) процессе и возвращает его метрики."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_scenario_process, args=(name, base_url, args, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"сценарий {name} завершился с кодом {process.exitcode}")
+    return results.get()
+
+
+def _adjusted(metric, run, base):
+    """Значение метрики прогона в масштабе базового прогона: с поправкой на калибровку, если она есть у обоих."""
+    value = run[metric]
+    if run.get("calibration") and base.get("calibration"):
+        # factor > 1 — процессу сейчас досталось меньше процессора, чем при базовом прогоне
+        factor = base["calibration"] / run["calibration"]
+        if metric in SPEED_METRICS:
+            return value * factor
+        if metric in TIME_METRICS:
+            return value / factor
+    return value
+
+
+def best_run(name, runs):
+    """Прогон с лучшим значением первой ключевой метрики сценария (с поправкой на его калибровку)."""
+    metric, higher_is_better = next(iter(KEY_METRICS[name].items()))
+    scores = [_adjusted(metric, run, {"calibration": 1.0}) for run in runs]
+    best = max(scores) if higher_is_better else min(scores)
+    return runs[scores.index(best)]
+
+
+def compare(results, baseline, tolerance):
+    """
+    Печатает сравнение с базовым прогоном: results — списки прогонов по сценариям, по каждой метрике
+    берется лучший прогон. Возвращает список ухудшений.
+    """
+    regressions = []
+    print(f"\n{'сценарий':>9} {'метрика':>18} {'база':>12} {'сейчас':>12} {'изменение':>10}")
+    for name, runs in results.items():
+        base_metrics = baseline.get(name, {})
+        for metric, higher_is_better in KEY_METRICS[name].items():
+            values = [_adjusted(metric, run, base_metrics) for run in runs]
+            current = max(values) if higher_is_better else min(values)
+            base = base_metrics.get(metric)
+            if not base:
+                print(f"{name:>9} {metric:>18} {'—':>12} {current:>12.2f}")
+                continue
+            change = (current - base) / base
+            worse = -change if higher_is_better else change
+            mark = "  ⚠️ хуже" if worse > tolerance else ""
+            if mark:
+                regressions.append((name, metric, base, current))
+            print(f"{name:>9} {metric:>18} {base:>12.2f} {current:>12.2f} {change * 100:>+9.1f}%{mark}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Офлайн-бенчмарки конвейера парсера")
+    arg_parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    arg_parser.add_argument("--products", type=int, default=20000, help="товаров в фейковой категории")
+    arg_parser.add_argument("--distribution", default="lognormal", choices=["lognormal", "uniform", "bimodal"])
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа сервера, с")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="воркеров обхода в сценарии crawl")
+    arg_parser.add_argument("--repeat", type=int, default=50, help="повторов разбора в сценарии extract")
+    arg_parser.add_argument("--known-articles", type=int, default=1_000_000, help="артикулов в индексе dedup")
+    arg_parser.add_argument("--dedup-ops", type=int, default=500_000)
+    arg_parser.add_argument("--writer-rows", type=int, default=200_000)
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как базовые")
+    arg_parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение, доля")
+    arg_parser.add_argument("--runs", type=int, default=3, help="прогонов каждого сценария (берется лучший)")
+    args = arg_parser.parse_args()
+
+    server = start_fake_catalog(FakeCatalog(args.products, args.distribution), latency=args.latency)
+    results = {}
+    try:
+        for name in args.scenarios:
+            results[name] = [run_scenario(name, server.base_url, args) for _ in range(args.runs)]
+            summary = ", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                for key, value in best_run(name, results[name]).items())
+            print(f"✅ {name}: {summary}")
+    finally:
+        server.shutdown()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update({name: best_run(name, runs) for name, runs in results.items()})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n💾 Базовый прогон сохранен: {args.baseline}")
+    elif regressions:
+        print(f"\n❌ Ухудшение больше {args.tolerance * 100:.0f}%: "
+              + ", ".join(f"{name}.{metric}" for name, metric, _, _ in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# benchmarks/fake_catalog.py
+"""
+Локальный фейковый каталог Wildberries для бенчмарков и проверки бэкендов без выхода в сеть.
+
+Товары генерируются детерминированно (seed), цены — из заданного распределения.
+Сервер понимает фильтр priceU=<от>;<до> в копейках, пагинацию page=N,
+отдает HTML со строкой «N товаров» и кнопкой pagination-next, а по пути /api/catalog — JSON.
+
+Для проверки управления запросами сервер умеет ограничивать клиента как настоящий сайт:
+throttle_rate — частота, сверх которой отвечает 429 (с Retry-After, если задан retry_after),
+error_rate — доля случайных 429, captcha — вместо 429 на HTML-страницах отдавать страницу капчи (200),
+latency_jitter — случайная добавка к задержке ответа.
+
+Запуск: python -m benchmarks.fake_catalog --port 8800 --products 20000 --throttle-rate 20
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+
+PAGE_SIZE = 100
+FIRST_ARTICLE = 10_000_000
+
+
+def generate_prices(n_products, distribution="lognormal", seed=42):
+    """Генерирует цены товаров в копейках."""
+    rnd = random.Random(seed)
+    prices = []
+    for _ in range(n_products):
+        if distribution == "lognormal":
+            rub = rnd.lognormvariate(7.3, 1.1)  # медиана ~1500 руб, длинный хвост дорогих товаров
+        elif distribution == "uniform":
+            rub = rnd.uniform(1, 100_000)
+        elif distribution == "bimodal":
+            rub = rnd.lognormvariate(6.0, 0.6) if rnd.random() < 0.6 else rnd.lognormvariate(9.5, 0.5)
+        else:
+            raise ValueError(f"Неизвестное распределение: {distribution}")
+        # Округляем до рублей, как это обычно бывает на витрине, чтобы появились одинаковые цены
+        prices.append(max(100, int(round(rub)) * 100))
+    return prices
+
+
+class FakeCatalog:
+    """Детерминированный набор товаров с ценами и выборкой по диапазону priceU."""
+
+    def __init__(self, n_products=20000, distribution="lognormal", seed=42, page_size=PAGE_SIZE):
+        self.page_size = page_size
+        self.prices = generate_prices(n_products, distribution, seed)
+        self._sort()
+
+    def _sort(self):
+        # Порядок индекса = порядок «популярности» в выдаче
+        prices = self.prices
+        by_price = sorted(range(len(prices)), key=lambda i: prices[i])
+        self.sorted_prices = [prices[i] for i in by_price]
+        self.sorted_index = by_price
+
+    def add_products(self, prices):
+        """Добавляет новые товары с ценами в копейках (в конец выдачи) — изменения каталога между обходами."""
+        self.prices = self.prices + list(prices)
+        self._sort()
+
+    def __len__(self):
+        return len(self.prices)
+
+    @staticmethod
+    def article(index):
+        return FIRST_ARTICLE + index
+
+    def select(self, lower_kop, upper_kop):
+        """Индексы товаров с ценой в [lower_kop, upper_kop] в порядке выдачи."""
+        left = bisect_left(self.sorted_prices, lower_kop)
+        right = bisect_right(self.sorted_prices, upper_kop)
+        return sorted(self.sorted_index[left:right])
+
+    def count(self, lower_kop, upper_kop):
+        return bisect_right(self.sorted_prices, upper_kop) - bisect_left(self.sorted_prices, lower_kop)
+
+    def page(self, lower_kop, upper_kop, page_number):
+        selected = self.select(lower_kop, upper_kop)
+        start = (page_number - 1) * self.page_size
+        return selected[start:start + self.page_size], len(selected)
+
+
+def parse_price_range(query):
+    raw = query.get("priceU", ["0;100000000000"])[0]
+    lower, _, upper = raw.partition(";")
+    return int(lower or 0), int(upper or 100_000_000_000)
+
+
+def render_html(catalog, path, query, items, total):
+    page_number = int(query.get("page", ["1"])[0])
+    count_text = f"{total:,}".replace(",", " ")
+    cards = "\n".join(
+        f'<article class="product-card" data-nm-id="{catalog.article(i)}">'
+        f'<a class="product-card__link j-card-link" href="/catalog/{catalog.article(i)}/detail.aspx?targetUrl=GP"></a>'
+        f'<span class="price">{catalog.prices[i] // 100} ₽</span></article>'
+        for i in items
+    )
+    has_next = page_number * catalog.page_size < total
+    next_query = urlencode(dict(query, page=[str(page_number + 1)]), doseq=True)
+    pagination = f'<a class="pagination-next pagination__next" href="{path}?{next_query}">Следующая страница</a>' if has_next else ""
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Каталог</title></head><body>"
+        f"<div class=\"catalog-title-wrap\"><h1>Каталог</h1><p class=\"goods-count\">{count_text} товаров</p></div>"
+        f"<div class=\"product-card-list\">{cards}</div>"
+        f"<div class=\"pagination\">{pagination}</div>"
+        "</body></html>"
+    )
+
+
+CAPTCHA_HTML = ("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Почти готово...</title></head><body>"
+                "<div class=\"captcha\">Подтвердите, что вы не робот: мы заметили подозрительную активность</div>"
+                "</body></html>")
+
+
+class FakeCatalogServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, catalog, latency=0.0, latency_jitter=0.0, throttle_rate=None, error_rate=0.0,
+                 retry_after=None, captcha=False, seed=7):
+        super().__init__(address, FakeCatalogHandler)
+        self.catalog = catalog
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.captcha = captcha
+        self.requests_total = 0
+        self.throttled_total = 0
+        self._random = random.Random(seed)
+        self._tokens = max(1.0, throttle_rate or 0.0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """Учитывает запрос. False — клиента нужно ограничить (превышена частота или случайная ошибка)."""
+        with self._lock:
+            self.requests_total += 1
+            allowed = self._random.random() >= self.error_rate
+            if self.throttle_rate:
+                now = time.monotonic()
+                burst = max(1.0, self.throttle_rate)
+                self._tokens = min(burst, self._tokens + (now - self._updated) * self.throttle_rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                else:
+                    allowed = False
+            if not allowed:
+                self.throttled_total += 1
+            return allowed
+
+    def delay(self):
+        with self._lock:
+            return self.latency + (self._random.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeCatalogHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        allowed = server.admit()
+        delay = server.delay()
+        if delay:
+            time.sleep(delay)
+
+        parsed = urlparse(self.path)
+        if not allowed:
+            if server.captcha and not parsed.path.startswith("/api/"):
+                self._send(200, CAPTCHA_HTML.encode(), "text/html; charset=utf-8")
+            else:
+                self._send(429, b"Too Many Requests", "text/plain; charset=utf-8", retry_after=server.retry_after)
+            return
+
+        query = parse_qs(parsed.query)
+        lower, upper = parse_price_range(query)
+        page_number = int(query.get("page", ["1"])[0])
+        items, total = server.catalog.page(lower, upper, page_number)
+
+        if parsed.path.startswith("/api/"):
+            body = json.dumps({"data": {"total": total, "products": [
+                {"id": server.catalog.article(i), "salePriceU": server.catalog.prices[i]} for i in items
+            ]}}).encode()
+            content_type = "application/json; charset=utf-8"
+        else:
+            body = render_html(server.catalog, parsed.path, query, items, total).encode()
+            content_type = "text/html; charset=utf-8"
+        self._send(200, body, content_type)
+
+    def _send(self, status, body, content_type, retry_after=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fake_catalog(catalog=None, host="127.0.0.1", port=0, latency=0.0, **kwargs):
+    """
+    Запускает сервер в фоновом потоке. Возвращает объект сервера (адрес — server.base_url).
+    kwargs — ограничения клиента (throttle_rate, error_rate, retry_after, captcha, latency_jitter).
+    """
+    server = FakeCatalogServer((host, port), catalog or FakeCatalog(), latency=latency, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Фейковый каталог Wildberries")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8800)
+    arg_parser.add_argument("--products", type=int, default=20000)
+    arg_parser.add_argument("--distribution", default="lognormal", choices=["lognormal", "uniform", "bimodal"])
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа в секундах")
+    arg_parser.add_argument("--latency-jitter", type=float, default=0.0, help="случайная добавка к задержке, с")
+    arg_parser.add_argument("--throttle-rate", type=float, default=None, help="запросов в секунду до ответа 429")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="доля случайных ответов 429")
+    arg_parser.add_argument("--retry-after", type=int, default=None, help="заголовок Retry-After у 429, с")
+    arg_parser.add_argument("--captcha", action="store_true", help="вместо 429 на HTML-страницах отдавать капчу")
+    args = arg_parser.parse_args()
+
+    catalog = FakeCatalog(args.products, args.distribution, args.seed)
+    server = FakeCatalogServer((args.host, args.port), catalog, latency=args.latency,
+                               latency_jitter=args.latency_jitter, throttle_rate=args.throttle_rate,
+                               error_rate=args.error_rate, retry_after=args.retry_after, captcha=args.captcha)
+    print(f"Фейковый каталог: {server.base_url}/catalog/test/category ({len(catalog)} товаров)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
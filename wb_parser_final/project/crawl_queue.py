@@ -0,0 +1,74 @@
+import argparse
+import multiprocessing
+import sys
+
+from main import prepare_url
+from selenium_parser.parsers.distributed import QueueWorker, default_run_id, schedule_categories
+from selenium_parser.utils.work_queue import SqliteWorkQueue
+
+
+def read_urls(sources):
+    """URL категорий из аргументов; аргумент-файл читается построчно (пустые строки и # пропускаются)."""
+    urls = []
+    for source in sources:
+        if source.startswith("http"):
+            urls.append(source)
+            continue
+        with open(source, encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return urls
+
+
+def work(queue_path, backend, run_id):
+    queue = SqliteWorkQueue(queue_path)
+    try:
+        QueueWorker(queue, backend=backend, run_id=run_id).run()
+    finally:
+        queue.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Распределенный обход категорий Wildberries через общую очередь")
+    arg_parser.add_argument("--queue", help="файл очереди (по умолчанию settings.WORK_QUEUE_PATH)")
+    arg_parser.add_argument("--run-id", help="идентификатор запуска (по умолчанию для schedule — текущая дата, "
+                                             "для work и status — последний поставленный запуск)")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    schedule = commands.add_parser("schedule", help="поставить категории в очередь")
+    schedule.add_argument("sources", nargs="+", help="URL категорий или файлы со списком URL")
+
+    worker = commands.add_parser("work", help="запустить воркеры на этой машине")
+    worker.add_argument("--processes", type=int, default=1, help="число процессов-воркеров")
+    worker.add_argument("--backend", help="бэкенд загрузки: selenium или http")
+
+    commands.add_parser("status", help="состояние очереди")
+    args = arg_parser.parse_args()
+
+    queue = SqliteWorkQueue(args.queue)
+    if args.command == "schedule":
+        run_id = args.run_id or default_run_id()
+        added = schedule_categories(queue, [prepare_url(url) for url in read_urls(args.sources)], run_id)
+        print(f"📥 Запуск {run_id}: добавлено {added} категорий")
+    else:
+        # Запуск берется из очереди, а не из текущей даты: воркер, запущенный после полуночи, продолжит вчерашний
+        run_id = args.run_id or queue.latest_run()
+        if run_id is None:
+            queue.close()
+            print("В очереди нет запусков: сначала поставьте категории командой schedule")
+            sys.exit(1)
+    print(f"📊 Запуск {run_id}: {queue.stats(run_id)}")
+    queue.close()
+
+    if args.command == "work":
+        processes = [multiprocessing.Process(target=work, args=(args.queue, args.backend, run_id))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        if any(process.exitcode for process in processes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
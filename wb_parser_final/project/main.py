@@ -1,4 +1,4 @@
-import os
+import argparse
 import sys
 from urllib.parse import urlparse, parse_qs, urlencode
 from selenium_parser.parsers.wildberries_price_range_parser import WildberriesPriceRangeParser
@@ -33,9 +33,19 @@ def main():
     # URL для теста по умолчанию
     default_url = "https://www.wildberries.ru/catalog/obuv/detskaya"
 
+    arg_parser = argparse.ArgumentParser(description="Парсер Wildberries")
+    arg_parser.add_argument("url", nargs="?", help="ссылка на категорию Wildberries")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="продолжить с последней контрольной точки, не загружая собранные страницы заново")
+    arg_parser.add_argument("--incremental", action="store_true",
+                            help="обойти заново только ценовые диапазоны, изменившиеся с прошлого обхода")
+    arg_parser.add_argument("--sink", choices=["clickhouse", "file"],
+                            help="куда сохранять товары: clickhouse или сжатые файлы в output/")
+    args = arg_parser.parse_args()
+
     # Получаем URL из командной строки или используем по умолчанию
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
+    if args.url:
+        url = args.url
     else:
         url = input(f"Введите URL категории Wildberries [по умолчанию: {default_url}]: ").strip()
         if not url:
@@ -46,13 +56,14 @@ def main():
         # Подготавливаем URL
         start_url = prepare_url(url)
 
-        # Создаем выходную директорию
-        os.makedirs("output", exist_ok=True)
-
         # Запускаем парсер
         print("\nЗапуск парсера...")
-        parser = WildberriesPriceRangeParser(start_url)
-        parser.run()
+        parser = WildberriesPriceRangeParser(start_url, resume=args.resume, incremental=args.incremental,
+                                             sink=args.sink)
+        if not parser.run():
+            # Часть страниц не загружена: контрольная точка сохранена, их догрузит запуск с --resume
+            print("\nПарсинг завершен не полностью. Запустите с --resume, чтобы догрузить оставшиеся страницы.")
+            sys.exit(2)
         print("\nПарсинг успешно завершен!")
 
     except KeyboardInterrupt:
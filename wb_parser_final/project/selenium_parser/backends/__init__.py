@@ -0,0 +1,17 @@
+# selenium_parser/backends/__init__.py
+from selenium_parser import settings
+
+
+def get_backend(name=None, **kwargs):
+    """
+    Создает бэкенд загрузки страниц по имени: "selenium" (браузер) или "http" (запросы без браузера).
+    По умолчанию используется settings.FETCH_BACKEND.
+    """
+    name = name or settings.FETCH_BACKEND
+    if name == "selenium":
+        from selenium_parser.backends.selenium_backend import SeleniumBackend
+        return SeleniumBackend(**kwargs)
+    if name == "http":
+        from selenium_parser.backends.http_backend import HttpBackend
+        return HttpBackend(**kwargs)
+    raise ValueError(f"Неизвестный бэкенд загрузки: {name}")
@@ -0,0 +1,79 @@
+# selenium_parser/backends/base.py
+import re
+
+PAGE_RE = re.compile(r'([?&])page=\d+')
+
+
+def set_page_param(url, page_number):
+    """Подставляет номер страницы в параметр page URL (добавляет параметр, если его нет)."""
+    if PAGE_RE.search(url):
+        return PAGE_RE.sub(rf'\g<1>page={page_number}', url, count=1)
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}page={page_number}"
+
+
+class FetchBackend:
+    """
+    Интерфейс источника страниц каталога.
+    Бэкенд умеет получать количество товаров для URL с фильтром priceU (пробы диапазонов)
+    и отдавать товары постранично в формате parse_products_from_page (записи ProductRecord).
+
+    Загрузку и разбор страницы можно выполнять раздельно: fetch_raw() возвращает «сырую» страницу,
+    extract() превращает ее в товары. Конвейер обхода выполняет их в разных стадиях, чтобы загрузчик
+    не ждал разбора. По умолчанию разделения нет: fetch_raw() сразу возвращает товары.
+    """
+
+    name = "base"
+    # Ошибки загрузки, после которых запрос стоит повторить (см. ControlledBackend)
+    retryable_errors = (OSError,)
+
+    def __init__(self, base_domain, category_name):
+        self.base_domain = base_domain
+        self.category_name = category_name
+
+    @property
+    def origin(self):
+        """Адрес, к которому бэкенд отправляет запросы: ограничения частоты действуют для его хоста."""
+        return self.base_domain
+
+    def count_products(self, url):
+        """Возвращает количество товаров по URL или None, если его не удалось определить."""
+        raise NotImplementedError
+
+    def fetch_page(self, url, page_number):
+        """Возвращает список товаров указанной страницы."""
+        raise NotImplementedError
+
+    def fetch_raw(self, url, page_number):
+        """Загружает страницу для последующего extract(); может выполняться параллельно с разбором других страниц."""
+        return self.fetch_page(url, page_number)
+
+    def extract(self, raw):
+        """Разбирает результат fetch_raw() в список товаров. Не обращается к браузеру или соединению бэкенда."""
+        return raw
+
+    def iter_pages(self, url, start_page=1):
+        """
+        Обходит страницы диапазона, начиная со start_page, и выдает пары (номер страницы, товары).
+        Останавливается на пустой странице или когда страница повторяет предыдущую.
+        """
+        previous_links = None
+        page_number = start_page
+        while True:
+            products = self.fetch_page(url, page_number)
+            links = [p.link for p in products]
+            if not products or links == previous_links:
+                break
+            yield page_number, products
+            previous_links = links
+            page_number += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,87 @@
+# selenium_parser/backends/controlled.py
+from selenium_parser.backends.base import FetchBackend
+from selenium_parser.utils.fetch_control import get_fetch_control
+
+
+class ControlledBackend(FetchBackend):
+    """
+    Обертка бэкенда: пробы количества и загрузка страниц идут через FetchControl хоста —
+    адаптивная частота и параллельность, повторы с задержкой, пауза после ограничений (429/503, капча).
+    Разбор (extract) выполняется без ограничений. Остальные атрибуты берутся у исходного бэкенда.
+    """
+
+    def __init__(self, backend, control=None, cancel_event=None):
+        super().__init__(backend.base_domain, backend.category_name)
+        self.backend = backend
+        self.control = control or get_fetch_control(backend.origin)
+        self.cancel_event = cancel_event
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    @property
+    def origin(self):
+        return self.backend.origin
+
+    def __getattr__(self, item):
+        if item == "backend":
+            raise AttributeError(item)
+        return getattr(self.backend, item)
+
+    def _call(self, func, *args):
+        return self.control.call(func, *args, retryable=self.backend.retryable_errors,
+                                 cancel_event=self.cancel_event)
+
+    def count_products(self, url):
+        return self._call(self.backend.count_products, url)
+
+    def fetch_raw(self, url, page_number):
+        return self._call(self.backend.fetch_raw, url, page_number)
+
+    def extract(self, raw):
+        return self.backend.extract(raw)
+
+    def fetch_page(self, url, page_number):
+        return self.extract(self.fetch_raw(url, page_number))
+
+    def iter_pages(self, url, start_page=1):
+        """
+        Обходит страницы способом исходного бэкенда (в браузере — кнопкой «Следующая страница»).
+        Каждый переход выполняется под контролем; после ошибки обход продолжается заново
+        с той же страницы по URL.
+        """
+        state = {"pages": None, "next": start_page}
+
+        def next_page():
+            if state["pages"] is None:
+                state["pages"] = self.backend.iter_pages(url, state["next"])
+            try:
+                return next(state["pages"])
+            except StopIteration:
+                return None
+            except BaseException:
+                # Генератор после ошибки не продолжить: повтор откроет страницу заново
+                state["pages"] = None
+                raise
+
+        try:
+            while True:
+                item = self._call(next_page)
+                if item is None:
+                    return
+                state["next"] = item[0] + 1
+                yield item
+        finally:
+            if state["pages"] is not None:
+                state["pages"].close()
+
+    def close(self):
+        self.backend.close()
+
+
+def controlled(backend, control=None, cancel_event=None):
+    """Оборачивает бэкенд в ControlledBackend (уже обернутый возвращается как есть)."""
+    if isinstance(backend, ControlledBackend):
+        return backend
+    return ControlledBackend(backend, control, cancel_event)
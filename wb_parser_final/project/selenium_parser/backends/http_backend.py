@@ -0,0 +1,122 @@
+# selenium_parser/backends/http_backend.py
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from selenium_parser import settings
+from selenium_parser.backends.base import FetchBackend, set_page_param
+from selenium_parser.parsers.wildberries_parser_v2 import parse_products_from_page
+from selenium_parser.utils.fetch_control import THROTTLE_STATUSES, Throttled, is_captcha_page, parse_retry_after
+from selenium_parser.utils.phase_timer import PhaseTimer
+from selenium_parser.utils.price_range_utils import extract_products_count
+from selenium_parser.utils.product_record import ProductRecord
+
+# Параметры фильтра, которые переносятся из URL каталога в URL JSON API
+FORWARDED_PARAMS = ("priceU", "page", "sort")
+
+
+class HttpBackend(FetchBackend):
+    """
+    Загрузка каталога обычными HTTP-запросами без браузера.
+    Использует общий пул соединений requests.Session с keep-alive и сжатием.
+    Если задан api_url (JSON API каталога), фильтры priceU/page/sort переносятся в него из URL категории,
+    иначе запрашивается сама страница каталога. Ответ разбирается как JSON или HTML по Content-Type.
+    """
+
+    name = "http"
+    retryable_errors = (requests.RequestException,)
+
+    def __init__(self, base_domain, category_name, api_url=None, session=None,
+                 pool_size=None, timeout=None):
+        super().__init__(base_domain, category_name)
+        self.api_url = api_url if api_url is not None else settings.HTTP_CATALOG_API_URL
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self.max_pages = settings.HTTP_MAX_PAGES
+        self.session = session or self._create_session(pool_size or settings.HTTP_POOL_SIZE)
+        self.timer = PhaseTimer(self.name)
+
+    @staticmethod
+    def _create_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "User-Agent": settings.HTTP_USER_AGENT,
+            "Accept": "application/json, text/html;q=0.9, */*;q=0.8",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    @property
+    def origin(self):
+        return self.api_url or self.base_domain
+
+    def _request_url(self, url):
+        """Формирует адрес запроса: сам URL каталога или JSON API с перенесенными фильтрами."""
+        if not self.api_url:
+            return url
+        source = parse_qs(urlparse(url).query)
+        api = urlparse(self.api_url)
+        params = parse_qs(api.query)
+        params.update({key: source[key] for key in FORWARDED_PARAMS if key in source})
+        return urlunparse(api._replace(query=urlencode(params, doseq=True)))
+
+    def _get(self, url):
+        response = self.session.get(self._request_url(url), timeout=self.timeout)
+        if response.status_code in THROTTLE_STATUSES:
+            raise Throttled(f"HTTP {response.status_code}", parse_retry_after(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        if not self._is_json(response) and is_captcha_page(response.text):
+            raise Throttled("капча")
+        return response
+
+    @staticmethod
+    def _is_json(response):
+        return "json" in response.headers.get("Content-Type", "")
+
+    @staticmethod
+    def _json_data(response):
+        # JSON API каталога отдает {"data": {"products": [...], "total": N}} или те же поля на верхнем уровне
+        payload = response.json()
+        return payload.get("data", payload) if isinstance(payload, dict) else {}
+
+    def count_products(self, url):
+        # Ошибки HTTP и ограничения не скрываются за None: их повторяет ControlledBackend
+        response = self._get(url)
+        if self._is_json(response):
+            total = self._json_data(response).get("total")
+            return int(total) if total is not None else None
+        return extract_products_count(response.text)
+
+    def fetch_raw(self, url, page_number):
+        with self.timer.phase("fetch"):
+            return self._get(set_page_param(url, page_number))
+
+    def fetch_page(self, url, page_number):
+        return self.extract(self.fetch_raw(url, page_number))
+
+    def extract(self, response):
+        with self.timer.phase("parse"):
+            if not self._is_json(response):
+                return parse_products_from_page(response.text, self.base_domain, self.category_name)
+
+            products = []
+            for item in self._json_data(response).get("products", []):
+                article = str(item.get("id", ""))
+                if not article:
+                    continue
+                products.append(ProductRecord(article, f"{self.base_domain}/catalog/{article}/detail.aspx",
+                                              self.category_name))
+            return products
+
+    def iter_pages(self, url, start_page=1):
+        for page_number, products in super().iter_pages(url, start_page):
+            yield page_number, products
+            if page_number >= self.max_pages:
+                break
+
+    def close(self):
+        self.session.close()
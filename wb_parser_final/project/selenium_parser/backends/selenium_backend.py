@@ -0,0 +1,164 @@
+# selenium_parser/backends/selenium_backend.py
+import time
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from selenium_parser import settings
+from selenium_parser.backends.base import FetchBackend, set_page_param
+from selenium_parser.parsers.wildberries_parser_v2 import parse_products_from_page
+from selenium_parser.utils.browser_pool import get_browser_pool
+from selenium_parser.utils.fetch_control import Throttled, is_captcha_page
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.page_readiness import PageReadiness
+from selenium_parser.utils.phase_timer import PhaseTimer
+from selenium_parser.utils.price_range_utils import get_products_count
+
+log = get_logger("selenium")
+
+
+class SeleniumBackend(FetchBackend):
+    """
+    Загрузка страниц через полноценный браузер: рендер, прокрутка и кнопка «Следующая страница».
+    Браузер берется из общего пула и возвращается в него при close().
+
+    Готовность страницы определяется по событиям (settings.PAGE_READINESS = "events"):
+    стабилизация числа карточек, отсутствие изменений DOM и сетевых запросов.
+    Режим "sleep" сохраняет прежние фиксированные паузы для сравнения; время фаз в обоих режимах
+    накапливается в self.timer и печатается при закрытии.
+    """
+
+    name = "selenium"
+    retryable_errors = (WebDriverException,)
+
+    def __init__(self, base_domain, category_name, pool=None, readiness=None, session=None):
+        super().__init__(base_domain, category_name)
+        self.pool = pool or get_browser_pool()
+        # session — браузер, уже взятый из этого пула (BrowserPool.acquire_many)
+        self.session = session or self.pool.acquire()
+        self.mode = readiness or settings.PAGE_READINESS
+        self.readiness = PageReadiness()
+        self.timer = PhaseTimer(self.name)
+
+    @property
+    def driver(self):
+        return self.session.driver
+
+    def _open(self, url):
+        """Открывает URL; браузер, загрузивший слишком много страниц, перед этим перезапускается."""
+        if self.session.pages >= self.pool.max_pages:
+            self.session = self.pool.recycle(self.session)
+        self.session.pages += 1
+        if self.mode == "events":
+            self.readiness.install(self.driver)
+        with self.timer.phase("navigate"):
+            self.driver.get(url)
+
+    def _wait_ready(self, previous_first=None):
+        with self.timer.phase("ready"):
+            if self.mode == "events":
+                self.readiness.wait_ready(self.driver, previous_first)
+            else:
+                time.sleep(2)
+
+    def count_products(self, url):
+        self._open(url)
+        driver = self.driver
+        with self.timer.phase("ready"):
+            if self.mode == "events":
+                self.readiness.wait_ready(driver)
+            else:
+                try:
+                    # Ждем, пока на странице не появится количество товаров (или сами товары)
+                    WebDriverWait(driver, 10).until(lambda d: get_products_count(d) is not None)
+                except Exception:
+                    pass
+        count = get_products_count(driver)
+        if count is None and is_captcha_page(driver.page_source):
+            raise Throttled("капча")
+        return count
+
+    def _scroll_to_bottom(self):
+        driver = self.driver
+        with self.timer.phase("scroll"):
+            if self.mode == "events":
+                self.readiness.scroll_to_bottom(driver)
+                return
+            log.debug("scroll", "📜 Прокрутка страницы...")
+            while True:
+                driver.execute_script("window.scrollBy(0, 450);")
+                time.sleep(0.25)
+                new_height = driver.execute_script("return window.pageYOffset + window.innerHeight")
+                total_height = driver.execute_script("return document.body.scrollHeight")
+                if new_height >= total_height - 10:
+                    break
+            time.sleep(1)
+
+    def _page_source(self):
+        self._scroll_to_bottom()
+        with self.timer.phase("source"):
+            html = self.driver.page_source
+        if is_captcha_page(html):
+            raise Throttled("капча")
+        return html
+
+    def _parse_current_page(self):
+        return self.extract(self._page_source())
+
+    def fetch_raw(self, url, page_number):
+        """Открывает и прокручивает страницу, возвращает ее HTML; разбор — в extract(), браузер уже свободен."""
+        self._open(set_page_param(url, page_number))
+        self._wait_ready()
+        return self._page_source()
+
+    def extract(self, html):
+        with self.timer.phase("parse"):
+            return parse_products_from_page(html, self.base_domain, self.category_name)
+
+    def fetch_page(self, url, page_number):
+        return self.extract(self.fetch_raw(url, page_number))
+
+    def _click_next(self):
+        """Переходит на следующую страницу кнопкой. Возвращает False, если кнопки нет."""
+        driver = self.driver
+        if self.mode == "events":
+            # Запоминаем первую карточку: новая страница готова, когда она сменится
+            previous_first = self.readiness.first_card(driver)
+            with self.timer.phase("navigate"):
+                if not self.readiness.click_next(driver):
+                    return False
+            self._wait_ready(previous_first)
+            return True
+        try:
+            # Ищем кнопку "Следующая страница" по классу, чтобы избежать проблем с локализацией
+            next_btn = driver.find_element(By.XPATH, "//*[contains(@class, 'pagination-next')]")
+        except NoSuchElementException:
+            return False
+        time.sleep(1)
+        next_btn.click()
+        self._wait_ready()
+        return True
+
+    def iter_pages(self, url, start_page=1):
+        # Первую страницу открываем по URL, дальше переходим кнопкой, как это делает пользователь
+        self._open(set_page_param(url, start_page) if start_page > 1 else url)
+        self._wait_ready()
+        page_number = start_page
+
+        while True:
+            yield page_number, self._parse_current_page()
+            if not self._click_next():
+                break
+            self.session.pages += 1
+            page_number += 1
+
+    def close(self):
+        if self.timer.totals:
+            timeouts = f", таймаутов ожидания: {self.readiness.timeouts}" if self.mode == "events" else ""
+            log.info("page_phases", f"⏱ Фазы страницы ({self.mode}): {self.timer.summary()}{timeouts}",
+                     mode=self.mode, averages={name: round(self.timer.average(name), 3) for name in self.timer.totals},
+                     readiness_timeouts=self.readiness.timeouts)
+            self.timer = PhaseTimer(self.name)
+        if self.session is not None:
+            self.pool.release(self.session)
+            self.session = None
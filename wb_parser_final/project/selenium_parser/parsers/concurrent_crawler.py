@@ -0,0 +1,391 @@
+# selenium_parser/parsers/concurrent_crawler.py
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium_parser import settings
+from selenium_parser.backends.controlled import controlled
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import PAGE_ERRORS, STAGE_UTILIZATION
+from selenium_parser.utils.fetch_control import FetchControl
+from selenium_parser.utils.price_range_utils import build_range_url
+from selenium_parser.utils.progress import CrawlCancelled
+from selenium_parser.utils.range_planner import plan_price_ranges
+
+log = get_logger("crawler")
+
+
+def page_count(count, page_size=None, max_pages=None):
+    """Сколько страниц каталога занимает диапазон с count товарами (не меньше одной)."""
+    page_size = page_size or settings.CATALOG_PAGE_SIZE
+    return min(max_pages or settings.HTTP_MAX_PAGES, max(1, math.ceil((count or 0) / page_size)))
+
+
+class StageStats:
+    """Загруженность стадии конвейера: время работы воркеров и время ожидания места в следующей очереди."""
+
+    __slots__ = ("name", "workers", "items", "busy", "blocked")
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def utilization(self, elapsed):
+        """Доля времени, которую воркеры стадии работали, а не ждали входа или места на выходе."""
+        return self.busy / (elapsed * self.workers) if elapsed > 0 else 0.0
+
+    def snapshot(self, elapsed):
+        return {"workers": self.workers, "items": self.items, "busy": round(self.busy, 3),
+                "blocked": round(self.blocked, 3), "utilization": round(self.utilization(elapsed), 3)}
+
+
+class ConcurrentCrawler:
+    """
+    Параллельный обход непересекающихся ценовых диапазонов.
+
+    Сначала весь интервал цен разбивается на диапазоны (plan), затем страницы всех диапазонов проходят
+    конвейер стадий, связанных ограниченными очередями (queue_size страниц):
+
+        fetch (concurrency бэкендов) → extract (extract_concurrency) → dedup (1) → store (1)
+
+    fetch только загружает страницу (backend.fetch_raw) с ограничением частоты запросов к хосту,
+    разбор (backend.extract) идет в отдельной стадии, поэтому браузер или соединение сразу берут
+    следующую страницу. Заполненная очередь останавливает предыдущую стадию (обратное давление),
+    так что запись в хранилище не может отстать от загрузки больше чем на несколько очередей.
+    dedup и store выполняются в одном потоке каждая: индекс артикулов и контрольная точка не потокобезопасны.
+    Загруженность стадий попадает в stats["stages"] и метрику wb_stage_utilization.
+
+    Бэкенды оборачиваются в ControlledBackend: частота и параллельность подстраиваются под ограничения
+    сайта, неудачные загрузки повторяются с задержкой; страница считается ошибкой только после всех повторов.
+
+    Установленный cancel_event останавливает загрузку: воркеры не берут новые страницы,
+    уже загруженные записываются, а в stats отмечается cancelled.
+
+    Если задан pool (пул браузеров), backend_factory(session=...) получает браузер из него: загрузчиков
+    не больше размера пула. Обход ждет только первый браузер и берет столько, сколько свободно
+    (BrowserPool.acquire_many, вне цикла событий); пока загрузчиков меньше concurrency, каждые
+    CRAWL_GROW_INTERVAL секунд добавляются браузеры, освободившиеся в пуле (например, после другого задания).
+    """
+
+    def __init__(self, start_url, backend_factory, concurrency=None, rate_limit=None,
+                 queue_size=None, page_size=None, max_pages=None, step=None, min_count=None,
+                 max_count=None, cancel_event=None, extract_concurrency=None, pool=None):
+        self.start_url = start_url
+        self.backend_factory = backend_factory
+        self.pool = pool
+        self.concurrency = concurrency or settings.CRAWL_CONCURRENCY
+        if pool is not None and self.concurrency > pool.size:
+            log.warning("concurrency_clamped", f"⚠️ Потоков загрузки {self.concurrency} больше, чем браузеров в пуле: "
+                                               f"уменьшено до {pool.size}",
+                        concurrency=self.concurrency, pool_size=pool.size)
+            self.concurrency = pool.size
+        self.extract_concurrency = extract_concurrency or settings.CRAWL_EXTRACT_CONCURRENCY
+        # rate_limit задает свой FetchControl с этой частотой с самого начала; иначе — общий по хосту
+        self.fetch_control = FetchControl(max_rate=rate_limit, initial_rate=rate_limit) if rate_limit else None
+        self.queue_size = queue_size or settings.CRAWL_QUEUE_SIZE
+        self.page_size = page_size or settings.CATALOG_PAGE_SIZE
+        self.max_pages = max_pages or settings.HTTP_MAX_PAGES
+        self.step = step
+        self.min_count = min_count
+        self.max_count = max_count
+        self.cancel_event = cancel_event
+        self.stats = {"pages": 0, "items": 0, "new_items": 0, "errors": 0, "elapsed": 0.0, "cancelled": False,
+                      "stages": {}}
+        self._last_page = {}
+        self._stages = {}
+        self._pending = 0
+        self._fetchers = 0
+
+    def _create_backend(self, session=None):
+        backend = self.backend_factory(session=session) if session is not None else self.backend_factory()
+        return controlled(backend, self.fetch_control, self.cancel_event)
+
+    def _create_backends(self, count, minimum=1):
+        """
+        От minimum до count бэкендов загрузчиков (без пула — ровно count); с пулом minimum == 0 означает
+        «только свободные браузеры, без ожидания». Если один бэкенд не создался, уже созданные закрываются.
+        """
+        if self.pool is None:
+            sessions = [None] * count
+        else:
+            sessions = self.pool.acquire_many(count, minimum=minimum, timeout=None if minimum else 0)
+        backends = []
+        try:
+            for session in sessions:
+                backends.append(self._create_backend(session))
+        except BaseException:
+            for backend in backends:
+                backend.close()
+            for session in sessions[len(backends):]:
+                if session is not None:
+                    self.pool.release(session)
+            raise
+        return backends
+
+    def plan(self, backend=None):
+        """Планирует диапазоны одним бэкендом. Возвращает список (lower, upper, count)."""
+        if backend is None:
+            with self._create_backend() as backend:
+                return self.plan(backend)
+        return plan_price_ranges(backend, self.start_url, step=self.step, min_count=self.min_count,
+                                 max_count=self.max_count, cancel_event=self.cancel_event)
+
+    def page_units(self, ranges, skip=None, full=None):
+        """
+        Разворачивает диапазоны в независимые задания (URL диапазона, номер страницы).
+        skip(range_url, page_number) позволяет исключить уже загруженные страницы, full(range_url, page_number) —
+        была ли такая страница заполнена целиком.
+        """
+        units = []
+        for lower, upper, count in ranges:
+            range_url = build_range_url(self.start_url, lower, upper)
+            pages = page_count(count, self.page_size, self.max_pages)
+            # При продолжении последняя запланированная страница уже могла быть загружена и заполнена:
+            # следующую за ней добавил бы разбор, поэтому ставим ее в очередь сами
+            while (full is not None and skip is not None and pages < self.max_pages and skip(range_url, pages)
+                   and full(range_url, pages)):
+                pages += 1
+            self._last_page[range_url] = pages
+            units.extend((range_url, page_number) for page_number in range(1, pages + 1)
+                         if skip is None or not skip(range_url, page_number))
+        return units
+
+    def last_page(self, range_url):
+        """Номер последней страницы диапазона, известный на данный момент."""
+        return self._last_page.get(range_url)
+
+    def run(self, ranges, store, skip=None, dedup=None, full=None):
+        """
+        Загружает все страницы диапазонов и передает товары каждой страницы в store(range_url, page_number, products),
+        который возвращает число новых товаров. Если задан dedup(range_url, page_number, products), он выполняется
+        отдельной стадией перед записью, и store получает его результат вместо товаров.
+        store и dedup вызываются последовательно, каждый из своего потока. skip и full — как в page_units().
+        """
+        return asyncio.run(self._run(ranges, store, skip, dedup, full))
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    async def _call(self, stage, func, *args):
+        """Выполняет шаг стадии в пуле потоков и учитывает время работы."""
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            stage.busy += time.perf_counter() - started
+            stage.items += 1
+
+    @staticmethod
+    async def _put(stage, queue, item):
+        """Передает результат следующей стадии; ожидание места в очереди — это обратное давление."""
+        if queue.full():
+            started = time.perf_counter()
+            await queue.put(item)
+            stage.blocked += time.perf_counter() - started
+        else:
+            queue.put_nowait(item)
+
+    def _unit_done(self, work):
+        """Страница прошла загрузку и разбор (или ошибку); когда страниц не осталось, загрузчики останавливаются."""
+        self._pending -= 1
+        if self._pending == 0:
+            for _ in range(self._fetchers):
+                work.put_nowait(None)
+
+    async def _run(self, ranges, store, skip, dedup, full):
+        started = time.monotonic()
+        units = self.page_units(ranges, skip, full)
+        log.info("crawl_started",
+                 f"🚀 Параллельный обход: {len(ranges)} диапазонов, {len(units)} страниц, {self.concurrency} потоков",
+                 ranges=len(ranges), pages=len(units), concurrency=self.concurrency,
+                 extract_concurrency=self.extract_concurrency)
+
+        loop = asyncio.get_running_loop()
+        # Свой пул потоков: по одному на каждый бэкенд, на каждого разборщика, дедупликацию и запись
+        executor = ThreadPoolExecutor(max_workers=self.concurrency + self.extract_concurrency + 2)
+        loop.set_default_executor(executor)
+
+        # Браузер запускается секунды, а место в пуле можно ждать долго: цикл событий не должен блокироваться
+        backends = await loop.run_in_executor(executor, self._create_backends, self.concurrency)
+        self._fetchers = len(backends)
+        if self._fetchers < self.concurrency:
+            log.info("fetchers_reduced", f"🌐 Свободно браузеров: {self._fetchers} из {self.concurrency}, "
+                                         f"остальные добавятся по мере освобождения пула",
+                     fetchers=self._fetchers, concurrency=self.concurrency)
+
+        self._stages = {name: StageStats(name, workers) for name, workers in (
+            ("fetch", self._fetchers), ("extract", self.extract_concurrency), ("dedup", 1 if dedup else 0),
+            ("store", 1)) if workers}
+        work = asyncio.Queue()
+        for unit in units:
+            work.put_nowait(unit)
+        self._pending = len(units) + 1
+        self._unit_done(work)
+        raw = asyncio.Queue(maxsize=self.queue_size)
+        parsed = asyncio.Queue(maxsize=self.queue_size)
+        deduped = asyncio.Queue(maxsize=self.queue_size) if dedup else parsed
+
+        fetch_tasks = [asyncio.create_task(self._fetch(backend, work, raw)) for backend in backends]
+        fetched = asyncio.Event()
+
+        async def grow():
+            # Обход начат не со всеми браузерами: добираем освободившиеся, пока есть незагруженные страницы
+            while self._fetchers < self.concurrency:
+                try:
+                    await asyncio.wait_for(fetched.wait(), settings.CRAWL_GROW_INTERVAL)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                if self._pending <= 0 or self._cancelled():
+                    return
+                future = loop.run_in_executor(executor, self._create_backends, self.concurrency - self._fetchers, 0)
+                try:
+                    extra = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # Обход прерван, пока запускались браузеры: они не должны остаться занятыми в пуле
+                    future.add_done_callback(
+                        lambda f: f.cancelled() or f.exception() or [backend.close() for backend in f.result()])
+                    raise
+                if self._pending <= 0:
+                    # Загрузчики уже остановлены: новые не получат страниц
+                    for backend in extra:
+                        await loop.run_in_executor(executor, backend.close)
+                    return
+                for backend in extra:
+                    backends.append(backend)
+                    self._fetchers += 1
+                    self._stages["fetch"].workers = self._fetchers
+                    fetch_tasks.append(asyncio.create_task(self._fetch(backend, work, raw)))
+                if extra:
+                    log.info("fetchers_added", f"🌐 Добавлено браузеров: {len(extra)}, загрузчиков {self._fetchers}",
+                             fetchers=self._fetchers)
+
+        async def fetchers():
+            grow_task = asyncio.create_task(grow())
+            try:
+                # Список загрузчиков растет, пока работает grow()
+                done = 0
+                while done < len(fetch_tasks):
+                    await fetch_tasks[done]
+                    done += 1
+                fetched.set()
+                await grow_task
+            finally:
+                grow_task.cancel()
+                for task in fetch_tasks:
+                    task.cancel()
+            for _ in range(self.extract_concurrency):
+                await raw.put(None)
+
+        async def extractors():
+            await asyncio.gather(*(self._extract(raw, parsed, work) for _ in range(self.extract_concurrency)))
+            await parsed.put(None)
+
+        groups = [fetchers(), extractors(), self._store(deduped, store)]
+        if dedup:
+            groups.append(self._dedup(parsed, deduped, dedup))
+        tasks = [asyncio.create_task(group) for group in groups]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Упавшая стадия не должна оставить остальные ждать у заполненных очередей
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            for backend in backends:
+                await asyncio.to_thread(backend.close)
+            executor.shutdown(wait=False)
+
+        self.stats["elapsed"] = time.monotonic() - started
+        elapsed = self.stats["elapsed"] or 1e-9
+        self.stats["stages"] = {name: stage.snapshot(elapsed) for name, stage in self._stages.items()}
+        for name, stage in self._stages.items():
+            STAGE_UTILIZATION.set(stage.utilization(elapsed), stage=name)
+        log.info("crawl_finished",
+                 f"✅ Обход завершен: {self.stats['pages']} страниц за {elapsed:.1f} с "
+                 f"({self.stats['pages'] / elapsed:.1f} стр/с), новых товаров: {self.stats['new_items']}",
+                 pages_per_second=round(self.stats["pages"] / elapsed, 2), **self.stats)
+        log.info("crawl_stages", "⚙️ Загрузка стадий: " + ", ".join(
+            f"{name} {stage.utilization(elapsed) * 100:.0f}% (x{stage.workers}, ожидание очереди {stage.blocked:.1f} с)"
+            for name, stage in self._stages.items()))
+        return self.stats
+
+    async def _fetch(self, backend, work, raw):
+        stage = self._stages["fetch"]
+        while True:
+            unit = await work.get()
+            if unit is None:
+                return
+            if self._cancelled():
+                # Оставшиеся страницы не загружаются, но учитываются, чтобы конвейер завершился
+                self.stats["cancelled"] = True
+                self._unit_done(work)
+                continue
+            range_url, page_number = unit
+            try:
+                payload = await self._call(stage, backend.fetch_raw, range_url, page_number)
+            except CrawlCancelled:
+                self.stats["cancelled"] = True
+                self._unit_done(work)
+                continue
+            except Exception as e:
+                self._page_failed(range_url, page_number, e)
+                self._unit_done(work)
+                continue
+            await self._put(stage, raw, (backend, range_url, page_number, payload))
+
+    async def _extract(self, raw, parsed, work):
+        stage = self._stages["extract"]
+        while True:
+            item = await raw.get()
+            if item is None:
+                return
+            backend, range_url, page_number, payload = item
+            try:
+                products = await self._call(stage, backend.extract, payload)
+            except Exception as e:
+                self._page_failed(range_url, page_number, e)
+                self._unit_done(work)
+                continue
+            # Количество могло вырасти с момента планирования (или взято из кэша проб):
+            # если последняя запланированная страница заполнена целиком, добавляем следующую
+            if (page_number == self._last_page.get(range_url) and len(products) >= self.page_size
+                    and page_number < self.max_pages and not self._cancelled()):
+                self._last_page[range_url] = page_number + 1
+                self._pending += 1
+                work.put_nowait((range_url, page_number + 1))
+            self._unit_done(work)
+            self.stats["items"] += len(products)
+            await self._put(stage, parsed, (range_url, page_number, products))
+
+    async def _dedup(self, parsed, deduped, dedup):
+        stage = self._stages["dedup"]
+        while True:
+            item = await parsed.get()
+            if item is None:
+                await deduped.put(None)
+                return
+            range_url, page_number, products = item
+            result = await self._call(stage, dedup, range_url, page_number, products)
+            await self._put(stage, deduped, (range_url, page_number, result))
+
+    async def _store(self, queue, store):
+        stage = self._stages["store"]
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            range_url, page_number, payload = item
+            self.stats["pages"] += 1
+            self.stats["new_items"] += await self._call(stage, store, range_url, page_number, payload)
+
+    def _page_failed(self, range_url, page_number, error):
+        self.stats["errors"] += 1
+        PAGE_ERRORS.inc()
+        log.warning("page_failed", f"⚠️ Ошибка загрузки страницы {page_number} ({range_url}): {error}",
+                    range_url=range_url, page=page_number, error=str(error))
@@ -0,0 +1,190 @@
+# selenium_parser/parsers/distributed.py
+import os
+import socket
+import time
+from collections import OrderedDict
+
+from selenium_parser import settings
+from selenium_parser.parsers.concurrent_crawler import page_count
+from selenium_parser.parsers.wildberries_price_range_parser import WildberriesPriceRangeParser
+from selenium_parser.sinks import get_sink
+from selenium_parser.utils.fetch_control import FetchControl
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import PAGE_ERRORS
+from selenium_parser.utils.price_range_utils import build_range_url
+from selenium_parser.utils.range_planner import plan_price_ranges
+from selenium_parser.utils.work_queue import PAGE, PLAN
+
+# Сколько категорий воркер держит открытыми одновременно (бэкенд и индекс артикулов на каждую);
+# не больше BROWSER_POOL_SIZE - 1, чтобы браузер для новой категории всегда нашелся в пуле
+MAX_OPEN_CATEGORIES = 3
+
+log = get_logger("worker")
+
+
+def default_run_id():
+    """Идентификатор запуска по умолчанию — дата: повторная постановка за ту же ночь не дублирует задания."""
+    return time.strftime("%Y-%m-%d")
+
+
+def schedule_categories(queue, urls, run_id=None):
+    """Ставит в очередь планирование диапазонов для каждой категории. Возвращает число новых заданий."""
+    run_id = run_id or default_run_id()
+    return queue.put(run_id, [{"kind": PLAN, "category_url": url} for url in urls])
+
+
+class QueueWorker:
+    """
+    Воркер распределенного обхода: берет задания из общей очереди и выполняет их логикой
+    WildberriesPriceRangeParser.
+
+    Задание plan разбивает категорию на диапазоны и ставит в очередь страницы каждого диапазона,
+    задание page загружает одну страницу и передает новые товары в общий буфер записи.
+    Страница подтверждается в очереди только после записи ее товаров (on_flush), до этого
+    аренда продлевается. Воркер завершается, когда в очереди не осталось активных заданий.
+    Товары пишутся в приемник settings.SINK, из него же загружается индекс артикулов;
+    writer_factory(on_flush) и index_loader(category_name) позволяют их заменить.
+    """
+
+    def __init__(self, queue, worker_id=None, backend=None, run_id=None, writer_factory=None, index_loader=None,
+                 step=None, max_products=None, rate_limit=None, poll_interval=None):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.backend = backend
+        self.run_id = run_id
+        self.writer_factory = writer_factory or (lambda on_flush: get_sink(on_flush=on_flush))
+        self.index_loader = index_loader or (lambda category_name: self.writer.load_index(category_name))
+        self.step = step
+        self.max_products = max_products
+        # rate_limit — постоянная частота этого воркера; без него частота подстраивается общим FetchControl хоста
+        self.fetch_control = FetchControl(max_rate=rate_limit, initial_rate=rate_limit) if rate_limit else None
+        self.poll_interval = poll_interval if poll_interval is not None else settings.WORK_QUEUE_POLL_INTERVAL
+        self.stats = {"plans": 0, "pages": 0, "items": 0, "new_items": 0, "errors": 0, "elapsed": 0.0}
+        self.max_open_categories = max(1, min(MAX_OPEN_CATEGORIES, settings.BROWSER_POOL_SIZE - 1))
+        self._parsers = OrderedDict()
+        self._indexes = {}
+        self._unflushed = []
+        self.writer = None
+
+    def _parser(self, category_url):
+        """Парсер категории (бэкенд, имя категории, размеры блоков); давно не использованные закрываются."""
+        parser = self._parsers.pop(category_url, None)
+        if parser is None:
+            # Сначала закрываем старую категорию: новый бэкенд берет браузер из пула, который она занимает
+            while len(self._parsers) >= self.max_open_categories:
+                _, oldest = self._parsers.popitem(last=False)
+                self._close_category(oldest)
+            parser = WildberriesPriceRangeParser(category_url, backend=self.backend, step=self.step,
+                                                 max_products=self.max_products, fetch_control=self.fetch_control)
+        self._parsers[category_url] = parser
+        return parser
+
+    def _close_category(self, parser):
+        parser.backend.close()
+        key = self._index_key(parser.category_name)
+        if key is not None and key in self._indexes:
+            # Индекс категории перезагрузится из приемника, поэтому ее товары из буфера должны быть уже записаны
+            self.writer.flush()
+            del self._indexes[key]
+
+    @staticmethod
+    def _index_key(category_name):
+        # При DEDUP_SCOPE = "all" индекс один на все категории: он загружается из приемника один раз
+        return category_name if settings.DEDUP_SCOPE == "category" else None
+
+    def _index(self, category_name):
+        key = self._index_key(category_name)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = self.index_loader(category_name)
+        return index
+
+    def _on_flush(self, rows):
+        unit_ids, self._unflushed = self._unflushed, []
+        self.queue.complete(unit_ids, self.worker_id)
+
+    def _plan(self, unit):
+        parser = self._parser(unit["category_url"])
+        ranges = plan_price_ranges(parser.backend, parser.start_url, step=parser.step,
+                                   min_count=parser.min_count, max_count=parser.max_count)
+        if not ranges:
+            raise RuntimeError("не удалось подобрать диапазоны")
+        units = []
+        for lower, upper, count in ranges:
+            range_url = build_range_url(parser.start_url, lower, upper)
+            pages = page_count(count)
+            units.extend({"kind": PAGE, "category_url": unit["category_url"], "range_url": range_url,
+                          "page": page_number, "pages": pages} for page_number in range(1, pages + 1))
+        added = self.queue.put(unit["run_id"], units)
+        self.queue.complete([unit["id"]], self.worker_id)
+        self.stats["plans"] += 1
+        log.info("planned", f"🗺 [{self.worker_id}] {parser.category_name}: {len(ranges)} диапазонов, "
+                            f"{added} новых страниц в очереди",
+                 worker=self.worker_id, category=parser.category_name, ranges=len(ranges), pages=added)
+
+    def _page(self, unit):
+        parser = self._parser(unit["category_url"])
+        range_url, page_number = unit["range_url"], unit["page"]
+        products = parser.backend.fetch_page(range_url, page_number)
+
+        # Количество могло вырасти с момента планирования: за заполненной последней страницей ставим следующую
+        if (page_number >= unit["pages"] and len(products) >= settings.CATALOG_PAGE_SIZE
+                and page_number < settings.HTTP_MAX_PAGES):
+            self.queue.put(unit["run_id"], [{"kind": PAGE, "category_url": unit["category_url"],
+                                             "range_url": range_url, "page": page_number + 1,
+                                             "pages": page_number + 1}])
+
+        article_index = self._index(parser.category_name)
+        new_count = parser._store_products(products, self.writer, article_index)
+        self.stats["pages"] += 1
+        self.stats["items"] += len(products)
+        self.stats["new_items"] += new_count
+        self._unflushed.append(unit["id"])
+        if not len(self.writer):
+            # Буфер пуст (все сброшено или новых товаров нет) — подтверждаем сразу вместе с ожидавшими
+            self._on_flush(0)
+
+    def run(self, stop_when_empty=True):
+        """Выполняет задания, пока они есть. Возвращает статистику воркера."""
+        started = time.monotonic()
+        self.writer = self.writer_factory(self._on_flush)
+        try:
+            while True:
+                unit = self.queue.lease(self.worker_id, self.run_id)
+                if unit is None:
+                    # Подтверждаем записанное и ждем: другие воркеры могут добавить страницы или вернуть задания
+                    self.writer.flush()
+                    if stop_when_empty and not self.queue.active(self.run_id):
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                try:
+                    if unit["kind"] == PLAN:
+                        self._plan(unit)
+                    else:
+                        self._page(unit)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    if unit["kind"] == PAGE:
+                        PAGE_ERRORS.inc()
+                    log.warning("unit_failed",
+                                f"⚠️ [{self.worker_id}] Ошибка задания {unit['kind']} #{unit['id']}: {e}",
+                                worker=self.worker_id, unit=unit["id"], kind=unit["kind"], error=str(e))
+                    if not self.queue.fail(unit["id"], self.worker_id, e):
+                        log.warning("lease_lost", f"⚠️ [{self.worker_id}] Аренда задания #{unit['id']} истекла, "
+                                                  f"оно уже выдано другому воркеру",
+                                    worker=self.worker_id, unit=unit["id"])
+                # Задания, ждущие записи, не должны потерять аренду
+                self.queue.extend(self._unflushed, self.worker_id)
+                self.writer.flush_if_due()
+        finally:
+            self.writer.close()
+            for parser in self._parsers.values():
+                parser.backend.close()
+            self._parsers.clear()
+            self._indexes.clear()
+            self.stats["elapsed"] = time.monotonic() - started
+        log.info("worker_finished", f"✅ [{self.worker_id}] Готово: {self.stats['pages']} страниц, "
+                                    f"{self.stats['new_items']} новых товаров за {self.stats['elapsed']:.1f} с",
+                 worker=self.worker_id, **self.stats)
+        return self.stats
@@ -1,16 +1,127 @@
 # selenium_parser/parsers/wildberries_parser_v2.py
+import html as html_lib
+import re
+
 from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 
-def parse_products_from_page(html, base_domain, category_name):
+from selenium_parser import settings
+from selenium_parser.utils.product_record import ProductRecord
+
+# Артикул в ссылке на карточку товара
+ARTICLE_RE = re.compile(r'/catalog/(\d+)/detail\.aspx')
+
+
+def _ci(word):
+    """Регистронезависимый шаблон только для латиницы (re.IGNORECASE принял бы и 'ſ' за 's')."""
+    return "".join(f"[{c.lower()}{c.upper()}]" for c in word)
+
+
+# Атрибуты открывающего тега — грамматика locatestarttagend_tolerant из html.parser:
+# '/' не перед '>' считается пробелом, перед значением допускается несколько '='.
+_TAG_ATTRS = r"""
+    (?:[\s/]*
+      (?:(?<=['"\s/])[^\s/>][^\s/=>]*
+        (?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*)\s*)?
+        (?:\s|/(?!>))*
+      )*
+    )?\s*"""
+# Атрибуты частого вида: через пробел, значения в двойных кавычках
+_SIMPLE_ATTRS = r'(?:[ \t\n\r\f]+[-a-zA-Z0-9_:.]+(?:="[^"]*")?)*'
+# Символы, на которых заканчивается имя тега
+_NAME_END = r"(?=[\t\n\r\f />\x00])"
+# Незакрытую конструкцию html.parser отдает текстом до ближайшего '>'
+_UNCLOSED = r"[^>]*>?"
+
+
+def _start_tag(group, body=""):
     """
-    Парсит HTML-код страницы каталога Wildberries и извлекает все ссылки на товары.
-    :param html: HTML-код страницы (полностью загруженной со всеми товарами).
-    :param base_domain: Базовый домен сайта (например, 'https://global.wildberries.ru'),
-                        используется для формирования полного URL-адреса.
-    :param category_name: Название категории для сохранения в данных.
-    :return: Список словарей {"category": category, "link": link, "article": article}.
+    Шаблон открывающего тега после его имени, как в html.parser: тег заканчивается на '>' или '/>';
+    если за атрибутами идет буква, '=', '/' или конец документа, тег не закрыт и до ближайшего '>' — текст;
+    на любом другом символе тег обрывается и считается текстом.
+    Атрибуты сопоставляются в опережающей проверке, чтобы не перебирать их заново, когда тег не закрыт.
+    :param group: Имя группы для атрибутов.
+    :param body: Шаблон того, что следует за '>' (содержимое <script>/<style>).
     """
+    return (rf"(?=(?P<{group}>{_TAG_ATTRS}))"
+            rf"(?:(?P={group})(?P<{group}_end>/>|>{body})|(?=(?P={group})(?:[a-zA-Z=/]|\Z))[^>]*>|(?P={group}))")
+
+
+def _raw_text_element(name):
+    """Шаблон тега <script>/<style>: его содержимое до закрывающего тега (или до конца документа) — текст."""
+    return (rf"<{_ci(name)}{_NAME_END}(?:[\s/]*/>|"
+            + _start_tag(name, rf"[^<]*(?:<(?!/\s*{_ci(name)}\s*>)[^<]*)*(?:</\s*{_ci(name)}\s*>)?") + ")")
+
+
+# Неверная ссылка на символ: html.parser обрывает на ней разбор, и остаток страницы становится текстом
+_BAD_CHARREF = r"&\#(?!(?:[0-9]+|[xX][0-9a-fA-F]+)[^0-9a-fA-F])"
+BAD_CHARREF_RE = re.compile(_BAD_CHARREF)
+
+
+def _scan_pattern(charrefs=False):
+    """
+    Шаблон одного прохода по документу, разбивающего его на конструкции так же, как html.parser,
+    на котором работает эталонный разбор через BeautifulSoup: комментарии, секции <![CDATA[...]]>,
+    объявления <!...> и <?...>, закрывающие теги и содержимое <script>/<style> пропускаются целиком,
+    поэтому ссылки внутри них не считаются. У закрытых тегов <a> последней совпавшей группой будет a_simple или a_end.
+    Группы quirk и charref — конструкции, на которых html.parser ведет себя особо (неизвестная секция <![...]> —
+    ошибка, неверная ссылка на символ обрывает разбор); такие страницы разбирает эталон.
+    :param charrefs: Искать и ссылки на символы. Без них все ветви начинаются с '<',
+                     и regex быстро пропускает текст между тегами.
+    """
+    charref = rf"| {_BAD_CHARREF}(?P<charref>)" if charrefs else ""
+    return re.compile(
+        rf"""
+          <!--(?:.*?--\s*>|{_UNCLOSED})
+        | <!\[(?:{_ci("cdata")}|{_ci("rcdata")}|{_ci("temp")}|{_ci("ignore")}|{_ci("include")})(?![-_.a-zA-Z0-9])
+          (?:.*?\]\s*\]\s*>|{_UNCLOSED})
+        | <!\[(?:{_ci("if")}|{_ci("else")}|{_ci("endif")})(?![-_.a-zA-Z0-9])(?:.*?\]\s*>|{_UNCLOSED})
+        | <!\[(?P<quirk>)
+        | <[!?/]{_UNCLOSED}
+        | {_raw_text_element("script")}
+        | {_raw_text_element("style")}
+        # Частый случай без перебора: атрибуты через пробел, значения в двойных кавычках
+        | <[aA](?P<a_simple>{_SIMPLE_ATTRS})[ \t\n\r\f]*>
+        | <[aA]{_NAME_END}{_start_tag("a")}
+        | <[a-zA-Z][-a-zA-Z0-9]*{_SIMPLE_ATTRS}[ \t\n\r\f]*>
+        | <[a-zA-Z][^\t\n\r\f />\x00]*{_start_tag("tag")}
+        {charref}
+        """,
+        re.DOTALL | re.VERBOSE
+    )
+
+
+SCAN_RE = _scan_pattern()
+SCAN_CHARREFS_RE = _scan_pattern(charrefs=True)
+# Отдельный атрибут тега (attrfind_tolerant в html.parser): имя и значение в кавычках или без них
+ATTR_RE = re.compile(
+    r"""((?<=['"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*('[^']*'|"[^"]*"|(?!['"])[^>\s]*))?(?:\s|/(?!>))*"""
+)
+# href в теге с атрибутами частого вида (группа a_simple)
+SIMPLE_HREF_RE = re.compile(r'[ \t\n\r\f][hH][rR][eE][fF](?:="([^"]*)"|(?=[ \t\n\r\f>]))')
+# Имя тега с пробелами и '/' до первого атрибута (tagfind_tolerant в html.parser)
+TAG_NAME_RE = re.compile(r"[a-zA-Z][^\t\n\r\f />\x00]*(?:\s|/(?!>))*")
+
+
+def _make_product(href, base_domain, category_name):
+    """Формирует запись о товаре по href или возвращает None для неподдерживаемых ссылок."""
+    # Формируем полный URL: если ссылка относительная (начинается с '/'), добавляем домен
+    if href.startswith("/"):
+        full_link = base_domain + href
+    elif href.startswith("http"):
+        full_link = href
+    else:
+        # В случае других форматов ссылок, пропускаем
+        return None
+
+    # Извлекаем артикул из ссылки
+    article_match = ARTICLE_RE.search(full_link)
+    article = article_match.group(1) if article_match else ""
+
+    return ProductRecord(article, full_link, category_name)
+
+
+def parse_products_from_page_bs4(html, base_domain, category_name):
+    """Эталонный разбор через BeautifulSoup (html.parser): строит полное дерево страницы."""
     soup = BeautifulSoup(html, "html.parser")
     products = []
     # Находим все ссылки на карточки товаров по наличию 'detail.aspx' в href
@@ -19,24 +130,99 @@ def parse_products_from_page(html, base_domain, category_name):
         href = a.get("href")
         if not href:
             continue
-        # Формируем полный URL: если ссылка относительная (начинается с '/'), добавляем домен
-        if href.startswith("/"):
-            full_link = base_domain + href
-        elif href.startswith("http"):
-            full_link = href
-        else:
-            # В случае других форматов ссылок, пропускаем
-            continue
+        product = _make_product(href, base_domain, category_name)
+        if product is not None:
+            products.append(product)
+    return products
+
 
-        # Извлекаем артикул из ссылки
-        import re
-        article_match = re.search(r'/catalog/(\d+)/detail\.aspx', full_link)
-        article = article_match.group(1) if article_match else ""
-
-        product = {
-            "category": category_name,
-            "link": full_link,
-            "article": article
-        }
-        products.append(product)
+def _parse_href(tag):
+    """
+    Разбирает атрибуты тега <a ...> так же, как html.parser, и возвращает значение href (без раскрытия сущностей).
+    Возвращает None, если href нет или html.parser счел бы тег текстом.
+    """
+    href = None
+    pos = TAG_NAME_RE.match(tag, 1).end()
+    while pos < len(tag):
+        attr = ATTR_RE.match(tag, pos)
+        if not attr:
+            break
+        name, rest, value = attr.group(1, 2, 3)
+        # При повторяющемся атрибуте, как и в BeautifulSoup, действует последнее значение
+        if name.lower() == "href":
+            if not rest:
+                value = None
+            elif value[:1] in ("'", '"') and value[:1] == value[-1:]:
+                value = value[1:-1]
+            href = value
+        pos = attr.end()
+    if tag[pos:].strip() not in (">", "/>"):
+        return None
+    return href
+
+
+def parse_products_from_page_regex(html, base_domain, category_name):
+    """
+    Быстрый разбор за один проход предкомпилированными регулярными выражениями:
+    дерево документа не строится, документ разбивается на конструкции по правилам html.parser,
+    атрибуты разбираются только у тегов <a> со ссылкой на detail.aspx. Результат совпадает с эталонным разбором bs4;
+    редкие страницы, на которых html.parser ведет себя особо, разбираются эталоном.
+    """
+    products = []
+    tag = None
+    scan_re = SCAN_CHARREFS_RE if BAD_CHARREF_RE.search(html) else SCAN_RE
+    for tag in scan_re.finditer(html):
+        kind = tag.lastgroup
+        if kind == "a_simple" or kind == "a_end":
+            if "detail.aspx" not in tag.group():
+                continue
+            if kind == "a_simple":
+                # При повторяющемся атрибуте, как и в BeautifulSoup, действует последнее значение
+                values = SIMPLE_HREF_RE.findall(tag.group())
+                href = values[-1] if values else None
+            else:
+                href = _parse_href(tag.group())
+            if not href:
+                continue
+            # Как и html.parser, раскрываем HTML-сущности в значении атрибута (&amp; -> &)
+            if "&" in href:
+                href = html_lib.unescape(href)
+            if "detail.aspx" not in href:
+                continue
+            product = _make_product(href, base_domain, category_name)
+            if product is not None:
+                products.append(product)
+        elif kind == "quirk" or kind == "charref":
+            return parse_products_from_page_bs4(html, base_domain, category_name)
+    # Конструкция, заходящая за последний '>', не закрыта: html.parser продолжает разбор с ближайшего '<' внутри нее
+    if tag is not None and tag.end() > html.rfind(">") + 1:
+        return parse_products_from_page_bs4(html, base_domain, category_name)
     return products
+
+
+EXTRACTORS = {
+    "regex": parse_products_from_page_regex,
+    "bs4": parse_products_from_page_bs4,
+}
+
+
+def get_extractor(name=None):
+    """Возвращает функцию разбора страницы по имени (по умолчанию settings.LINK_EXTRACTOR)."""
+    name = name or settings.LINK_EXTRACTOR
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный способ разбора страницы: {name}") from None
+
+
+def parse_products_from_page(html, base_domain, category_name, extractor=None):
+    """
+    Парсит HTML-код страницы каталога Wildberries и извлекает все ссылки на товары.
+    :param html: HTML-код страницы (полностью загруженной со всеми товарами).
+    :param base_domain: Базовый домен сайта (например, 'https://global.wildberries.ru'),
+                        используется для формирования полного URL-адреса.
+    :param category_name: Название категории для сохранения в данных.
+    :param extractor: Способ разбора: "regex" (быстрый) или "bs4" (эталонный); по умолчанию settings.LINK_EXTRACTOR.
+    :return: Список записей ProductRecord (article, link, category).
+    """
+    return get_extractor(extractor)(html, base_domain, category_name)
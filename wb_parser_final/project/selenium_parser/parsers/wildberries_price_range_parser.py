@@ -1,116 +1,343 @@
-import time
-import re
-from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-
 from selenium_parser import settings
-from selenium_parser.utils.price_range_utils import find_suitable_upper
-from selenium_parser.parsers.wildberries_parser_v2 import parse_products_from_page
-from selenium_parser.utils.clickhouse_insert import insert_product_if_new  # 👈 Интеграция с ClickHouse
+from selenium_parser.backends import get_backend
+from selenium_parser.backends.controlled import controlled
+from selenium_parser.parsers.concurrent_crawler import ConcurrentCrawler
+from selenium_parser.sinks import get_sink
+from selenium_parser.utils import price_range_utils
+from selenium_parser.utils.price_range_utils import (
+    find_suitable_upper, build_range_url, get_lower_price, get_max_upper_price
+)
+from selenium_parser.utils.range_planner import RangePlanner
+from selenium_parser.utils.browser_pool import get_browser_pool
+from selenium_parser.utils.checkpoint import CrawlCheckpoint
+from selenium_parser.utils.fetch_control import FetchFailed
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import ITEMS, ITEMS_PER_SECOND
+from selenium_parser.utils.probe_cache import category_key
+from selenium_parser.utils.progress import CrawlCancelled, CrawlProgress
+from selenium_parser.utils.range_planner import to_kopecks
+from selenium_parser.utils.range_state import article_fingerprint, get_range_state, refresh_ranges
+
+log = get_logger("parser")
 
 
 class WildberriesPriceRangeParser:
-    def __init__(self, start_url):
+    def __init__(self, start_url, backend=None, concurrency=None, resume=False, step=None, max_products=None,
+                 progress=None, cancel_event=None, incremental=False, sink=None, ch_client=None,
+                 fetch_control=None):
         self.start_url = start_url
-        chrome_options = Options()
-        # chrome_options.add_argument("--headless")  # Вы можете включить headless-режим позже
-        if settings.CHROMEDRIVER_PATH:
-            self.driver = webdriver.Chrome(settings.CHROMEDRIVER_PATH, options=chrome_options)
-        else:
-            self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.implicitly_wait(5)
+        self.concurrency = concurrency or settings.CRAWL_CONCURRENCY
+        self.resume = resume
+        # Размер блока: max_products товаров сверху, снизу — в той же пропорции, что и по умолчанию (5000 из 6000)
+        self.step = step
+        self.max_count = max_products or price_range_utils.target_max_count
+        self.min_count = min(price_range_utils.target_min_count,
+                             self.max_count * price_range_utils.target_min_count // price_range_utils.target_max_count)
+        self.progress = progress or CrawlProgress()
+        self.cancel_event = cancel_event
+        self.incremental = incremental
+        # Приемник товаров (settings.SINK); ch_client заменяет общий клиент ClickHouse
+        self.sink_name = sink or settings.SINK
+        self.ch_client = ch_client
+        # Общее управление запросами к хосту (FetchControl); None — из реестра по хосту бэкенда
+        self.fetch_control = fetch_control
+        # Отпечатки загруженных страниц по диапазонам: по ним следующий инкрементальный запуск
+        # находит изменившиеся диапазоны
+        self.range_state = get_range_state()
+        self._page_fingerprints = {}
 
         # Базовый домен
         from urllib.parse import urlparse
         parts = urlparse(self.start_url)
         self.base_domain = f"{parts.scheme}://{parts.netloc}"
 
-    def run(self):
-        driver = self.driver
-        start_url = self.start_url
-        seen_links = set()
+        self.category_name = self._extract_category_name()
+        self.backend = self._create_backend(backend)
+
+    def _create_backend(self, name, **kwargs):
+        backend = get_backend(name, base_domain=self.base_domain, category_name=self.category_name, **kwargs)
+        return controlled(backend, self.fetch_control, self.cancel_event)
 
-        driver.get(start_url)
-        time.sleep(2)
+    def _create_sink(self, on_flush=None):
+        if self.sink_name == "clickhouse":
+            return get_sink("clickhouse", ch_client=self.ch_client, on_flush=on_flush)
+        return get_sink(self.sink_name, on_flush=on_flush)
 
-        # Извлекаем категорию из URL
+    def _extract_category_name(self):
+        """Извлекает категорию из URL."""
         from urllib.parse import urlparse, unquote
-        path = urlparse(start_url).path
+        path = urlparse(self.start_url).path
         if path.endswith("/"):
             path = path[:-1]
 
         if "/catalog/" in path:
             cat_path = path.split("/catalog/")[1]
-            category_name = unquote(cat_path.replace("/", "_"))
         else:
             cat_path = path.strip("/")
-            category_name = unquote(cat_path.replace("/", "_"))
+        return unquote(cat_path.replace("/", "_"))
+
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CrawlCancelled()
+
+    def run(self):
+        """Запускает обход. Возвращает True, если категория собрана полностью."""
+        checkpoint = CrawlCheckpoint(self.start_url)
+        if self.resume and checkpoint.load():
+            done_pages = sum(len(p) for p in checkpoint.completed_pages.values())
+            log.info("resumed", f"♻️ Продолжаем с контрольной точки: {len(checkpoint.ranges)} диапазонов, "
+                                f"{done_pages} страниц уже собрано",
+                     ranges=len(checkpoint.ranges), pages_done=done_pages)
+        try:
+            # Буфер записи сбрасывается в приемник и при ошибке, и при штатном выходе;
+            # после каждого сброса контрольная точка фиксирует записанные страницы
+            with self._create_sink(on_flush=checkpoint.commit) as writer:
+                # Все известные артикулы загружаются один раз, вместо запроса на каждый товар
+                article_index = writer.load_index(self.category_name)
+                try:
+                    # Перепроверка диапазонов тоже прерывается отменой: задание отменяется, а не падает с ошибкой
+                    if self.incremental and not checkpoint.ranges:
+                        self._prepare_incremental(checkpoint)
+                    if self.concurrency > 1:
+                        complete = self._crawl_concurrent(writer, article_index, checkpoint)
+                    else:
+                        complete = self._crawl(writer, article_index, checkpoint)
+                except CrawlCancelled:
+                    log.info("cancelled", "⏹ Обход остановлен по запросу.", category=self.category_name)
+                    complete = False
+            checkpoint.commit()
+            if complete:
+                if self.range_state is not None:
+                    # Диапазоны прошлых разбиений, которых больше нет, не должны попасть в следующую перепроверку
+                    keep = [(to_kopecks(lower), to_kopecks(upper)) for lower, upper, _ in checkpoint.ranges]
+                    self.range_state.prune(category_key(self.start_url), keep)
+                checkpoint.finish()
+            else:
+                log.warning("incomplete", f"⚠️ Часть страниц не загружена, контрольная точка сохранена: "
+                                          f"{checkpoint.path}. Запустите с --resume, чтобы догрузить их.",
+                            checkpoint=checkpoint.path)
+            return complete
+        finally:
+            self.backend.close()
+
+    def _prepare_incremental(self, checkpoint):
+        """
+        Инкрементальный режим: перепроверяет диапазоны прошлого обхода и записывает в контрольную точку
+        новое разбиение, отмечая неизменившиеся диапазоны собранными — обход их пропустит.
+        """
+        if self.range_state is None:
+            log.warning("incremental_disabled", "⚠️ Хранилище состояния диапазонов отключено, полный обход.")
+            return
+        previous = self.range_state.ranges(category_key(self.start_url))
+        ranges, unchanged = refresh_ranges(self.backend, self.start_url, previous, step=self.step,
+                                           min_count=self.min_count, max_count=self.max_count,
+                                           cancel_event=self.cancel_event)
+        if ranges is None:
+            log.info("incremental_full", "🔄 Нет сохраненного разбиения для этого интервала цен, полный обход.",
+                     category=self.category_name)
+            return
+        checkpoint.set_ranges(ranges)
+        for range_url in unchanged:
+            checkpoint.mark_range(range_url)
+        checkpoint.commit()
+
+    def _record_page(self, range_url, page_number, products):
+        if self.range_state is not None:
+            self._page_fingerprints.setdefault(range_url, {})[page_number] = article_fingerprint(products)
+
+    def _record_range(self, range_url, lower, upper, count):
+        """Сохраняет отпечатки диапазона, если в этом запуске загружены все его страницы с первой."""
+        pages = self._page_fingerprints.pop(range_url, {})
+        if self.range_state is None or count is None or not pages or len(pages) != max(pages):
+            return
+        self.range_state.put(category_key(self.start_url), to_kopecks(lower), to_kopecks(upper), count,
+                             [pages[n] for n in sorted(pages)])
+
+    @staticmethod
+    def _new_products(products, article_index):
+        """Отбрасывает уже известные артикулы. Возвращает список новых товаров."""
+        new = [p for p in products if article_index.add(p.article)]
+        ITEMS.inc(len(new), result="new")
+        ITEMS.inc(len(products) - len(new), result="duplicate")
+        return new
+
+    @staticmethod
+    def _write_products(products, writer):
+        """Буферизует товары для пакетной вставки в ClickHouse и сбрасывает буфер, если пора."""
+        writer.add_many(products)
+        writer.flush_if_due()
+        return len(products)
 
-        print(f"📦 Категория: {category_name}")
+    @staticmethod
+    def _store_products(products, writer, article_index):
+        """Отбрасывает уже известные артикулы и буферизует новые товары. Возвращает число новых."""
+        return WildberriesPriceRangeParser._write_products(
+            WildberriesPriceRangeParser._new_products(products, article_index), writer)
 
-        lower_match = re.search(r'priceU=(\d+)%3B\d+', start_url)
-        current_lower = int(lower_match.group(1)) / 100.0 if lower_match else 1.0
+    def _page_done(self, items, new_items):
+        self.progress.add_page(items, new_items)
+        ITEMS_PER_SECOND.set(self.progress.items_per_second(), category=self.category_name)
 
+    @staticmethod
+    def _mark_done(checkpoint, writer, range_url, page_number=None, items=0):
+        """Отмечает страницу (или весь диапазон) собранной; фиксирует сразу, если буфер записи пуст."""
+        if page_number is None:
+            checkpoint.mark_range(range_url)
+        else:
+            checkpoint.mark_page(range_url, page_number, full=items >= settings.CATALOG_PAGE_SIZE)
+        if not len(writer):
+            checkpoint.commit()
+
+    def _crawl_concurrent(self, writer, article_index, checkpoint):
+        log.info("category", f"📦 Категория: {self.category_name}", category=self.category_name)
+        crawler = ConcurrentCrawler(
+            self.start_url,
+            backend_factory=lambda **kwargs: self._create_backend(self.backend.name, **kwargs),
+            concurrency=self.concurrency,
+            step=self.step,
+            min_count=self.min_count,
+            max_count=self.max_count,
+            cancel_event=self.cancel_event,
+            # Браузерам загрузчиков нужны места в пуле: их число ограничено его размером
+            pool=get_browser_pool() if self.backend.name == "selenium" else None
+        )
+        # Планирование идет основным бэкендом, загрузка страниц — отдельными бэкендами воркеров
+        ranges = checkpoint.ranges
+        if not ranges:
+            ranges = crawler.plan(self.backend)
+            checkpoint.set_ranges(ranges)
+        # Основной бэкенд больше не нужен: освобождаем его браузер для воркеров
+        self.backend.close()
+        self.progress.set_plan(blocks_total=len(ranges), total_items=sum(count or 0 for _, _, count in ranges))
+        bounds = {build_range_url(self.start_url, lower, upper): (lower, upper, count)
+                  for lower, upper, count in ranges}
+        for range_url in bounds:
+            if checkpoint.is_range_done(range_url):
+                self.progress.add_block()
+
+        # Страницы, собранные по каждому диапазону: блок завершен, когда собраны все его страницы
+        stored = {url: set(pages) for url, pages in checkpoint.completed_pages.items()}
+
+        def dedup(range_url, page_number, products):
+            self._record_page(range_url, page_number, products)
+            return len(products), self._new_products(products, article_index)
+
+        def store(range_url, page_number, payload):
+            items, new = payload
+            new_count = self._write_products(new, writer)
+            self._mark_done(checkpoint, writer, range_url, page_number, items)
+            self._page_done(items, new_count)
+            pages = stored.setdefault(range_url, set())
+            pages.add(page_number)
+            if len(pages) == crawler.last_page(range_url):
+                self.progress.add_block()
+                self._record_range(range_url, *bounds[range_url])
+            return new_count
+
+        def skip(range_url, page_number):
+            return checkpoint.is_range_done(range_url) or checkpoint.is_page_done(range_url, page_number)
+
+        stats = crawler.run(ranges, store, skip=skip, dedup=dedup, full=checkpoint.is_page_full)
+        if stats["cancelled"]:
+            raise CrawlCancelled()
+        log.info("finished", f"✅ Сбор завершен. Всего новых товаров: {stats['new_items']}",
+                 category=self.category_name, new_items=stats["new_items"])
+        return not stats["errors"]
+
+    def _crawl(self, writer, article_index, checkpoint):
+        start_url = self.start_url
+        category_name = self.category_name
+        total_new = 0
+        failed_ranges = 0
+
+        log.info("category", f"📦 Категория: {category_name}", category=category_name)
+
+        current_lower = get_lower_price(start_url)
+        max_upper_price = get_max_upper_price(start_url)
+
+        # Один планировщик на весь обход: пробы прошлых блоков помогают подбирать следующие
+        planner = RangePlanner(self.backend, start_url, min_count=self.min_count, max_count=self.max_count,
+                               step=self.step, cancel_event=self.cancel_event)
+        # При продолжении сначала проходим уже подобранные диапазоны из контрольной точки
+        planned = list(checkpoint.ranges)
         block_num = 1
-        while True:
-            print(f"\n🔎 Диапазон #{block_num} с нижней границей {current_lower:.2f} RUB...")
-            upper_price, count = find_suitable_upper(driver, start_url, current_lower)
+        while current_lower <= max_upper_price:
+            self._check_cancelled()
+            log.info("range_search", f"\n🔎 Диапазон #{block_num} с нижней границей {current_lower:.2f} RUB...",
+                     block=block_num, lower=current_lower)
+            if planned:
+                current_lower, upper_price, count = planned.pop(0)
+            else:
+                try:
+                    upper_price, count = find_suitable_upper(self.backend, start_url, current_lower, planner=planner)
+                except FetchFailed:
+                    # Без браузера страница может быть недоступна совсем: ниже переключаемся на selenium
+                    if block_num > 1 or self.backend.name == "selenium":
+                        raise
+                    upper_price, count = None, None
+                if upper_price is not None:
+                    checkpoint.add_range(current_lower, upper_price, count)
+            if upper_price is None and block_num == 1 and self.backend.name != "selenium":
+                # Запасной вариант: страница не отдала данные без браузера
+                log.warning("backend_fallback",
+                            f"⚠️ Бэкенд {self.backend.name} не получил количество товаров, переключаемся на selenium.",
+                            backend=self.backend.name)
+                self.backend.close()
+                self.backend = planner.backend = self._create_backend("selenium")
+                continue
             if upper_price is None:
-                print("❌ Не удалось подобрать диапазон. Выход.")
-                break
-
-            lower_param = int(current_lower * 100)
-            upper_param = int(upper_price * 100)
-            range_url = re.sub(r'priceU=\d+%3B\d+', f'priceU={lower_param}%3B{upper_param}', start_url)
-            print(f"📊 Сбор: {current_lower:.2f} – {upper_price:.2f} RUB.")
-
-            driver.get(range_url)
-            time.sleep(2)
-            page_number = 1
-
-            while True:
-                print("📜 Прокрутка страницы...")
-                while True:
-                    driver.execute_script("window.scrollBy(0, 450);")
-                    time.sleep(0.25)
-                    new_height = driver.execute_script("return window.pageYOffset + window.innerHeight")
-                    total_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height >= total_height - 10:
-                        break
-                time.sleep(1)
-
-                html = driver.page_source
-                products = parse_products_from_page(html, self.base_domain, category_name)
-                new_count = 0
-
-                for p in products:
-                    if p["link"] not in seen_links:
-                        insert_product_if_new(p)  # 👈 Вставляем в ClickHouse
-                        seen_links.add(p["link"])
-                        new_count += 1
-
-                print(f"📄 Страница {page_number}: +{new_count} новых")
+                log.error("range_failed", "❌ Не удалось подобрать диапазон. Выход.", lower=current_lower)
+                return False
+            if self.progress.total_items is None and planner.total is not None:
+                self.progress.set_plan(total_items=planner.total)
 
+            range_url = build_range_url(start_url, current_lower, upper_price)
+            if checkpoint.is_range_done(range_url):
+                log.info("range_skipped", f"⏭ Диапазон {current_lower:.2f} – {upper_price:.2f} RUB уже собран.",
+                         lower=current_lower, upper=upper_price)
+            else:
+                log.info("range_crawl", f"📊 Сбор: {current_lower:.2f} – {upper_price:.2f} RUB.",
+                         lower=current_lower, upper=upper_price, count=count)
+                start_page = checkpoint.next_page(range_url)
                 try:
-                    # Ищем кнопку "Следующая страница" по классу, чтобы избежать проблем с локализацией
-                    next_btn = driver.find_element(By.XPATH, "//*[contains(@class, 'pagination-next')]")
-                    time.sleep(1)
-                    next_btn.click()
-                    page_number += 1
-                    time.sleep(2)
-                except NoSuchElementException:
-                    break
-
-            current_lower = upper_price
+                    for page_number, products in self.backend.iter_pages(range_url, start_page):
+                        new_count = self._store_products(products, writer, article_index)
+                        total_new += new_count
+                        self._mark_done(checkpoint, writer, range_url, page_number, len(products))
+                        self._page_done(len(products), new_count)
+                        self._record_page(range_url, page_number, products)
+                        log.info("page_stored", f"📄 Страница {page_number}: +{new_count} новых",
+                                 range_url=range_url, page=page_number, items=len(products), new_items=new_count)
+                        self._check_cancelled()
+                except FetchFailed as e:
+                    # Границы диапазона известны: остальные диапазоны собираем, этот догрузит --resume
+                    failed_ranges += 1
+                    log.error("range_incomplete", f"❌ Диапазон {current_lower:.2f} – {upper_price:.2f} RUB "
+                                                  f"собран не полностью: {e}",
+                              lower=current_lower, upper=upper_price, error=str(e))
+                else:
+                    self._mark_done(checkpoint, writer, range_url)
+                    self._record_range(range_url, current_lower, upper_price, count)
+            self.progress.add_block()
+
+            # Следующий диапазон начинается на копейку выше, чтобы диапазоны не пересекались
+            current_lower = round(upper_price + 0.01, 2)
             block_num += 1
 
-        driver.quit()
-        print(f"✅ Сбор завершен. Всего новых товаров: {len(seen_links)}")
+        if planner.cache is not None:
+            stats = planner.cache.stats()
+            log.info("probe_cache", f"🗃 Кэш проб: {stats['hits']} попаданий, {stats['misses']} промахов, "
+                                    f"загрузок для проб: {planner.probes}", probes=planner.probes, **stats)
+        log.info("finished", f"✅ Сбор завершен. Всего новых товаров: {total_new}",
+                 category=category_name, **self.progress.snapshot())
+        return not failed_ranges
 
 
 # 🆕 Функция для вызова через FastAPI или main.py
-def run_price_range_parser(url: str, step: float = 5000, max_products: int = 6000):
-    parser = WildberriesPriceRangeParser(start_url=url)
-    parser.run()
+def run_price_range_parser(url: str, step: float = None, max_products: int = 6000, backend: str = None,
+                           concurrency: int = None, resume: bool = False, progress=None, cancel_event=None,
+                           incremental: bool = False, sink: str = None):
+    parser = WildberriesPriceRangeParser(start_url=url, backend=backend, concurrency=concurrency, resume=resume,
+                                         step=step, max_products=max_products, progress=progress,
+                                         cancel_event=cancel_event, incremental=incremental, sink=sink)
+    return parser.run()
@@ -2,3 +2,129 @@
 # Путь к исполняемому файлу ChromeDriver.
 # Если chromedriver находится в PATH, вы можете оставить это поле пустым.
 CHROMEDRIVER_PATH = ""
+
+# Подключение к ClickHouse. Клиент создается при первой записи или загрузке индекса артикулов.
+CLICKHOUSE_HOST = ""          # 🔁 Замените, если не localhost
+CLICKHOUSE_PORT = 0
+CLICKHOUSE_USERNAME = ""      # 🔁 Ваше имя пользователя
+CLICKHOUSE_PASSWORD = ""      # 🔁 Ваш пароль
+CLICKHOUSE_DATABASE = ""
+
+# Приемник собранных товаров: "clickhouse" или "file" — сжатые файлы в OUTPUT_DIR
+# (работа без ClickHouse и последующая загрузка через INSERT ... FORMAT Parquet / JSONEachRow).
+SINK = "clickhouse"
+OUTPUT_DIR = "output"
+FILE_SINK_FORMAT = "auto"     # "parquet", "arrow", "ndjson"; "auto" — parquet, если установлен pyarrow, иначе ndjson
+# Пороги пакета файлового приемника (один пакет — один файл): крупнее, чем у ClickHouse, чтобы не плодить
+# мелкие файлы. Контрольная точка фиксирует страницы только после записи файла, поэтому после сбоя
+# заново загружаются страницы не больше чем за FILE_SINK_MAX_SECONDS.
+FILE_SINK_MAX_ROWS = 500000
+FILE_SINK_MAX_BYTES = 128 * 1024 * 1024
+FILE_SINK_MAX_SECONDS = 600.0
+
+# Параметры пакетной записи в ClickHouse. Буфер сбрасывается, как только сработает любой из порогов.
+CLICKHOUSE_BATCH_MAX_ROWS = 50000        # максимум строк в одном INSERT
+CLICKHOUSE_BATCH_MAX_BYTES = 16 * 1024 * 1024  # примерный объем буфера в байтах
+CLICKHOUSE_BATCH_MAX_SECONDS = 30.0      # максимальное время хранения строк в буфере
+
+# Область предзагрузки индекса артикулов для дедупликации:
+# "all" — все артикулы таблицы, "category" — только товары текущей категории.
+DEDUP_SCOPE = "all"
+
+# Бэкенд загрузки страниц каталога: "selenium" (браузер) или "http" (запросы без браузера).
+# Если http-бэкенд не смог получить количество товаров, парсер переключается на selenium.
+FETCH_BACKEND = "selenium"
+
+# Настройки http-бэкенда.
+# HTTP_CATALOG_API_URL — адрес JSON API каталога (фильтры priceU/page/sort переносятся из URL категории).
+# Если пусто, запрашивается сама страница каталога.
+HTTP_CATALOG_API_URL = ""
+HTTP_POOL_SIZE = 10           # размер пула keep-alive соединений
+HTTP_TIMEOUT = 15             # таймаут запроса в секундах
+HTTP_MAX_PAGES = 100          # максимум страниц в одном ценовом диапазоне
+HTTP_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+# Параллельный обход ценовых диапазонов.
+# CRAWL_CONCURRENCY > 1 включает асинхронный режим: диапазоны планируются заранее,
+# затем страницы загружаются параллельно несколькими бэкендами.
+CRAWL_CONCURRENCY = 1
+CRAWL_RATE_LIMIT = 5.0        # максимум запросов в секунду к одному хосту
+CRAWL_QUEUE_SIZE = 32         # размер каждой очереди между стадиями загрузка → разбор → дедупликация → запись
+CRAWL_EXTRACT_CONCURRENCY = 2 # потоков разбора загруженных страниц
+CRAWL_GROW_INTERVAL = 10.0    # как часто обход, начатый не со всеми браузерами, берет освободившиеся в пуле
+CATALOG_PAGE_SIZE = 100       # товаров на одной странице каталога
+
+# Управление запросами к хосту (общее для проб планировщика и загрузки страниц):
+# адаптивная частота и параллельность (AIMD), повторы с экспоненциальной задержкой,
+# пауза хоста после ограничений (429/503, капча). Верхняя граница частоты — CRAWL_RATE_LIMIT.
+FETCH_INITIAL_RATE = 2.0            # начальная частота запросов в секунду
+FETCH_MIN_RATE = 0.2                # ниже этой частоты снижение не идет
+FETCH_RATE_INCREASE = 1.0           # рост частоты за «раунд» без ограничений, запросов в секунду
+FETCH_DECREASE_FACTOR = 0.7         # множитель частоты и параллельности при ограничении
+FETCH_THROTTLE_WINDOW = 50          # последних ответов, по которым считается доля ограничений
+FETCH_THROTTLE_TOLERANCE = 0.1      # доля ограничений в окне, при превышении которой частота снижается
+FETCH_INITIAL_CONCURRENCY = 2       # начальный предел одновременных запросов к хосту
+FETCH_MAX_CONCURRENCY = 16          # верхний предел одновременных запросов к хосту
+FETCH_RETRIES = 5                   # повторов после ошибки или ограничения
+FETCH_BACKOFF_BASE = 1.0            # базовая задержка повтора, секунд (удваивается, со случайным разбросом)
+FETCH_BACKOFF_MAX = 60.0            # максимальная задержка повтора, секунд
+FETCH_CIRCUIT_THRESHOLD = 3         # ограничений подряд, после которых запросы к хосту приостанавливаются
+FETCH_CIRCUIT_COOLDOWN = 30.0       # первая пауза, секунд (удваивается, если ограничения продолжаются)
+FETCH_CIRCUIT_MAX_COOLDOWN = 600.0  # максимальная пауза, секунд
+
+# Постоянный кэш проб количества товаров для подбора ценовых диапазонов.
+# Пустой путь отключает кэш.
+PROBE_CACHE_PATH = "cache/probe_cache.sqlite3"
+PROBE_CACHE_TTL = 6 * 3600          # срок жизни пробы в секундах
+PROBE_CACHE_MAX_ENTRIES = 100000    # максимум записей, сверх него удаляются давно не использованные
+
+# Каталог контрольных точек обхода (для продолжения после сбоя с --resume).
+CHECKPOINT_DIR = "checkpoints"
+
+# Инкрементальное обновление (--incremental): по количеству товаров и отпечаткам страниц прошлого обхода
+# заново обходятся только изменившиеся ценовые диапазоны. Пустой путь отключает сохранение состояния.
+RANGE_STATE_PATH = "cache/range_state.sqlite3"
+INCREMENTAL_FINGERPRINT_PAGES = 1      # сколько первых страниц диапазона сверять по отпечатку (0 — только количество)
+INCREMENTAL_MAX_AGE = 7 * 24 * 3600    # диапазон, не обходившийся дольше (секунд), обходится заново
+
+# Способ извлечения ссылок на товары из HTML страницы:
+# "regex" — быстрый однопроходный разбор, "bs4" — эталонный разбор через BeautifulSoup.
+LINK_EXTRACTOR = "regex"
+
+# Пул браузеров Chrome, общий для парсеров и запросов API.
+BROWSER_POOL_SIZE = 4                  # максимум одновременно запущенных браузеров
+BROWSER_MAX_PAGES_PER_SESSION = 200    # после стольких страниц браузер перезапускается (утечки памяти)
+BROWSER_POOL_ACQUIRE_TIMEOUT = 300     # сколько секунд ждать свободный браузер
+BROWSER_HEADLESS = True                # запуск без окна
+BROWSER_BLOCK_RESOURCES = True         # не загружать картинки, шрифты и медиа
+BROWSER_IMPLICIT_WAIT = 5              # неявное ожидание элементов, секунд
+
+# Ожидание готовности страницы в браузере.
+# "events" — по реальным сигналам (карточки, MutationObserver, сетевые запросы),
+# "sleep" — прежние фиксированные паузы и пошаговая прокрутка (для сравнения).
+PAGE_READINESS = "events"
+READINESS_QUIET_MS = 400          # сколько миллисекунд страница должна не меняться
+READINESS_REQUEST_GRACE_MS = 3000 # запросы дольше этого считаются фоновыми и не задерживают готовность
+READINESS_TIMEOUT = 15.0          # начальный таймаут ожидания загрузки, секунд
+READINESS_MIN_TIMEOUT = 3.0       # нижняя граница адаптивного таймаута
+READINESS_MAX_TIMEOUT = 30.0      # верхняя граница адаптивного таймаута загрузки
+SCROLL_TIMEOUT = 30.0             # начальный таймаут прокрутки, секунд
+SCROLL_MAX_TIMEOUT = 60.0         # верхняя граница адаптивного таймаута прокрутки
+
+# Фоновые задания API (POST /jobs).
+JOBS_DB_PATH = "checkpoints/jobs.sqlite3"   # состояние заданий, переживает перезапуск API
+JOBS_MAX_CONCURRENT = 2                     # сколько категорий обходится одновременно
+JOBS_QUEUE_SIZE = 20                        # сколько заданий может ждать в очереди
+JOBS_PROGRESS_SAVE_INTERVAL = 5.0           # как часто сохранять прогресс задания, секунд
+
+# Распределенный обход: общая очередь заданий (категория, диапазон, страница).
+WORK_QUEUE_PATH = "checkpoints/work_queue.sqlite3"   # файл очереди (только локальный диск: WAL не работает по сети)
+WORK_QUEUE_LEASE_SECONDS = 300                       # срок аренды задания воркером
+WORK_QUEUE_MAX_ATTEMPTS = 5                          # после стольких неудач задание помечается failed
+WORK_QUEUE_POLL_INTERVAL = 2.0                       # пауза воркера, когда свободных заданий нет
+
+# Метрики (GET /metrics в формате Prometheus) и логирование.
+METRICS_ENABLED = True      # False — метрики не собираются (вызовы становятся пустыми)
+LOG_FORMAT = "text"         # "text" — сообщения как раньше, "json" — структурированные JSON-строки
+LOG_LEVEL = "INFO"
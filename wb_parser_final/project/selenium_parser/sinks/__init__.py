@@ -0,0 +1,17 @@
+# selenium_parser/sinks/__init__.py
+from selenium_parser import settings
+
+
+def get_sink(name=None, **kwargs):
+    """
+    Создает приемник собранных товаров по имени: "clickhouse" (пакетные INSERT)
+    или "file" (сжатые файлы в settings.OUTPUT_DIR). По умолчанию используется settings.SINK.
+    """
+    name = name or settings.SINK
+    if name == "clickhouse":
+        from selenium_parser.sinks.clickhouse_sink import ClickHouseSink
+        return ClickHouseSink(**kwargs)
+    if name == "file":
+        from selenium_parser.sinks.file_sink import FileSink
+        return FileSink(**kwargs)
+    raise ValueError(f"Неизвестный приемник: {name}")
@@ -0,0 +1,166 @@
+# selenium_parser/sinks/base.py
+import atexit
+import threading
+import time
+
+from selenium_parser import settings
+from selenium_parser.utils.clickhouse_insert import COLUMN_NAMES, build_row
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import INSERT_ERRORS, INSERT_ROWS, INSERT_SECONDS
+
+log = get_logger("sink")
+
+
+class BatchSink:
+    """
+    Интерфейс приемника товаров с пакетной записью.
+    Строки (COLUMN_NAMES, по build_row) копятся в памяти по столбцам и передаются в _write() одним блоком,
+    когда буфер достигает max_rows строк, max_bytes байт или живет дольше max_seconds.
+    Используется как контекстный менеджер: при выходе (в том числе по исключению)
+    оставшиеся строки записываются.
+    on_flush(rows) вызывается после каждой успешной записи, когда строки уже сохранены
+    (например, для контрольных точек).
+
+    Наследник реализует _write(columns, rows) и load_index(category_name) —
+    индекс уже сохраненных артикулов для дедупликации.
+    """
+
+    name = "base"
+
+    def __init__(self, max_rows=None, max_bytes=None, max_seconds=None, on_flush=None):
+        self.max_rows = max_rows or settings.CLICKHOUSE_BATCH_MAX_ROWS
+        self.max_bytes = max_bytes or settings.CLICKHOUSE_BATCH_MAX_BYTES
+        self.max_seconds = max_seconds if max_seconds is not None else settings.CLICKHOUSE_BATCH_MAX_SECONDS
+
+        self._lock = threading.Lock()
+        self._columns = [[] for _ in COLUMN_NAMES]
+        self._rows = 0
+        self._bytes = 0
+        self._first_row_at = None
+        self._closed = False
+        self.on_flush = on_flush
+
+        self.total_rows = 0
+        self.total_batches = 0
+
+        # Сбрасываем буфер и при неожиданном завершении интерпретатора
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self._rows
+
+    def load_index(self, category_name=None):
+        """Индекс артикулов, уже сохраненных в приемнике (с учетом settings.DEDUP_SCOPE)."""
+        raise NotImplementedError
+
+    def _write(self, columns, rows):
+        """Сохраняет блок строк: columns — списки значений по COLUMN_NAMES."""
+        raise NotImplementedError
+
+    def add(self, data):
+        """Добавляет товар в буфер. Возвращает False, если у товара нет артикула."""
+        if not data.get("article"):
+            log.warning("no_article", f"⚠️ Пропущено: нет артикула {data}", product=data)
+            return False
+        row = build_row(data)
+        with self._lock:
+            if self._first_row_at is None:
+                self._first_row_at = time.monotonic()
+            for column, value in zip(self._columns, row):
+                column.append(value)
+            self._rows += 1
+            self._bytes += sum(len(value) for value in row)
+            due = self._is_due()
+        if due:
+            self.flush()
+        return True
+
+    def add_many(self, products):
+        """Добавляет товары одной страницы под одной блокировкой. Возвращает число добавленных."""
+        rows = []
+        for data in products:
+            if not data.get("article"):
+                log.warning("no_article", f"⚠️ Пропущено: нет артикула {data}", product=data)
+                continue
+            rows.append(build_row(data))
+        if not rows:
+            return 0
+        with self._lock:
+            if self._first_row_at is None:
+                self._first_row_at = time.monotonic()
+            for column, values in zip(self._columns, zip(*rows)):
+                column.extend(values)
+            self._rows += len(rows)
+            self._bytes += sum(len(value) for row in rows for value in row)
+            due = self._is_due()
+        if due:
+            self.flush()
+        return len(rows)
+
+    def _is_due(self):
+        if not self._rows:
+            return False
+        return (self._rows >= self.max_rows
+                or self._bytes >= self.max_bytes
+                or time.monotonic() - self._first_row_at >= self.max_seconds)
+
+    def flush_if_due(self):
+        """Сбрасывает буфер, если сработал один из порогов (например, по времени)."""
+        with self._lock:
+            due = self._is_due()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленные строки одним блоком."""
+        with self._lock:
+            if not self._rows:
+                return 0
+            columns, rows, size = self._columns, self._rows, self._bytes
+            self._columns = [[] for _ in COLUMN_NAMES]
+            self._rows = 0
+            self._bytes = 0
+            self._first_row_at = None
+
+        try:
+            with INSERT_SECONDS.time(sink=self.name):
+                self._write(columns, rows)
+        except Exception as e:
+            error_msg = str(e) if str(e) != '0' else 'Неизвестная ошибка записи'
+            INSERT_ERRORS.inc(sink=self.name)
+            log.error("insert_failed", f"❌ Ошибка при пакетной записи {rows} строк ({self.name}): "
+                                       f"{error_msg} ({type(e).__name__})",
+                      sink=self.name, rows=rows, error=error_msg, error_type=type(e).__name__)
+            # Возвращаем строки в буфер, чтобы не потерять их при следующем сбросе
+            with self._lock:
+                for column, pending in zip(columns, self._columns):
+                    column.extend(pending)
+                self._columns = columns
+                self._rows += rows
+                self._bytes += size
+                self._first_row_at = time.monotonic()
+            raise
+
+        self.total_rows += rows
+        self.total_batches += 1
+        INSERT_ROWS.observe(rows, sink=self.name)
+        log.info("insert_batch", f"✅ Добавлено пакетом: {rows} строк (всего {self.total_rows})",
+                 sink=self.name, rows=rows, total_rows=self.total_rows)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+        return rows
+
+    def close(self):
+        """Сбрасывает остаток буфера. Повторные вызовы безопасны."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self.flush()
@@ -0,0 +1,36 @@
+# selenium_parser/sinks/clickhouse_sink.py
+from selenium_parser.sinks.base import BatchSink
+from selenium_parser.utils.article_index import load_article_index
+from selenium_parser.utils.clickhouse_insert import COLUMN_NAMES, TABLE_NAME, get_clickhouse_client
+
+
+class ClickHouseSink(BatchSink):
+    """
+    Пакетная запись товаров в ClickHouse: каждый пакет уходит одним колоночным INSERT.
+    Если клиент не передан, общий клиент (get_clickhouse_client) подключается только при первой
+    записи или загрузке индекса.
+    """
+
+    name = "clickhouse"
+
+    def __init__(self, ch_client=None, table=TABLE_NAME, **kwargs):
+        super().__init__(**kwargs)
+        self._client = ch_client
+        self.table = table
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_clickhouse_client()
+        return self._client
+
+    def load_index(self, category_name=None):
+        return load_article_index(self.client, category_name)
+
+    def _write(self, columns, rows):
+        self.client.insert(
+            table=self.table,
+            data=columns,
+            column_names=COLUMN_NAMES,
+            column_oriented=True
+        )
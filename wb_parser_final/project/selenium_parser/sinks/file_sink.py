@@ -0,0 +1,142 @@
+# selenium_parser/sinks/file_sink.py
+import glob
+import gzip
+import itertools
+import json
+import os
+import time
+import uuid
+
+from selenium_parser import settings
+from selenium_parser.sinks.base import BatchSink
+from selenium_parser.utils.article_index import ArticleIndex, to_article_id
+from selenium_parser.utils.clickhouse_insert import COLUMN_NAMES, TABLE_NAME
+from selenium_parser.utils.log import get_logger
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow нужен только для форматов parquet и arrow
+    pyarrow = None
+
+log = get_logger("sink")
+
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "ndjson": ".ndjson.gz"}
+NDJSON_COMPRESS_LEVEL = 6  # gzip: уровень 9 почти не уменьшает файл, но втрое медленнее
+
+
+def resolve_format(file_format):
+    """Формат файлов по настройке: "auto" — parquet при установленном pyarrow, иначе ndjson."""
+    if file_format == "auto":
+        return "parquet" if pyarrow is not None else "ndjson"
+    if file_format not in EXTENSIONS:
+        raise ValueError(f"Неизвестный формат файлового приемника: {file_format}")
+    if file_format != "ndjson" and pyarrow is None:
+        raise RuntimeError(f"Для формата {file_format} нужен pyarrow: pip install pyarrow")
+    return file_format
+
+
+def _arrow_table(columns):
+    return pyarrow.table({name: pyarrow.array(values, pyarrow.string())
+                          for name, values in zip(COLUMN_NAMES, columns)})
+
+
+def _write_parquet(path, columns):
+    pyarrow.parquet.write_table(_arrow_table(columns), path, compression="zstd")
+
+
+def _write_arrow(path, columns):
+    table = _arrow_table(columns)
+    options = pyarrow.ipc.IpcWriteOptions(compression="zstd")
+    with pyarrow.OSFile(path, "wb") as f, pyarrow.ipc.new_file(f, table.schema, options=options) as writer:
+        writer.write_table(table)
+
+
+def _write_ndjson(path, columns):
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=NDJSON_COMPRESS_LEVEL) as f:
+        f.write("".join(encode(dict(zip(COLUMN_NAMES, row))) + "\n" for row in zip(*columns)))
+
+
+WRITERS = {"parquet": _write_parquet, "arrow": _write_arrow, "ndjson": _write_ndjson}
+
+
+def _read_articles(path):
+    """Пары (article, category_raw) из файла приемника любого формата."""
+    if path.endswith(EXTENSIONS["ndjson"]):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                yield row["article"], row["category_raw"]
+        return
+    if pyarrow is None:
+        log.warning("file_skipped", f"⚠️ Файл {path} не прочитан: не установлен pyarrow", path=path)
+        return
+    if path.endswith(EXTENSIONS["parquet"]):
+        table = pyarrow.parquet.read_table(path, columns=["article", "category_raw"])
+    else:
+        with pyarrow.OSFile(path, "rb") as f:
+            table = pyarrow.ipc.open_file(f).read_all().select(["article", "category_raw"])
+    yield from zip(table.column("article").to_pylist(), table.column("category_raw").to_pylist())
+
+
+class FileSink(BatchSink):
+    """
+    Запись товаров в сжатые файлы в каталоге directory: Parquet или Arrow (zstd) либо NDJSON (gzip).
+    Столбцы совпадают с таблицей ClickHouse, поэтому файлы загружаются в нее как есть:
+    INSERT INTO wildberries_products_parsed FORMAT Parquet (Arrow, JSONEachRow для .ndjson.gz).
+
+    Каждый пакет — отдельный файл {prefix}-{время запуска}-{случайный id}-{номер}; пороги пакета свои
+    (FILE_SINK_MAX_ROWS, FILE_SINK_MAX_BYTES, FILE_SINK_MAX_SECONDS), и они задают размер файлов.
+    Файл пишется во временный .tmp и переименовывается только целиком,
+    поэтому on_flush (контрольные точки) срабатывает, когда строки уже на диске, а загрузчик
+    не увидит недописанный файл.
+    """
+
+    name = "file"
+
+    def __init__(self, directory=None, file_format=None, prefix=TABLE_NAME, max_rows=None, max_bytes=None,
+                 max_seconds=None, **kwargs):
+        self.directory = directory or settings.OUTPUT_DIR
+        self.format = resolve_format(file_format or settings.FILE_SINK_FORMAT)
+        self.prefix = prefix
+        os.makedirs(self.directory, exist_ok=True)
+        super().__init__(max_rows=max_rows or settings.FILE_SINK_MAX_ROWS,
+                         max_bytes=max_bytes or settings.FILE_SINK_MAX_BYTES,
+                         max_seconds=max_seconds if max_seconds is not None else settings.FILE_SINK_MAX_SECONDS,
+                         **kwargs)
+        # Случайная часть имени: несколько приемников (задания API, процессы воркеров) пишут в один каталог
+        self._file_stem = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._sequence = itertools.count(1)
+        self.files = []
+        self.bytes_written = 0
+
+    def _write(self, columns, rows):
+        path = os.path.join(self.directory, f"{self._file_stem}-{next(self._sequence):05d}{EXTENSIONS[self.format]}")
+        tmp_path = path + ".tmp"
+        try:
+            WRITERS[self.format](tmp_path, columns)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.files.append(path)
+        self.bytes_written += os.path.getsize(path)
+
+    def load_index(self, category_name=None):
+        """Индекс артикулов из уже записанных файлов каталога (повторный офлайн-обход не дублирует товары)."""
+        started = time.monotonic()
+        prefix = category_name if settings.DEDUP_SCOPE == "category" else None
+        paths = sorted(path for path in glob.glob(os.path.join(self.directory, f"{self.prefix}-*"))
+                       if path.endswith(tuple(EXTENSIONS.values())))
+        ids = []
+        for path in paths:
+            ids.extend(to_article_id(article) for article, category_raw in _read_articles(path)
+                       if prefix is None or category_raw.startswith(prefix))
+        index = ArticleIndex(filter(None, ids))
+        log.info("article_index_loaded", f"🧠 Индекс артикулов из {len(paths)} файлов: {len(index)} шт. "
+                                         f"за {time.monotonic() - started:.1f} с",
+                 files=len(paths), articles=len(index), seconds=round(time.monotonic() - started, 3))
+        return index
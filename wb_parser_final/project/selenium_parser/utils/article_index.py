@@ -0,0 +1,110 @@
+# selenium_parser/utils/article_index.py
+import heapq
+import sys
+import time
+from array import array
+from bisect import bisect_left
+
+from selenium_parser import settings
+from selenium_parser.utils.log import get_logger
+
+MERGE_THRESHOLD = 65536  # сколько новых артикулов копить в множестве перед слиянием в массив
+
+log = get_logger("dedup")
+
+
+def to_article_id(article):
+    """Преобразует артикул (строку или число) в целое. Возвращает None для пустых и некорректных значений."""
+    if isinstance(article, int):
+        return article if article > 0 else None
+    if not article or not str(article).isdigit():
+        return None
+    return int(article)
+
+
+class ArticleIndex:
+    """
+    Компактный индекс уже известных артикулов для дедупликации.
+    Основная часть хранится в отсортированном array('Q') (8 байт на артикул, поиск за O(log n)),
+    свежие добавления копятся в небольшом множестве (O(1)) и периодически вливаются в массив.
+    """
+
+    def __init__(self, articles=None, merge_threshold=MERGE_THRESHOLD):
+        self._base = array('Q', sorted(set(articles))) if articles else array('Q')
+        self._pending = set()
+        self.merge_threshold = merge_threshold
+
+    @classmethod
+    def load_from_clickhouse(cls, ch_client, table='wildberries_products_parsed', category_prefix=None):
+        """
+        Загружает все артикулы таблицы одним потоковым запросом.
+        Если указан category_prefix, загружаются только товары этой категории (по началу category_raw).
+        """
+        started = time.monotonic()
+        query = (f"SELECT DISTINCT toUInt64OrZero(article) AS a FROM {table} "
+                 "WHERE a > 0")
+        parameters = {}
+        if category_prefix:
+            query += " AND startsWith(category_raw, %(prefix)s)"
+            parameters['prefix'] = category_prefix
+        query += " ORDER BY a"
+
+        index = cls()
+        with ch_client.query_column_block_stream(query, parameters=parameters) as stream:
+            for block in stream:
+                index._base.extend(block[0])
+
+        elapsed = time.monotonic() - started
+        log.info("article_index_loaded",
+                 f"🧠 Индекс артикулов: {len(index)} шт. за {elapsed:.1f} с, "
+                 f"{index.memory_bytes() / 1024 / 1024:.1f} МБ "
+                 f"(~{index.bytes_per_million() / 1024 / 1024:.1f} МБ на 1 млн)",
+                 articles=len(index), seconds=round(elapsed, 3), memory_bytes=index.memory_bytes())
+        return index
+
+    def __len__(self):
+        return len(self._base) + len(self._pending)
+
+    def __contains__(self, article):
+        article_id = to_article_id(article)
+        if article_id is None:
+            return False
+        return article_id in self._pending or self._in_base(article_id)
+
+    def _in_base(self, article_id):
+        base = self._base
+        i = bisect_left(base, article_id)
+        return i < len(base) and base[i] == article_id
+
+    def add(self, article):
+        """Добавляет артикул. Возвращает True, если артикул новый."""
+        article_id = to_article_id(article)
+        if article_id is None or article_id in self._pending or self._in_base(article_id):
+            return False
+        self._pending.add(article_id)
+        if len(self._pending) >= self.merge_threshold:
+            self._merge()
+        return True
+
+    def _merge(self):
+        # Слияние двух отсортированных последовательностей за O(n), без повторной сортировки массива
+        self._base = array('Q', heapq.merge(self._base, sorted(self._pending)))
+        self._pending.clear()
+
+    def memory_bytes(self):
+        """Фактический объем памяти индекса в байтах."""
+        base_bytes = sys.getsizeof(self._base)
+        pending_bytes = sys.getsizeof(self._pending) + sum(sys.getsizeof(a) for a in self._pending)
+        return base_bytes + pending_bytes
+
+    def bytes_per_million(self):
+        """Объем памяти в пересчете на миллион артикулов."""
+        if not len(self):
+            return self._base.itemsize * 1_000_000
+        return self.memory_bytes() / len(self) * 1_000_000
+
+
+def load_article_index(ch_client, category_name=None):
+    """Загружает индекс с учетом settings.DEDUP_SCOPE ('all' — вся таблица, 'category' — только категория)."""
+    prefix = category_name if settings.DEDUP_SCOPE == "category" else None
+    return ArticleIndex.load_from_clickhouse(ch_client, category_prefix=prefix)
@@ -0,0 +1,292 @@
+# selenium_parser/utils/browser_pool.py
+import atexit
+import queue
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from selenium_parser import settings
+from selenium_parser.utils.log import get_logger
+
+try:
+    import psutil
+except ImportError:  # psutil нужен только для отчета о памяти
+    psutil = None
+
+log = get_logger("browser")
+
+# Ресурсы, которые не нужны для сбора ссылок: шрифты, медиа и картинки
+BLOCKED_URL_PATTERNS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico",
+]
+
+
+def create_driver(headless=None, block_resources=None):
+    """Запускает Chrome с настройками проекта: headless и без загрузки картинок, шрифтов и медиа."""
+    headless = settings.BROWSER_HEADLESS if headless is None else headless
+    block_resources = settings.BROWSER_BLOCK_RESOURCES if block_resources is None else block_resources
+
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    if block_resources:
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
+
+    if settings.CHROMEDRIVER_PATH:
+        from selenium.webdriver.chrome.service import Service
+        driver = webdriver.Chrome(service=Service(settings.CHROMEDRIVER_PATH), options=chrome_options)
+    else:
+        driver = webdriver.Chrome(options=chrome_options)
+    driver.implicitly_wait(settings.BROWSER_IMPLICIT_WAIT)
+
+    if block_resources:
+        # Шрифты и медиа блокируются на уровне сети через DevTools
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
+
+
+def process_tree_rss(pid):
+    """Суммарная резидентная память процесса chromedriver и всех его потомков (Chrome) в байтах."""
+    if psutil is None or pid is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+class BrowserSession:
+    """Запущенный браузер из пула и его счетчики."""
+
+    def __init__(self, driver, startup_seconds):
+        self.driver = driver
+        self.startup_seconds = startup_seconds
+        self.created_at = time.time()
+        self.pages = 0
+
+    @property
+    def pid(self):
+        service = getattr(self.driver, "service", None)
+        process = getattr(service, "process", None)
+        return getattr(process, "pid", None)
+
+    def rss_bytes(self):
+        return process_tree_rss(self.pid)
+
+    def is_alive(self):
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            log.warning("browser_quit_failed", f"⚠️ Ошибка при закрытии браузера: {e}", error=str(e))
+
+
+class BrowserPool:
+    """
+    Пул переиспользуемых браузеров.
+
+    Браузеры запускаются по требованию, но не больше size одновременно. Перед выдачей браузер
+    проверяется (health check), а после max_pages загруженных страниц перезапускается,
+    чтобы ограничить рост памяти Chrome.
+    """
+
+    def __init__(self, size=None, max_pages=None, driver_factory=None):
+        self.size = size or settings.BROWSER_POOL_SIZE
+        self.max_pages = max_pages or settings.BROWSER_MAX_PAGES_PER_SESSION
+        self.driver_factory = driver_factory or create_driver
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        # Места для acquire_many() занимаются по очереди, чтобы два обхода не делили пул по частям
+        self._reserve_lock = threading.Lock()
+        self._sessions = set()
+        self._closed = False
+        self.started = 0
+        self.recycled = 0
+        atexit.register(self.close)
+
+    def _start_session(self):
+        started = time.monotonic()
+        driver = self.driver_factory()
+        session = BrowserSession(driver, time.monotonic() - started)
+        with self._lock:
+            self._sessions.add(session)
+            self.started += 1
+        rss = session.rss_bytes()
+        rss_text = f", RSS {rss / 1024 / 1024:.0f} МБ" if rss is not None else ""
+        log.info("browser_started", f"🌐 Браузер запущен за {session.startup_seconds:.1f} с{rss_text}",
+                 seconds=round(session.startup_seconds, 3), rss_bytes=rss)
+        return session
+
+    def _discard(self, session):
+        with self._lock:
+            self._sessions.discard(session)
+        session.quit()
+
+    def acquire(self, timeout=None):
+        """Выдает исправный браузер; ждет не дольше timeout секунд, если все браузеры заняты."""
+        if self._closed:
+            raise RuntimeError("Пул браузеров закрыт")
+        timeout = settings.BROWSER_POOL_ACQUIRE_TIMEOUT if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise RuntimeError(f"Нет свободного браузера в пуле (размер {self.size}) за {timeout} с")
+        try:
+            return self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def acquire_many(self, count, minimum=1, timeout=None):
+        """
+        Выдает от minimum до count браузеров: minimum мест ждет не дольше timeout секунд, остальные
+        берет, только если они свободны сейчас. Места занимаются под общей блокировкой, поэтому два обхода
+        не делят пул по частям, а обход рядом с другим заданием начинает с тем, что свободно, а не ждет весь пул.
+        """
+        if self._closed:
+            raise RuntimeError("Пул браузеров закрыт")
+        count = min(count, self.size)
+        minimum = min(minimum, count)
+        timeout = settings.BROWSER_POOL_ACQUIRE_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        taken = 0
+        if not self._reserve_lock.acquire(timeout=timeout):
+            raise RuntimeError(f"Нет свободного браузера в пуле (размер {self.size}) за {timeout} с")
+        try:
+            while taken < minimum:
+                if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    raise RuntimeError(f"Нет свободного браузера в пуле (размер {self.size}) за {timeout} с")
+                taken += 1
+            while taken < count and self._slots.acquire(blocking=False):
+                taken += 1
+        except BaseException:
+            for _ in range(taken):
+                self._slots.release()
+            raise
+        finally:
+            self._reserve_lock.release()
+        sessions = []
+        try:
+            for _ in range(taken):
+                sessions.append(self._checkout())
+        except BaseException:
+            for session in sessions:
+                self.release(session)
+            for _ in range(taken - len(sessions)):
+                self._slots.release()
+            raise
+        return sessions
+
+    def _checkout(self):
+        """Исправный браузер для уже занятого места в пуле: из простаивающих или новый."""
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return self._start_session()
+            if session.is_alive():
+                return session
+            log.warning("browser_dead", "⚠️ Браузер не отвечает, перезапускаем.")
+            self._discard(session)
+
+    def release(self, session):
+        """Возвращает браузер в пул; изношенный браузер закрывается."""
+        if self._closed or session.pages >= self.max_pages:
+            if not self._closed:
+                self.recycled += 1
+            self._discard(session)
+        else:
+            self._idle.put(session)
+        self._slots.release()
+
+    def recycle(self, session):
+        """Перезапускает изношенный браузер, не освобождая место в пуле."""
+        self.recycled += 1
+        self._discard(session)
+        return self._start_session()
+
+    def borrow(self):
+        """Контекстный менеджер: with pool.borrow() as session: ..."""
+        pool = self
+
+        class _Borrowed:
+            def __enter__(self):
+                self.session = pool.acquire()
+                return self.session
+
+            def __exit__(self, exc_type, exc, tb):
+                pool.release(self.session)
+                return False
+
+        return _Borrowed()
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions)
+        report = []
+        for session in sessions:
+            rss = session.rss_bytes()
+            report.append({
+                "pid": session.pid,
+                "startup_seconds": round(session.startup_seconds, 3),
+                "pages": session.pages,
+                "rss_mb": round(rss / 1024 / 1024, 1) if rss is not None else None,
+            })
+        return {
+            "size": self.size,
+            "max_pages": self.max_pages,
+            "running": len(sessions),
+            "idle": self._idle.qsize(),
+            "started": self.started,
+            "recycled": self.recycled,
+            "sessions": report,
+        }
+
+    def close(self):
+        """Закрывает все браузеры пула."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        for session in sessions:
+            session.quit()
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Общий пул браузеров процесса (создается при первом обращении)."""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None or _browser_pool._closed:
+            _browser_pool = BrowserPool()
+        return _browser_pool
@@ -0,0 +1,163 @@
+# selenium_parser/utils/checkpoint.py
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from selenium_parser import settings
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.probe_cache import category_key
+
+log = get_logger("checkpoint")
+
+
+def checkpoint_path(start_url, directory=None):
+    """Путь к файлу контрольной точки категории."""
+    key = category_key(start_url)
+    slug = re.sub(r'[^\w.-]+', '_', key)[:80]
+    digest = hashlib.sha1(key.encode()).hexdigest()[:8]
+    return os.path.join(directory or settings.CHECKPOINT_DIR, f"{slug}-{digest}.json")
+
+
+def atomic_write_json(path, data):
+    """Записывает JSON во временный файл рядом и атомарно подменяет им целевой файл."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CrawlCheckpoint:
+    """
+    Контрольная точка обхода категории.
+
+    Хранит запланированные диапазоны (lower, upper, count), завершенные страницы каждого диапазона
+    (ключ — URL диапазона), какие из них были заполнены целиком (за такой страницей может быть следующая)
+    и число строк, подтвержденных последним сбросом буфера записи.
+    Страница считается завершенной только после того, как ее товары записаны в хранилище:
+    mark_page() откладывает страницу, commit() (вызывается после сброса буфера) фиксирует отложенные
+    и атомарно сохраняет файл.
+    """
+
+    def __init__(self, start_url, path=None):
+        self.start_url = start_url
+        self.path = path or checkpoint_path(start_url)
+        self.ranges = []
+        self.completed_pages = {}
+        self.full_pages = {}
+        self.completed_ranges = set()
+        self.flushed_rows = 0
+        self.last_flush_at = None
+        self._pending_pages = []
+        self._pending_ranges = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Загружает сохраненное состояние. Возвращает False, если контрольной точки нет."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning("checkpoint_unreadable", f"⚠️ Не удалось прочитать контрольную точку {self.path}: {e}",
+                        path=self.path, error=str(e))
+            return False
+        if data.get("start_url") != self.start_url:
+            log.warning("checkpoint_mismatch",
+                        f"⚠️ Контрольная точка {self.path} относится к другому URL, начинаем заново.", path=self.path)
+            return False
+        self.ranges = [tuple(r) for r in data.get("ranges", [])]
+        self.completed_pages = {url: set(pages) for url, pages in data.get("completed_pages", {}).items()}
+        self.full_pages = {url: set(pages) for url, pages in data.get("full_pages", {}).items()}
+        self.completed_ranges = set(data.get("completed_ranges", []))
+        self.flushed_rows = data.get("flushed_rows", 0)
+        self.last_flush_at = data.get("last_flush_at")
+        return True
+
+    def save(self):
+        with self._lock:
+            data = {
+                "start_url": self.start_url,
+                "ranges": [list(r) for r in self.ranges],
+                "completed_pages": {url: sorted(pages) for url, pages in self.completed_pages.items()},
+                "full_pages": {url: sorted(pages) for url, pages in self.full_pages.items()},
+                "completed_ranges": sorted(self.completed_ranges),
+                "flushed_rows": self.flushed_rows,
+                "last_flush_at": self.last_flush_at,
+                "updated_at": time.time(),
+            }
+        atomic_write_json(self.path, data)
+
+    def set_ranges(self, ranges):
+        with self._lock:
+            self.ranges = [tuple(r) for r in ranges]
+        self.save()
+
+    def add_range(self, lower, upper, count):
+        with self._lock:
+            self.ranges.append((lower, upper, count))
+        self.save()
+
+    def is_page_done(self, range_url, page_number):
+        with self._lock:
+            return page_number in self.completed_pages.get(range_url, ())
+
+    def is_page_full(self, range_url, page_number):
+        """Была ли завершенная страница заполнена целиком."""
+        with self._lock:
+            return page_number in self.full_pages.get(range_url, ())
+
+    def is_range_done(self, range_url):
+        with self._lock:
+            return range_url in self.completed_ranges
+
+    def next_page(self, range_url):
+        """Первая страница диапазона, которую еще нужно загрузить (завершенные страницы идут подряд с первой)."""
+        with self._lock:
+            done = self.completed_pages.get(range_url, set())
+        page_number = 1
+        while page_number in done:
+            page_number += 1
+        return page_number
+
+    def mark_page(self, range_url, page_number, full=False):
+        with self._lock:
+            self._pending_pages.append((range_url, page_number, full))
+
+    def mark_range(self, range_url):
+        with self._lock:
+            self._pending_ranges.append(range_url)
+
+    def commit(self, flushed_rows=0):
+        """Фиксирует отложенные страницы и диапазоны после записи их товаров и сохраняет файл."""
+        with self._lock:
+            for range_url, page_number, full in self._pending_pages:
+                self.completed_pages.setdefault(range_url, set()).add(page_number)
+                if full:
+                    self.full_pages.setdefault(range_url, set()).add(page_number)
+            self.completed_ranges.update(self._pending_ranges)
+            self._pending_pages.clear()
+            self._pending_ranges.clear()
+            if flushed_rows:
+                self.flushed_rows += flushed_rows
+                self.last_flush_at = time.time()
+        self.save()
+
+    def finish(self):
+        """Удаляет контрольную точку после успешного завершения обхода."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
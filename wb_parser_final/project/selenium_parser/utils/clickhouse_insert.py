@@ -1,12 +1,35 @@
-from clickhouse_connect import get_client
+import threading
+from functools import lru_cache
+
+from selenium_parser import settings
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import INSERT_ERRORS, INSERT_ROWS, INSERT_SECONDS
+from selenium_parser.utils.product_record import ProductRecord
+
+log = get_logger("clickhouse")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_clickhouse_client():
+    """
+    Общий клиент ClickHouse по настройкам CLICKHOUSE_*. Подключение создается при первом обращении,
+    поэтому импорт парсера и работа с файловым приемником не требуют ни сервера, ни clickhouse_connect.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from clickhouse_connect import get_client
+            _client = get_client(
+                host=settings.CLICKHOUSE_HOST,
+                port=settings.CLICKHOUSE_PORT,
+                username=settings.CLICKHOUSE_USERNAME,
+                password=settings.CLICKHOUSE_PASSWORD,
+                database=settings.CLICKHOUSE_DATABASE
+            )
+        return _client
 
-client = get_client(
-    host='',        # 🔁 Замените, если не localhost
-    port=0000,
-    username='',      # 🔁 Ваше имя пользователя
-    password='',             # 🔁 Ваш пароль
-    database=''
-)
 
 def parse_category_levels(category_raw: str):
     parts = category_raw.split('_')
@@ -22,30 +45,26 @@ def parse_category_levels(category_raw: str):
 
     return category, levels
 
-def insert_product_if_new(data: dict):
-    # Получаем данные с запасными значениями
-    article = data.get("article", "")
-    product_url = data.get("link", "")
-    category_raw = data.get("category", "")
+TABLE_NAME = 'wildberries_products_parsed'
+COLUMN_NAMES = ['article', 'product_url', 'category_raw', 'category', 'category_l1', 'category_l2', 'category_l3', 'category_l4']
 
-    # Пропускаем, только если нет артикула (основной идентификатор)
-    if not article:
-        print("⚠️ Пропущено: нет артикула", data)
-        return
+@lru_cache(maxsize=1024)
+def _category_columns(category_raw):
+    """Столбцы категории (category, L1–L4); у всех товаров страницы она одна, поэтому разбор кэшируется."""
+    category, levels = parse_category_levels(category_raw)
+    return (category or "", *(level or "" for level in levels))
 
-    try:
-        result = client.query(
-            "SELECT count() FROM wildberries_products_parsed WHERE article = %(article)s",
-            parameters={'article': article}
-        )
-        existing = result.result_rows[0][0] if result.result_rows else 0
 
-        if existing > 0:
-            print(f"⏭ Уже существует: {article}")
-            return
-    except Exception as check_e:
-        print(f"⚠️ Ошибка при проверке существования {article}: {check_e}")
-        # Продолжаем вставку, если не удалось проверить
+def build_row(data: dict):
+    """Преобразует товар (ProductRecord или словарь) в кортеж под структуру таблицы (8 столбцов)."""
+    if isinstance(data, ProductRecord):
+        category_raw = data.category or ""
+        category_columns = _category_columns(category_raw) if category_raw else ("",) * 5
+        return (data.article or "", data.link or "", category_raw, *category_columns)
+
+    article = data.get("article", "")
+    product_url = data.get("link", "")
+    category_raw = data.get("category", "")
 
     # Обрабатываем категорию (даже если она пустая)
     if category_raw:
@@ -57,8 +76,7 @@ def insert_product_if_new(data: dict):
         category_l3 = ""
         category_l4 = ""
 
-    # Сопоставляем с фактической структурой таблицы (8 столбцов)
-    insert_data = (
+    return (
         article or "",           # article
         product_url or "",      # product_url
         category_raw or "",     # category_raw
@@ -69,15 +87,44 @@ def insert_product_if_new(data: dict):
         category_l4 or ""       # category_l4
     )
 
+
+def insert_product_if_new(data: dict):
+    # Получаем данные с запасными значениями
+    article = data.get("article", "")
+
+    # Пропускаем, только если нет артикула (основной идентификатор)
+    if not article:
+        log.warning("no_article", f"⚠️ Пропущено: нет артикула {data}", product=data)
+        return
+
     try:
-        result = client.insert(
-            table='wildberries_products_parsed',
-            data=[insert_data],
-            column_names=['article', 'product_url', 'category_raw', 'category', 'category_l1', 'category_l2', 'category_l3', 'category_l4']
+        result = get_clickhouse_client().query(
+            "SELECT count() FROM wildberries_products_parsed WHERE article = %(article)s",
+            parameters={'article': article}
         )
-        print(f"✅ Добавлено: {article}")
+        existing = result.result_rows[0][0] if result.result_rows else 0
+
+        if existing > 0:
+            log.info("duplicate", f"⏭ Уже существует: {article}", article=article)
+            return
+    except Exception as check_e:
+        log.warning("exists_check_failed", f"⚠️ Ошибка при проверке существования {article}: {check_e}",
+                    article=article, error=str(check_e))
+        # Продолжаем вставку, если не удалось проверить
+
+    insert_data = build_row(data)
+
+    try:
+        with INSERT_SECONDS.time(sink="clickhouse"):
+            result = get_clickhouse_client().insert(
+                table=TABLE_NAME,
+                data=[insert_data],
+                column_names=COLUMN_NAMES
+            )
+        INSERT_ROWS.observe(1, sink="clickhouse")
+        log.info("inserted", f"✅ Добавлено: {article}", article=article)
     except Exception as e:
         error_msg = str(e) if str(e) != '0' else 'Неизвестная ошибка ClickHouse'
-        print(f"❌ Ошибка при вставке товара {article}: {error_msg}")
-        print(f"🧾 Тип ошибки: {type(e).__name__}")
-        print(f"🧾 Данные: {insert_data}")
+        INSERT_ERRORS.inc(sink="clickhouse")
+        log.error("insert_failed", f"❌ Ошибка при вставке товара {article}: {error_msg} ({type(e).__name__})",
+                  article=article, error=error_msg, error_type=type(e).__name__, row=insert_data)
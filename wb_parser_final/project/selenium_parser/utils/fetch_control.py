@@ -0,0 +1,284 @@
+# selenium_parser/utils/fetch_control.py
+import random
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from selenium_parser import settings
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import CIRCUIT_OPENS, FETCH_CONCURRENCY, FETCH_RATE, FETCH_RETRIES, THROTTLED
+from selenium_parser.utils.progress import CrawlCancelled
+from selenium_parser.utils.rate_limit import TokenBucket
+
+log = get_logger("fetch")
+
+# Ответы, которыми сайт просит снизить частоту запросов
+THROTTLE_STATUSES = (429, 503)
+# Страница антибота вместо каталога: капча или проверка «подозрительной активности»
+CAPTCHA_RE = re.compile(r'captcha|капч|подозрительн\w* активност|почти готово', re.IGNORECASE)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class Throttled(Exception):
+    """Сайт ограничил запросы (429/503 или капча). retry_after — пауза из заголовка Retry-After, секунд."""
+
+    def __init__(self, reason, retry_after=None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class FetchFailed(Exception):
+    """Запрос не удался и после всех повторов."""
+
+
+def parse_retry_after(value):
+    """Значение заголовка Retry-After в секундах (поддерживается числовая форма) или None."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_captcha_page(html):
+    """Страница антибота: признаки капчи и ни одной карточки товара."""
+    return "product-card" not in html and CAPTCHA_RE.search(html) is not None
+
+
+class FetchControl:
+    """
+    Управление запросами к одному хосту, общее для проб планировщика и загрузки страниц.
+
+    - Частота: «ведро токенов» с адаптивной скоростью (AIMD). Пока ограничений не было, скорость
+      удваивается примерно раз в секунду (медленный старт), затем растет на rate_increase запросов/с
+      за «раунд»; когда доля ограничений (429/503, капча) среди последних throttle_window ответов
+      превышает throttle_tolerance, ограничения идут подряд или сайт прислал Retry-After, —
+      умножается на decrease_factor.
+      Одиночные случайные 429 только повторяются. Так частота держится у максимума, при котором
+      сайт еще не ограничивает, но не выше max_rate.
+    - Параллельность: предел одновременных запросов меняется по тому же правилу (не выше max_concurrency).
+    - Повторы: ограничения и ошибки из retryable повторяются до retries раз с экспоненциальной
+      задержкой и случайным разбросом (full jitter), с учетом Retry-After.
+    - Предохранитель: после circuit_threshold ограничений подряд или Retry-After хост ставится на паузу;
+      затем проходит один пробный запрос — успех снимает паузу, новое ограничение удваивает ее.
+
+    Снижение происходит не чаще одного раза на «волну»: ограничения запросов, отправленных до последнего
+    снижения, не повторяют его и не приближают паузу хоста.
+    """
+
+    def __init__(self, host="", max_rate=None, initial_rate=None, min_rate=None, max_concurrency=None,
+                 initial_concurrency=None, adaptive=True, retries=None, backoff_base=None, backoff_max=None,
+                 circuit_threshold=None, circuit_cooldown=None, circuit_max_cooldown=None):
+        self.host = host
+        self.max_rate = float(max_rate or settings.CRAWL_RATE_LIMIT)
+        self.min_rate = min(self.max_rate, min_rate or settings.FETCH_MIN_RATE)
+        rate = min(self.max_rate, initial_rate or settings.FETCH_INITIAL_RATE)
+        self.rate_increase = settings.FETCH_RATE_INCREASE
+        self.decrease_factor = settings.FETCH_DECREASE_FACTOR
+        self.throttle_tolerance = settings.FETCH_THROTTLE_TOLERANCE
+        self.max_concurrency = max_concurrency or settings.FETCH_MAX_CONCURRENCY
+        self.limit = float(min(self.max_concurrency, initial_concurrency or settings.FETCH_INITIAL_CONCURRENCY))
+        self.adaptive = adaptive
+        self.retries = retries if retries is not None else settings.FETCH_RETRIES
+        self.backoff_base = backoff_base or settings.FETCH_BACKOFF_BASE
+        self.backoff_max = backoff_max or settings.FETCH_BACKOFF_MAX
+        self.circuit_threshold = circuit_threshold or settings.FETCH_CIRCUIT_THRESHOLD
+        self.circuit_base_cooldown = circuit_cooldown or settings.FETCH_CIRCUIT_COOLDOWN
+        self.circuit_max_cooldown = circuit_max_cooldown or settings.FETCH_CIRCUIT_MAX_COOLDOWN
+
+        self.bucket = TokenBucket(rate)
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._slow_start = True
+        self._last_decrease = 0.0
+        self._outcomes = deque(maxlen=settings.FETCH_THROTTLE_WINDOW)  # True — ответ с ограничением
+        self._sent = deque(maxlen=settings.FETCH_THROTTLE_WINDOW)  # время отправки последних запросов
+        self._consecutive_throttles = 0
+        self._state = CLOSED
+        self._open_until = 0.0
+        self._cooldown = self.circuit_base_cooldown
+        self._probe_in_flight = False
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "retries": 0, "circuit_opens": 0}
+        self._publish()
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _publish(self):
+        FETCH_RATE.set(self.bucket.rate, host=self.host)
+        FETCH_CONCURRENCY.set(int(self.limit), host=self.host)
+
+    def backoff(self, attempt):
+        """Задержка перед повтором номер attempt (с нуля): случайная в [0, base * 2^attempt], не больше backoff_max."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _sleep(seconds, cancel_event):
+        if cancel_event is None:
+            time.sleep(seconds)
+        elif cancel_event.wait(seconds):
+            raise CrawlCancelled()
+
+    def _enter(self, cancel_event):
+        """Ждет окончания паузы хоста и свободного места. Возвращает True для пробного запроса после паузы."""
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CrawlCancelled()
+            with self._lock:
+                delay = 0.0
+                if self._state == OPEN:
+                    delay = self._open_until - time.monotonic()
+                    if delay <= 0:
+                        self._state, self._probe_in_flight = HALF_OPEN, False
+                if self._state == HALF_OPEN:
+                    # Пока идет пробный запрос, остальные ждут его результата
+                    delay = 0.0 if not self._probe_in_flight else 0.1
+                if delay <= 0:
+                    if self._in_flight < int(self.limit):
+                        probe = self._state == HALF_OPEN
+                        self._probe_in_flight = self._probe_in_flight or probe
+                        self._in_flight += 1
+                        return probe
+                    self._slots.wait(0.5)
+                    continue
+            self._sleep(min(delay, 1.0), cancel_event)
+
+    def _leave(self, probe):
+        with self._lock:
+            self._in_flight -= 1
+            if probe and self._state == HALF_OPEN:
+                # Пробный запрос завершился ошибкой, не связанной с ограничением: пробуем еще раз
+                self._probe_in_flight = False
+            self._slots.notify()
+
+    def _send_rate(self):
+        """Фактическая частота последних запросов (может быть ниже разрешенной, если обход не успевает)."""
+        if len(self._sent) < 2 or self._sent[-1] <= self._sent[0]:
+            return None
+        return (len(self._sent) - 1) / (self._sent[-1] - self._sent[0])
+
+    def _on_success(self):
+        with self._lock:
+            self._consecutive_throttles = 0
+            self._outcomes.append(False)
+            # Снимает паузу только пробный запрос; запросы, отправленные до паузы, ее не отменяют
+            if self._state == HALF_OPEN:
+                self._state, self._cooldown = CLOSED, self.circuit_base_cooldown
+                log.info("circuit_closed", f"🟢 {self.host}: пауза снята, частота {self.bucket.rate:.1f} запр/с",
+                         host=self.host, rate=self.bucket.rate)
+            if not self.adaptive:
+                return
+            rate, limit = self.bucket.rate, self.limit
+            if self._slow_start:
+                rate, limit = rate + 1.0, limit + 1.0
+            else:
+                # Аддитивный рост: +rate_increase запросов/с и +1 к пределу примерно за раунд запросов
+                rate, limit = rate + self.rate_increase / rate, limit + 1.0 / limit
+            # Разрешенная частота не уходит далеко вперед фактической: иначе снижение после ограничения
+            # началось бы с недостигнутого значения и заняло бы несколько «волн»
+            sent = self._send_rate()
+            if sent is not None:
+                rate = min(rate, max(self.bucket.rate, 2 * sent))
+            rate, limit = min(self.max_rate, rate), min(self.max_concurrency, limit)
+            grew = int(limit) > int(self.limit)
+            self.bucket.set_rate(rate)
+            self.limit = limit
+            if grew:
+                self._slots.notify_all()
+        self._publish()
+
+    def _on_throttle(self, started, error):
+        now = time.monotonic()
+        with self._lock:
+            self.stats["throttled"] += 1
+            current = started >= self._last_decrease
+            if current:
+                # Ограничения запросов, отправленных до последнего снижения, им уже учтены
+                self._consecutive_throttles += 1
+                self._outcomes.append(True)
+            limited = (error.retry_after is not None or self._consecutive_throttles >= self.circuit_threshold
+                       or sum(self._outcomes) > self.throttle_tolerance * self._outcomes.maxlen)
+            if self.adaptive and limited and current:
+                self._slow_start = False
+                self._last_decrease = now
+                self._outcomes.clear()
+                sent = self._send_rate()
+                rate = min(self.bucket.rate, sent) if sent is not None else self.bucket.rate
+                rate = max(self.min_rate, rate * self.decrease_factor)
+                self.limit = max(1.0, self.limit * self.decrease_factor)
+                self.bucket.set_rate(rate)
+                log.info("rate_decreased", f"🐢 {self.host}: ограничение ({error}), частота {rate:.1f} запр/с, "
+                                           f"параллельно {int(self.limit)}",
+                         host=self.host, reason=str(error), rate=rate, concurrency=int(self.limit))
+            if (self._state == HALF_OPEN or self._consecutive_throttles >= self.circuit_threshold
+                    or error.retry_after):
+                cooldown = max(self._cooldown, error.retry_after or 0)
+                if self._state == HALF_OPEN:
+                    self._cooldown = min(self.circuit_max_cooldown, self._cooldown * 2)
+                    cooldown = max(cooldown, self._cooldown)
+                if self._state != OPEN or now + cooldown > self._open_until:
+                    self._state, self._open_until = OPEN, now + cooldown
+                    self.stats["circuit_opens"] += 1
+                    CIRCUIT_OPENS.inc(host=self.host)
+                    log.warning("circuit_open", f"🔴 {self.host}: запросы приостановлены на {cooldown:.0f} с ({error})",
+                                host=self.host, seconds=round(cooldown, 1), reason=str(error))
+        THROTTLED.inc(host=self.host)
+        self._publish()
+
+    def call(self, func, *args, retryable=(), cancel_event=None):
+        """
+        Выполняет запрос func(*args) под контролем частоты, параллельности и предохранителя.
+        Throttled и ошибки из retryable повторяются; после retries повторов выбрасывается FetchFailed.
+        """
+        error = None
+        for attempt in range(self.retries + 1):
+            probe = self._enter(cancel_event)
+            # Запрос относится к «волне», в которой занял очередь за токеном, а не в которой отправлен
+            started = time.monotonic()
+            try:
+                self.bucket.acquire()
+                with self._lock:
+                    self.stats["requests"] += 1
+                    self._sent.append(time.monotonic())
+                result = func(*args)
+            except Throttled as e:
+                error, reason = e, "throttled"
+                self._on_throttle(started, e)
+                delay = max(e.retry_after or 0.0, self.backoff(attempt))
+            except retryable as e:
+                error, reason = e, "error"
+                with self._lock:
+                    self.stats["errors"] += 1
+                delay = self.backoff(attempt)
+            else:
+                self._on_success()
+                return result
+            finally:
+                self._leave(probe)
+            if attempt == self.retries:
+                break
+            with self._lock:
+                self.stats["retries"] += 1
+            FETCH_RETRIES.inc(reason=reason)
+            log.info("fetch_retry", f"🔁 {self.host}: повтор {attempt + 1}/{self.retries} через {delay:.1f} с: "
+                                    f"{error}", host=self.host, attempt=attempt + 1, reason=reason, error=str(error))
+            self._sleep(delay, cancel_event)
+        raise FetchFailed(f"{self.host}: запрос не удался после {self.retries + 1} попыток: {error}") from error
+
+
+_controls = {}
+_controls_lock = threading.Lock()
+
+
+def get_fetch_control(url):
+    """Общий FetchControl хоста URL: планировщик, воркеры и задания одного процесса делят его ограничения."""
+    host = urlparse(url).netloc or url
+    with _controls_lock:
+        control = _controls.get(host)
+        if control is None:
+            control = _controls[host] = FetchControl(host)
+        return control
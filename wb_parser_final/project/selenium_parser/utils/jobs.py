@@ -0,0 +1,273 @@
+# selenium_parser/utils/jobs.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium_parser import settings
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.progress import CrawlProgress
+
+log = get_logger("jobs")
+
+# Состояния задания
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+INCOMPLETE = "incomplete"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobQueueFull(Exception):
+    """Очередь заданий заполнена: новое задание не принято."""
+
+
+class JobStore:
+    """Хранилище заданий в SQLite: параметры, состояние и последний снимок прогресса."""
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, url TEXT NOT NULL, params TEXT NOT NULL, status TEXT NOT NULL,"
+            " progress TEXT, error TEXT, created REAL NOT NULL, started REAL, finished REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_job(row):
+        job_id, url, params, status, progress, error, created, started, finished = row
+        return {
+            "id": job_id,
+            "url": url,
+            "params": json.loads(params),
+            "status": status,
+            "progress": json.loads(progress) if progress else None,
+            "error": error,
+            "created": created,
+            "started": started,
+            "finished": finished,
+        }
+
+    def insert(self, job_id, url, params):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, url, params, status, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, url, json.dumps(params), QUEUED, time.time())
+            )
+            self._conn.commit()
+
+    def update(self, job_id, **fields):
+        if "params" in fields:
+            fields["params"] = json.dumps(fields["params"])
+        if "progress" in fields:
+            fields["progress"] = json.dumps(fields["progress"])
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, statuses=None, limit=100):
+        query = "SELECT * FROM jobs"
+        args = ()
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' for _ in statuses)})"
+            args = tuple(statuses)
+        query += " ORDER BY created DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*args, limit)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _RunningJob:
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.shutdown = False
+        self.progress = None
+        self.saved_at = 0.0
+
+
+class JobManager:
+    """
+    Фоновое выполнение заданий парсинга.
+
+    Одновременно выполняется не больше max_workers заданий, ожидать в очереди может не больше
+    queue_size; сверх этого submit() отклоняет задание (JobQueueFull). Состояние заданий
+    хранится в SQLite: после перезапуска API задания, не успевшие завершиться, снова ставятся
+    в очередь и продолжаются с контрольной точки (resume). runner — функция запуска обхода
+    с сигнатурой run_price_range_parser.
+    """
+
+    def __init__(self, path=None, max_workers=None, queue_size=None, runner=None):
+        self.store = JobStore(path or settings.JOBS_DB_PATH)
+        self.max_workers = max_workers or settings.JOBS_MAX_CONCURRENT
+        self.queue_size = queue_size if queue_size is not None else settings.JOBS_QUEUE_SIZE
+        if runner is None:
+            from selenium_parser.parsers.wildberries_price_range_parser import run_price_range_parser
+            runner = run_price_range_parser
+        self.runner = runner
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._running = {}
+        self._closed = False
+        self._recover()
+
+    def _recover(self):
+        # Задания, прерванные остановкой сервера, продолжаются с контрольной точки
+        for job in reversed(self.store.list(ACTIVE_STATES, limit=-1)):
+            params = dict(job["params"], resume=job["params"].get("resume") or job["status"] == RUNNING)
+            self.store.update(job["id"], status=QUEUED, params=params)
+            log.info("job_recovered", f"♻️ Задание {job['id']} снова в очереди: {job['url']}",
+                     job=job["id"], url=job["url"])
+            self._enqueue(job["id"])
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            self._queued.add(job_id)
+        self._executor.submit(self._run, job_id)
+
+    def submit(self, url, **params):
+        """
+        Ставит обход категории в очередь и возвращает задание.
+        Если по этому URL уже есть активное задание, возвращается оно (общая контрольная точка).
+        """
+        # Поиск активного задания и постановка нового — под одной блокировкой, иначе два одновременных
+        # запроса с одним URL оба не найдут задания и запустят два обхода с общей контрольной точкой
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Менеджер заданий остановлен")
+            existing = next((job["id"] for job in self.store.list(ACTIVE_STATES, limit=-1) if job["url"] == url), None)
+            if existing is None:
+                if len(self._queued) >= self.queue_size:
+                    raise JobQueueFull(f"В очереди уже {len(self._queued)} заданий (максимум {self.queue_size})")
+                job_id = uuid.uuid4().hex[:12]
+                self.store.insert(job_id, url, params)
+                self._queued.add(job_id)
+        if existing is not None:
+            return self.get(existing)
+        self._executor.submit(self._run, job_id)
+        log.info("job_queued", f"📥 Задание {job_id} поставлено в очередь: {url}", job=job_id, url=url)
+        return self.get(job_id)
+
+    def _save_progress(self, job_id, running, force=False):
+        now = time.monotonic()
+        if force or now - running.saved_at >= settings.JOBS_PROGRESS_SAVE_INTERVAL:
+            running.saved_at = now
+            self.store.update(job_id, progress=running.progress.snapshot())
+
+    def _run(self, job_id):
+        running = _RunningJob()
+        with self._lock:
+            self._queued.discard(job_id)
+            job = self.store.get(job_id)
+            if self._closed or job is None or job["status"] != QUEUED:
+                return
+            self._running[job_id] = running
+        running.progress = CrawlProgress(on_change=lambda _: self._save_progress(job_id, running))
+        self.store.update(job_id, status=RUNNING, started=time.time(), error=None)
+        log.info("job_started", f"▶️ Задание {job_id} запущено: {job['url']}", job=job_id, url=job["url"])
+
+        status, error = FAILED, None
+        try:
+            complete = self.runner(job["url"], progress=running.progress, cancel_event=running.cancel_event,
+                                   **job["params"])
+            if running.cancel_event.is_set():
+                status = QUEUED if running.shutdown else CANCELLED
+            else:
+                status = DONE if complete else INCOMPLETE
+        except Exception as e:
+            error = str(e)
+            log.error("job_failed", f"❌ Задание {job_id} завершилось ошибкой: {e}", exc_info=True, job=job_id,
+                      error=error)
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+            self._save_progress(job_id, running, force=True)
+            if status == QUEUED:
+                # Сервер останавливается: после перезапуска задание продолжится с контрольной точки
+                self.store.update(job_id, status=QUEUED, params=dict(job["params"], resume=True))
+            else:
+                self.store.update(job_id, status=status, error=error, finished=time.time())
+            log.info("job_finished", f"⏹ Задание {job_id}: {status}", job=job_id, status=status)
+
+    def get(self, job_id):
+        """Задание с актуальным прогрессом (для выполняющихся — из памяти) или None."""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            running = self._running.get(job_id)
+        if running is not None and running.progress is not None:
+            job["progress"] = running.progress.snapshot()
+        return job
+
+    def list(self, limit=100):
+        return [self.get(job["id"]) or job for job in self.store.list(limit=limit)]
+
+    def cancel(self, job_id):
+        """Отменяет задание: ожидающее снимается с очереди, выполняющееся останавливается после текущей страницы."""
+        with self._lock:
+            job = self.store.get(job_id)
+            if job is None:
+                return None
+            running = self._running.get(job_id)
+            if running is not None:
+                running.cancel_event.set()
+            elif job["status"] == QUEUED:
+                self._queued.discard(job_id)
+                self.store.update(job_id, status=CANCELLED, finished=time.time())
+        return self.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "running": len(self._running),
+                "queued": len(self._queued),
+            }
+
+    def close(self):
+        """Останавливает выполняющиеся задания; они продолжатся с контрольной точки при следующем запуске."""
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+            for running in self._running.values():
+                running.shutdown = True
+                running.cancel_event.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.store.close()
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Общий менеджер заданий процесса (создается при первом обращении)."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None or _job_manager._closed:
+            _job_manager = JobManager()
+        return _job_manager
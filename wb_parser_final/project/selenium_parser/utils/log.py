@@ -0,0 +1,76 @@
+# selenium_parser/utils/log.py
+import json
+import logging
+import sys
+import time
+
+from selenium_parser import settings
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на событие: время, уровень, логгер, событие, сообщение и поля события."""
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+_configured = False
+
+
+def configure_logging(fmt=None, level=None):
+    """
+    Настраивает вывод логов парсера в stdout.
+    fmt: "text" — только сообщение, как прежние print; "json" — структурированные JSON-строки.
+    """
+    global _configured
+    fmt = fmt or settings.LOG_FORMAT
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+    root = logging.getLogger("wb")
+    root.handlers[:] = [handler]
+    root.setLevel(level or settings.LOG_LEVEL)
+    root.propagate = False
+    _configured = True
+
+
+class EventLogger:
+    """
+    Логгер событий: info("page_stored", "📄 Страница 3: +100 новых", page=3, new=100).
+    Поля события попадают в JSON-вывод, текстовый вывод содержит только сообщение.
+    """
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f"wb.{name}")
+
+    def _log(self, level, event, message, fields, exc_info=False):
+        if not _configured:
+            configure_logging()
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, extra={"event": event, "fields": fields}, exc_info=exc_info)
+
+    def debug(self, event, message, **fields):
+        self._log(logging.DEBUG, event, message, fields)
+
+    def info(self, event, message, **fields):
+        self._log(logging.INFO, event, message, fields)
+
+    def warning(self, event, message, **fields):
+        self._log(logging.WARNING, event, message, fields)
+
+    def error(self, event, message, exc_info=False, **fields):
+        self._log(logging.ERROR, event, message, fields, exc_info)
+
+
+def get_logger(name):
+    return EventLogger(name)
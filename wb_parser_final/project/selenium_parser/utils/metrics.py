@@ -0,0 +1,215 @@
+# selenium_parser/utils/metrics.py
+import threading
+import time
+from bisect import bisect_left
+
+from selenium_parser import settings
+
+# Границы корзин гистограмм длительностей, секунд
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Границы корзин размеров пакетов вставки, строк
+ROWS_BUCKETS = (10, 100, 1000, 5000, 10000, 25000, 50000, 100000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Metric:
+    """Базовая метрика с именованными метками. При выключенных метриках (METRICS_ENABLED) все вызовы — пустые."""
+
+    kind = None
+
+    def __init__(self, registry, name, description, labels=()):
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_labels_text(self.label_names, key)} {value}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными корзинами: счетчики по корзинам, сумма и число наблюдений."""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [счетчики корзин..., +Inf], сумма, количество
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Контекстный менеджер, измеряющий длительность блока: with histogram.time(stage="x"): ..."""
+        if not self.registry.enabled:
+            return NULL_TIMER
+        return _Timer(self, labels)
+
+    def snapshot(self, **labels):
+        """(количество, сумма) наблюдений для набора меток."""
+        state = self._values.get(self._key(labels))
+        return (state[2], state[1]) if state else (0, 0.0)
+
+    def _render_value(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += bucket_count
+            le = bound if bound == "+Inf" else repr(float(bound))
+            lines.append(f"{self.name}_bucket{_labels_text(self.label_names, key, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels_text(self.label_names, key)} {total}")
+        lines.append(f"{self.name}_count{_labels_text(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор метрик процесса и их выгрузка в текстовом формате Prometheus."""
+
+    def __init__(self, enabled=None):
+        self.enabled = settings.METRICS_ENABLED if enabled is None else enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name, description, labels=()):
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, description, labels, buckets)
+
+    def clear(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Метрики горячих путей обхода
+PROBES = registry.counter("wb_probes_total", "Пробы количества товаров в ценовом диапазоне", ["source"])
+PROBE_SECONDS = registry.histogram("wb_probe_seconds", "Длительность пробы количества товаров (загрузка страницы)")
+PAGE_PHASE_SECONDS = registry.histogram("wb_page_phase_seconds", "Длительность фаз обработки страницы каталога",
+                                        ["backend", "phase"])
+PAGE_ERRORS = registry.counter("wb_page_errors_total", "Ошибки загрузки страниц каталога")
+ITEMS = registry.counter("wb_items_total", "Товары со страниц каталога по результату проверки на дубликаты",
+                         ["result"])
+INSERT_ROWS = registry.histogram("wb_insert_batch_rows", "Размер пакета записи в приемник (ClickHouse, файлы), строк",
+                                 ["sink"], buckets=ROWS_BUCKETS)
+INSERT_SECONDS = registry.histogram("wb_insert_seconds", "Длительность пакетной записи в приемник", ["sink"])
+INSERT_ERRORS = registry.counter("wb_insert_errors_total", "Ошибки пакетной записи в приемник", ["sink"])
+ITEMS_PER_SECOND = registry.gauge("wb_items_per_second", "Скорость обхода категории, товаров в секунду",
+                                  ["category"])
+FETCH_RATE = registry.gauge("wb_fetch_rate", "Текущая частота запросов к хосту (адаптивная), в секунду", ["host"])
+FETCH_CONCURRENCY = registry.gauge("wb_fetch_concurrency_limit", "Текущий предел одновременных запросов к хосту",
+                                   ["host"])
+FETCH_RETRIES = registry.counter("wb_fetch_retries_total", "Повторы запросов после ограничения или ошибки", ["reason"])
+THROTTLED = registry.counter("wb_fetch_throttled_total", "Ответы-ограничения сайта (429/503, капча)", ["host"])
+CIRCUIT_OPENS = registry.counter("wb_circuit_open_total", "Паузы запросов к хосту после ограничений", ["host"])
+STAGE_UTILIZATION = registry.gauge("wb_stage_utilization", "Загруженность стадии конвейера обхода за последний обход",
+                                   ["stage"])
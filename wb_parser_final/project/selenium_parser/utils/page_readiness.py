@@ -0,0 +1,166 @@
+# selenium_parser/utils/page_readiness.py
+from selenium_parser import settings
+
+# Ссылки на карточки товаров
+CARD_SELECTOR = "a[href*='detail.aspx']"
+
+# Инструментирование документа: MutationObserver фиксирует момент последнего добавления узлов,
+# обертки fetch/XMLHttpRequest запоминают время начала незавершенных запросов. Скрипт идемпотентен.
+INSTRUMENT_JS = """
+(() => {
+  if (window.__wbReady) return;
+  const state = window.__wbReady = {lastMutation: performance.now(), pending: new Set()};
+  const origFetch = window.fetch;
+  if (origFetch) {
+    window.fetch = function () {
+      const request = {started: performance.now()};
+      state.pending.add(request);
+      return origFetch.apply(this, arguments).finally(() => { state.pending.delete(request); });
+    };
+  }
+  const origSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    const request = {started: performance.now()};
+    state.pending.add(request);
+    this.addEventListener('loadend', () => { state.pending.delete(request); }, {once: true});
+    return origSend.apply(this, arguments);
+  };
+  const observe = () => new MutationObserver(() => { state.lastMutation = performance.now(); })
+    .observe(document.documentElement, {childList: true, subtree: true});
+  if (document.documentElement) observe(); else document.addEventListener('DOMContentLoaded', observe);
+})();
+"""
+
+# Ожидание готовности за один вызов execute_async_script. Страница готова, когда
+# число карточек и высота документа не меняются quietMs, нет незавершенных запросов и новых узлов.
+# Запросы, которые идут дольше requestGraceMs (long polling, потоки событий), считаются фоновыми и не мешают:
+# медленную подгрузку карточек так дожидаемся, а постоянно открытые запросы сайта не держат ожидание до таймаута.
+# В режиме scroll страница сама прокручивается вниз до конца, пока подгружаются карточки.
+WAIT_JS = INSTRUMENT_JS + """
+const [selector, quietMs, timeoutMs, previousFirst, scroll, requestGraceMs] = arguments;
+const done = arguments[arguments.length - 1];
+const state = window.__wbReady;
+const started = performance.now();
+let lastCards = -1, lastHeight = -1, stableSince = started, steps = 0;
+
+const tick = () => {
+  const now = performance.now();
+  const links = document.querySelectorAll(selector);
+  const height = document.body ? document.body.scrollHeight : 0;
+  const first = links.length ? links[0].getAttribute('href') : null;
+  if (links.length !== lastCards || height !== lastHeight) {
+    lastCards = links.length; lastHeight = height; stableSince = now;
+  }
+  const stableFor = now - stableSince;
+  const atBottom = window.pageYOffset + window.innerHeight >= height - 10;
+  let loading = 0;
+  for (const request of state.pending) if (now - request.started < requestGraceMs) loading++;
+  const idle = loading === 0 && now - state.lastMutation >= quietMs;
+  const loaded = document.readyState !== 'loading' &&
+    (links.length > 0 || document.querySelector("[class*='goods-count'], [class*='catalog-title']") !== null);
+  const changed = previousFirst === null || first !== previousFirst;
+
+  if (scroll && !atBottom && (loading === 0 || stableFor >= quietMs)) {
+    window.scrollBy(0, window.innerHeight * 2);
+    steps++;
+  }
+  const ready = loaded && changed && stableFor >= quietMs && idle && (!scroll || atBottom);
+  if (ready || now - started >= timeoutMs) {
+    done({cards: links.length, height: height, first: first, steps: steps,
+          elapsed: now - started, timedOut: !ready});
+    return;
+  }
+  setTimeout(tick, 50);
+};
+tick();
+"""
+
+# Нажатие кнопки «Следующая страница» без неявного ожидания Selenium
+CLICK_NEXT_JS = """
+const button = document.querySelector("[class*='pagination-next']");
+if (!button) return false;
+button.click();
+return true;
+"""
+
+FIRST_CARD_JS = "const a = document.querySelector(arguments[0]); return a ? a.getAttribute('href') : null;"
+
+
+class AdaptiveTimeout:
+    """
+    Таймаут, подстраивающийся под фактическое время фазы:
+    экспоненциальное среднее наблюдений, умноженное на factor, в пределах [minimum, maximum].
+    """
+
+    def __init__(self, initial, minimum, maximum, factor=4.0, alpha=0.3):
+        self.value = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.alpha = alpha
+        self.average = None
+
+    def observe(self, seconds, timed_out=False):
+        if timed_out:
+            # Не успели: расширяем таймаут, но не выше максимума
+            self.value = min(self.maximum, self.value * 1.5)
+            return
+        self.average = seconds if self.average is None else self.alpha * seconds + (1 - self.alpha) * self.average
+        self.value = min(self.maximum, max(self.minimum, self.average * self.factor))
+
+
+class PageReadiness:
+    """Ожидание готовности страницы по реальным сигналам вместо фиксированных пауз."""
+
+    def __init__(self, quiet_ms=None):
+        self.quiet_ms = quiet_ms or settings.READINESS_QUIET_MS
+        self.request_grace_ms = settings.READINESS_REQUEST_GRACE_MS
+        self.ready_timeout = AdaptiveTimeout(settings.READINESS_TIMEOUT, settings.READINESS_MIN_TIMEOUT,
+                                             settings.READINESS_MAX_TIMEOUT)
+        self.scroll_timeout = AdaptiveTimeout(settings.SCROLL_TIMEOUT, settings.READINESS_MIN_TIMEOUT,
+                                              settings.SCROLL_MAX_TIMEOUT)
+        self.timeouts = 0
+
+    @staticmethod
+    def install(driver):
+        """Один раз на браузер встраивает инструментирование во все новые документы (Chrome DevTools)."""
+        if getattr(driver, "_wb_readiness_installed", False):
+            return
+        try:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": INSTRUMENT_JS})
+        except Exception:
+            # Без DevTools скрипт встраивается при первом ожидании на каждой странице
+            pass
+        driver._wb_readiness_installed = True
+
+    def _wait(self, driver, timeout, previous_first=None, scroll=False):
+        driver.set_script_timeout(timeout.value + 5)
+        state = driver.execute_async_script(
+            WAIT_JS, CARD_SELECTOR, self.quiet_ms, int(timeout.value * 1000), previous_first, scroll,
+            self.request_grace_ms
+        )
+        timed_out = state.get("timedOut", False)
+        if timed_out:
+            self.timeouts += 1
+        timeout.observe(state.get("elapsed", 0) / 1000, timed_out)
+        return state
+
+    def wait_ready(self, driver, previous_first=None):
+        """
+        Ждет, пока страница отрисует карточки (или счетчик товаров) и перестанет меняться.
+        previous_first — href первой карточки до перехода: страница считается новой, когда он сменился.
+        """
+        return self._wait(driver, self.ready_timeout, previous_first)
+
+    def scroll_to_bottom(self, driver):
+        """Прокручивает страницу до конца внутри браузера за один вызов, дожидаясь подгрузки карточек."""
+        return self._wait(driver, self.scroll_timeout, scroll=True)
+
+    @staticmethod
+    def first_card(driver):
+        return driver.execute_script(FIRST_CARD_JS, CARD_SELECTOR)
+
+    @staticmethod
+    def click_next(driver):
+        """Нажимает «Следующая страница». Возвращает False, если кнопки нет."""
+        return bool(driver.execute_script(CLICK_NEXT_JS))
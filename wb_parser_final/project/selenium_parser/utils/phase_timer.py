@@ -0,0 +1,42 @@
+# selenium_parser/utils/phase_timer.py
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium_parser.utils.metrics import PAGE_PHASE_SECONDS
+
+
+class PhaseTimer:
+    """
+    Накопительный замер времени по фазам обработки страницы (загрузка, ожидание, прокрутка, разбор).
+    Каждый замер также попадает в гистограмму wb_page_phase_seconds с меткой backend.
+    """
+
+    def __init__(self, backend=""):
+        self.backend = backend
+        self.totals = {}
+        self.counts = {}
+        # Фазы одной страницы могут идти в разных потоках (загрузка и разбор — разные стадии конвейера)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+        PAGE_PHASE_SECONDS.observe(seconds, backend=self.backend, phase=name)
+
+    def average(self, name):
+        count = self.counts.get(name)
+        return self.totals[name] / count if count else 0.0
+
+    def summary(self):
+        """Строка вида «navigate 1.20 с (x10), scroll 0.80 с (x10)» со средним временем фаз."""
+        return ", ".join(f"{name} {self.average(name):.2f} с (x{self.counts[name]})" for name in self.totals)
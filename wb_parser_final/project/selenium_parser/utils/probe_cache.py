@@ -0,0 +1,129 @@
+# selenium_parser/utils/probe_cache.py
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from selenium_parser import settings
+
+# Параметры URL, не влияющие на количество товаров в диапазоне
+IGNORED_PARAMS = ("priceU", "page", "sort")
+
+
+def category_key(url):
+    """Ключ категории: путь и фильтры URL без priceU/page/sort."""
+    parsed = urlparse(url)
+    params = {key: value for key, value in parse_qs(parsed.query).items() if key not in IGNORED_PARAMS}
+    query = urlencode(sorted(params.items()), doseq=True)
+    return f"{parsed.netloc}{parsed.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+class ProbeCache:
+    """
+    Постоянный кэш проб количества товаров (категория, нижняя и верхняя граница в копейках) -> count.
+    Хранится в SQLite. Записи старше ttl секунд считаются устаревшими,
+    при превышении max_entries удаляются давно не использованные (LRU).
+    """
+
+    def __init__(self, path, ttl=None, max_entries=None):
+        self.path = path
+        self.ttl = ttl if ttl is not None else settings.PROBE_CACHE_TTL
+        self.max_entries = max_entries or settings.PROBE_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            " category TEXT NOT NULL, lower INTEGER NOT NULL, upper INTEGER NOT NULL,"
+            " count INTEGER NOT NULL, created REAL NOT NULL, used REAL NOT NULL,"
+            " PRIMARY KEY (category, lower, upper))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS probes_used ON probes (used)")
+        self._conn.commit()
+
+    def get(self, category, lower_kop, upper_kop):
+        """Возвращает сохраненное количество или None (нет записи или она устарела)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count, created FROM probes WHERE category = ? AND lower = ? AND upper = ?",
+                (category, lower_kop, upper_kop)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE probes SET used = ? WHERE category = ? AND lower = ? AND upper = ?",
+                (now, category, lower_kop, upper_kop)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, category, lower_kop, upper_kop, count):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes (category, lower, upper, count, created, used) VALUES (?, ?, ?, ?, ?, ?)",
+                (category, lower_kop, upper_kop, count, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def probes(self, category):
+        """
+        Все свежие пробы категории в виде списка (lower, upper, count), по возрастанию lower.
+        Попаданием выданная проба не считается: это делает record_hit, когда она заменила загрузку.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT lower, upper, count FROM probes WHERE category = ? AND created >= ? ORDER BY lower, created",
+                (category, now - self.ttl)
+            ).fetchall()
+            self._conn.execute("UPDATE probes SET used = ? WHERE category = ?", (now, category))
+            self._conn.commit()
+            return rows
+
+    def record_hit(self):
+        """Учитывает попадание: проба, полученная через probes(), заменила загрузку страницы."""
+        with self._lock:
+            self.hits += 1
+
+    def _evict(self):
+        # Сначала удаляем устаревшие записи, затем давно не использованные сверх лимита
+        self._conn.execute("DELETE FROM probes WHERE created < ?", (time.time() - self.ttl,))
+        (size,) = self._conn.execute("SELECT count(*) FROM probes").fetchone()
+        if size > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM probes WHERE rowid IN (SELECT rowid FROM probes ORDER BY used LIMIT ?)",
+                (size - self.max_entries,)
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+
+def get_probe_cache():
+    """Общий кэш проб процесса по settings.PROBE_CACHE_PATH; None, если кэш отключен."""
+    global _probe_cache
+    if not settings.PROBE_CACHE_PATH:
+        return None
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache(settings.PROBE_CACHE_PATH)
+        return _probe_cache
@@ -0,0 +1,38 @@
+# selenium_parser/utils/product_record.py
+
+
+class ProductRecord:
+    """
+    Товар со страницы каталога: артикул, ссылка и категория.
+    Компактная запись на __slots__ вместо словаря на каждый товар (примерно втрое меньше памяти);
+    для совместимости поддерживает чтение как словарь: record["article"], record.get("link").
+    """
+
+    __slots__ = ("article", "link", "category")
+
+    def __init__(self, article, link, category):
+        self.article = article
+        self.link = link
+        self.category = category
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return {"category": self.category, "link": self.link, "article": self.article}
+
+    def __eq__(self, other):
+        if isinstance(other, ProductRecord):
+            return (self.article, self.link, self.category) == (other.article, other.link, other.category)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ProductRecord(article={self.article!r}, link={self.link!r}, category={self.category!r})"
@@ -0,0 +1,72 @@
+# selenium_parser/utils/progress.py
+import threading
+import time
+
+
+class CrawlCancelled(Exception):
+    """Обход остановлен по запросу (отмена задания или остановка сервера)."""
+
+
+class CrawlProgress:
+    """
+    Ход обхода категории: диапазоны (блоки), страницы, товары, скорость и оценка оставшегося времени.
+    on_change(progress) вызывается после каждой записанной страницы и каждого завершенного блока.
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self.started_at = time.time()
+        self.blocks_total = None
+        self.blocks_done = 0
+        self.pages = 0
+        self.items = 0
+        self.new_items = 0
+        self.total_items = None
+        self._lock = threading.Lock()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def set_plan(self, blocks_total=None, total_items=None):
+        with self._lock:
+            if blocks_total is not None:
+                self.blocks_total = blocks_total
+            if total_items is not None:
+                self.total_items = total_items
+        self._changed()
+
+    def add_page(self, items, new_items):
+        with self._lock:
+            self.pages += 1
+            self.items += items
+            self.new_items += new_items
+        self._changed()
+
+    def add_block(self):
+        with self._lock:
+            self.blocks_done += 1
+        self._changed()
+
+    def items_per_second(self):
+        return self.items / max(time.time() - self.started_at, 1e-9)
+
+    def snapshot(self):
+        """Словарь для API: счетчики, товаров в секунду и ETA в секундах (None, пока объем неизвестен)."""
+        with self._lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            rate = self.items / elapsed
+            eta = None
+            if self.total_items is not None and rate > 0:
+                eta = round(max(self.total_items - self.items, 0) / rate, 1)
+            return {
+                "blocks_done": self.blocks_done,
+                "blocks_total": self.blocks_total,
+                "pages": self.pages,
+                "items": self.items,
+                "new_items": self.new_items,
+                "total_items": self.total_items,
+                "elapsed_seconds": round(elapsed, 1),
+                "items_per_second": round(rate, 2),
+                "eta_seconds": eta,
+            }
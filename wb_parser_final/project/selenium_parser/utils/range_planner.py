@@ -0,0 +1,249 @@
+# selenium_parser/utils/range_planner.py
+import math
+from bisect import bisect_left, insort
+
+from selenium_parser.utils import price_range_utils
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import PROBE_SECONDS, PROBES
+from selenium_parser.utils.price_range_utils import build_range_url, get_lower_price, get_max_upper_price
+from selenium_parser.utils.probe_cache import category_key, get_probe_cache
+from selenium_parser.utils.progress import CrawlCancelled
+
+MAX_PROBES_PER_RANGE = 40  # защита от бесконечного подбора при «шумных» счетчиках
+
+log = get_logger("planner")
+
+
+def to_kopecks(price):
+    return int(round(price * 100))
+
+
+class PriceHistogram:
+    """
+    Модель распределения цен категории по результатам проб.
+    Хранит накопленные количества cum(p) — число товаров с ценой в [origin, p] (в копейках).
+    Проба (lower, upper, count) дает точку cum(upper) = cum(lower - 1) + count,
+    если cum(lower - 1) уже известна. Точки из всех проб переиспользуются при подборе следующих диапазонов.
+    """
+
+    def __init__(self, origin_kop):
+        self.origin = origin_kop
+        self._prices = [origin_kop - 1]
+        self._cum = {origin_kop - 1: 0}
+
+    def __len__(self):
+        return len(self._prices)
+
+    def known(self, price_kop):
+        return self._cum.get(price_kop)
+
+    def record(self, lower_kop, upper_kop, count):
+        """Добавляет результат пробы. Возвращает False, если пробу не к чему привязать."""
+        base = self._cum.get(lower_kop - 1)
+        if base is None:
+            return False
+        value = base + count
+        if upper_kop not in self._cum:
+            insort(self._prices, upper_kop)
+        self._cum[upper_kop] = value
+        # Счетчики на живом сайте могут «плавать»: убираем точки, противоречащие монотонности
+        i = bisect_left(self._prices, upper_kop)
+        stale = [p for p in self._prices[:i] if p >= lower_kop and self._cum[p] > value]
+        stale += [p for p in self._prices[i + 1:] if self._cum[p] < value]
+        for p in stale:
+            self._prices.remove(p)
+            del self._cum[p]
+        return True
+
+    def points_after(self, price_kop):
+        """Известные точки (цена, cum) с ценой не ниже price_kop в порядке возрастания цены."""
+        i = bisect_left(self._prices, price_kop)
+        return [(p, self._cum[p]) for p in self._prices[i:]]
+
+
+class RangePlanner:
+    """
+    Планировщик ценовых диапазонов.
+
+    Вместо слепого деления пополам следующая верхняя граница интерполируется по накопленному
+    распределению (в логарифмической шкале цен при широкой «вилке»), известные точки распределения
+    переиспользуются между блоками, а количество товаров в последнем блоке вычисляется без пробы.
+    Все цены внутри — в копейках; соседние диапазоны не пересекаются (следующий начинается
+    на копейку выше предыдущего), поэтому накопленные количества складываются точно.
+
+    Пробы читаются из постоянного кэша (ProbeCache) и записываются в него; при создании
+    планировщика свежие пробы категории из кэша сразу загружаются в гистограмму,
+    поэтому повторный запуск с «теплым» кэшем строит разбиение без загрузок страниц.
+    cache=None — общий кэш из настроек, cache=False — без кэша.
+    Если задан cancel_event (threading.Event) и он установлен, очередная проба прерывается CrawlCancelled.
+    """
+
+    def __init__(self, backend, base_url, min_count=None, max_count=None, step=None, cache=None,
+                 cancel_event=None):
+        self.backend = backend
+        self.base_url = base_url
+        self.min_count = min_count if min_count is not None else price_range_utils.target_min_count
+        self.max_count = max_count if max_count is not None else price_range_utils.target_max_count
+        self.step_kop = to_kopecks(step) if step else None
+        self.max_upper = to_kopecks(get_max_upper_price(base_url))
+        self.histogram = PriceHistogram(to_kopecks(get_lower_price(base_url)))
+        self.probes = 0
+        self.cache = get_probe_cache() if cache is None else (cache or None)
+        self.category = category_key(base_url)
+        self.cancel_event = cancel_event
+        # Точки гистограммы из загруженных проб кэша, еще не заменившие ни одной пробы
+        self._cached_points = set()
+        if self.cache is not None:
+            self._load_cached_probes(self.histogram)
+
+    def _load_cached_probes(self, histogram):
+        # Пробы упорядочены по нижней границе, поэтому каждая привязывается к уже известной точке
+        for lower_kop, upper_kop, count in self.cache.probes(self.category):
+            if histogram.record(lower_kop, upper_kop, count):
+                self._cached_points.add(upper_kop)
+
+    def _use_point(self, price_kop):
+        """Точка гистограммы стала ответом вместо пробы: если она из кэша, это попадание."""
+        if price_kop in self._cached_points:
+            self._cached_points.discard(price_kop)
+            self.cache.record_hit()
+            PROBES.inc(source="cache")
+
+    def count(self, lower_kop, upper_kop):
+        """Одна проба: количество товаров в [lower, upper]. Результат записывается в гистограмму."""
+        count = self.cache.get(self.category, lower_kop, upper_kop) if self.cache is not None else None
+        if count is None:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise CrawlCancelled()
+            self.probes += 1
+            PROBES.inc(source="backend")
+            with PROBE_SECONDS.time():
+                count = self.backend.count_products(build_range_url(self.base_url, lower_kop / 100, upper_kop / 100))
+            if count is not None and self.cache is not None:
+                self.cache.put(self.category, lower_kop, upper_kop, count)
+        else:
+            PROBES.inc(source="cache")
+        if count is not None:
+            self.histogram.record(lower_kop, upper_kop, count)
+        return count
+
+    @property
+    def total(self):
+        """Число товаров от начала модели до верхней границы интервала, если оно уже известно по пробам."""
+        return self.histogram.known(self.max_upper)
+
+    def _interpolate(self, a, ca, b, cb, goal):
+        frac = (goal - ca) / (cb - ca)
+        if b > 4 * max(a, 1):
+            # Широкая вилка: цены распределены примерно логнормально, интерполируем по логарифму
+            log_a, log_b = math.log(max(a, 1)), math.log(b)
+            guess = math.exp(log_a + frac * (log_b - log_a))
+        else:
+            guess = a + frac * (b - a)
+        return min(b - 1, max(a + 1, int(guess)))
+
+    def next_range(self, lower):
+        """
+        Подбирает верхнюю границу (в рублях) для диапазона, начинающегося с lower (в рублях).
+        Возвращает (upper, count) или (None, None), если подбор не удался.
+        """
+        lower_kop = to_kopecks(lower)
+        histogram = self.histogram
+        if histogram.known(lower_kop - 1) is None:
+            # Диапазон не продолжает предыдущие: начинаем модель заново от этой границы
+            histogram = self.histogram = PriceHistogram(lower_kop)
+            if self.cache is not None:
+                self._load_cached_probes(histogram)
+        base = histogram.known(lower_kop - 1)
+
+        total = histogram.known(self.max_upper)
+        if total is None:
+            remaining = self.count(lower_kop, self.max_upper)
+            if remaining is None:
+                log.warning("probe_failed", "Не удалось получить количество товаров для начального диапазона.",
+                            lower=lower)
+                return None, None
+        else:
+            self._use_point(self.max_upper)
+            remaining = total - base
+        # Все оставшиеся товары помещаются в один блок — проба не нужна
+        if remaining <= self.max_count:
+            return self.max_upper / 100, remaining
+
+        low_goal, high_goal = base + self.min_count, base + self.max_count
+        goal = (low_goal + high_goal) / 2
+        last_sides = []
+        for _ in range(MAX_PROBES_PER_RANGE):
+            # Ищем вилку по уже известным точкам; точка внутри окна — готовый ответ без пробы
+            a, ca = lower_kop - 1, base
+            b, cb = None, None
+            for price, cum in histogram.points_after(lower_kop):
+                if price > self.max_upper:
+                    break
+                if low_goal <= cum <= high_goal:
+                    self._use_point(price)
+                    return price / 100, cum - base
+                if cum < low_goal:
+                    a, ca = price, cum
+                else:
+                    b, cb = price, cum
+                    break
+
+            if b is None:
+                b, cb = self.max_upper, base + remaining
+
+            if b - a <= 1:
+                # Между соседними копейками слишком много товаров с одинаковой ценой
+                if ca > base:
+                    return a / 100, ca - base
+                return b / 100, cb - base
+
+            if self.step_kop and len(histogram.points_after(lower_kop)) <= 1 and a == lower_kop - 1:
+                guess = min(b - 1, lower_kop + self.step_kop)
+            elif len(last_sides) >= 2 and last_sides[-1] == last_sides[-2]:
+                # Интерполяция дважды «промахнулась» в одну сторону — делаем шаг бисекции
+                guess = (a + b) // 2 if b <= 4 * max(a, 1) else int(math.sqrt(max(a, 1) * b))
+                guess = min(b - 1, max(a + 1, guess))
+            else:
+                guess = self._interpolate(a, ca, b, cb, goal)
+
+            count = self.count(lower_kop, guess)
+            if count is None:
+                # Если не удалось получить количество (неожиданная ошибка парсинга), прекращаем поиск
+                return None, None
+            last_sides.append(base + count < low_goal)
+        return None, None
+
+    def plan(self):
+        """
+        Разбивает весь ценовой интервал URL на диапазоны.
+        Возвращает список (lower, upper, count) в рублях; пустой список, если подбор не удался.
+        """
+        lower_kop = self.histogram.origin
+        ranges = []
+        while lower_kop <= self.max_upper:
+            upper, count = self.next_range(lower_kop / 100)
+            if upper is None:
+                log.error("range_failed", f"❌ Не удалось подобрать диапазон от {lower_kop / 100:.2f} RUB.",
+                          lower=lower_kop / 100)
+                break
+            ranges.append((lower_kop / 100, upper, count))
+            log.info("range_planned",
+                     f"🗺 Диапазон #{len(ranges)}: {lower_kop / 100:.2f} – {upper:.2f} RUB, {count} товаров",
+                     block=len(ranges), lower=lower_kop / 100, upper=upper, count=count)
+            lower_kop = to_kopecks(upper) + 1
+        log.info("plan_done", f"🗺 Разбиение готово: {len(ranges)} диапазонов, {self.probes} проб",
+                 ranges=len(ranges), probes=self.probes)
+        if self.cache is not None:
+            stats = self.cache.stats()
+            log.info("probe_cache", f"🗃 Кэш проб: {stats['hits']} попаданий, {stats['misses']} промахов", **stats)
+        return ranges
+
+
+def plan_price_ranges(backend, base_url, step=None, min_count=None, max_count=None, cancel_event=None):
+    """
+    Заранее разбивает весь ценовой интервал категории на диапазоны.
+    Возвращает список кортежей (lower, upper, count) в рублях; пустой список, если подбор не удался.
+    """
+    return RangePlanner(backend, base_url, min_count=min_count, max_count=max_count, step=step,
+                        cancel_event=cancel_event).plan()
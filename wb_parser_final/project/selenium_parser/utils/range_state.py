@@ -0,0 +1,177 @@
+# selenium_parser/utils/range_state.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from selenium_parser import settings
+from selenium_parser.utils import price_range_utils
+from selenium_parser.utils.article_index import to_article_id
+from selenium_parser.utils.log import get_logger
+from selenium_parser.utils.metrics import PROBES
+from selenium_parser.utils.price_range_utils import build_range_url, get_lower_price, get_max_upper_price
+from selenium_parser.utils.progress import CrawlCancelled
+from selenium_parser.utils.range_planner import plan_price_ranges, to_kopecks
+
+log = get_logger("refresh")
+
+
+def article_fingerprint(products):
+    """Отпечаток набора товаров: хэш отсортированных артикулов (порядок выдачи не важен)."""
+    ids = sorted(filter(None, (to_article_id(p.article) for p in products)))
+    return hashlib.blake2b(array('Q', ids).tobytes(), digest_size=8).hexdigest()
+
+
+class RangeStateStore:
+    """
+    Состояние диапазонов с прошлых обходов в SQLite: для каждого диапазона категории
+    (границы в копейках) — количество товаров при планировании, отпечатки всех его страниц
+    и время последнего полного обхода. По нему инкрементальный режим решает, какие диапазоны
+    изменились и требуют повторного обхода.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ranges ("
+            " category TEXT NOT NULL, lower INTEGER NOT NULL, upper INTEGER NOT NULL,"
+            " count INTEGER NOT NULL, pages TEXT NOT NULL, crawled REAL NOT NULL,"
+            " PRIMARY KEY (category, lower, upper))"
+        )
+        self._conn.commit()
+
+    def ranges(self, category):
+        """Сохраненные диапазоны категории по возрастанию нижней границы: список словарей."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT lower, upper, count, pages, crawled FROM ranges WHERE category = ? ORDER BY lower",
+                (category,)
+            ).fetchall()
+        return [{"lower": lower, "upper": upper, "count": count, "pages": json.loads(pages), "crawled": crawled}
+                for lower, upper, count, pages, crawled in rows]
+
+    def put(self, category, lower_kop, upper_kop, count, page_fingerprints):
+        """Сохраняет полностью обойденный диапазон: количество и отпечатки страниц по порядку."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ranges (category, lower, upper, count, pages, crawled)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (category, lower_kop, upper_kop, count, json.dumps(page_fingerprints), time.time())
+            )
+            self._conn.commit()
+
+    def prune(self, category, keep):
+        """Удаляет диапазоны категории, которых нет в текущем разбиении keep (пары границ в копейках)."""
+        keep = set(keep)
+        with self._lock:
+            stale = [(lower, upper) for lower, upper in self._conn.execute(
+                "SELECT lower, upper FROM ranges WHERE category = ?", (category,)
+            ) if (lower, upper) not in keep]
+            self._conn.executemany("DELETE FROM ranges WHERE category = ? AND lower = ? AND upper = ?",
+                                   [(category, lower, upper) for lower, upper in stale])
+            self._conn.commit()
+        return len(stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_range_state = None
+_range_state_lock = threading.Lock()
+
+
+def get_range_state():
+    """Общее хранилище состояния диапазонов по settings.RANGE_STATE_PATH; None, если оно отключено."""
+    global _range_state
+    if not settings.RANGE_STATE_PATH:
+        return None
+    with _range_state_lock:
+        if _range_state is None or _range_state.path != settings.RANGE_STATE_PATH:
+            _range_state = RangeStateStore(settings.RANGE_STATE_PATH)
+        return _range_state
+
+
+def _covers(previous, start_url):
+    """Сохраненные диапазоны идут подряд и покрывают весь ценовой интервал URL."""
+    if not previous:
+        return False
+    if previous[0]["lower"] != to_kopecks(get_lower_price(start_url)):
+        return False
+    if previous[-1]["upper"] != to_kopecks(get_max_upper_price(start_url)):
+        return False
+    return all(b["lower"] == a["upper"] + 1 for a, b in zip(previous, previous[1:]))
+
+
+def refresh_ranges(backend, start_url, previous, fingerprint_pages=None, max_age=None, step=None,
+                   min_count=None, max_count=None, cancel_event=None):
+    """
+    Перепроверяет диапазоны прошлого обхода и возвращает (ranges, unchanged):
+    ranges — новое разбиение (lower, upper, count) в рублях, unchanged — URL диапазонов, которые можно не обходить.
+
+    Для каждого диапазона загружается количество товаров и первые fingerprint_pages страниц;
+    диапазон считается неизменным, если совпали количество и отпечатки этих страниц, а полный обход
+    был не раньше max_age секунд назад. Изменившийся диапазон, который перестал помещаться в max_count,
+    разбивается заново. Если сохраненные диапазоны не покрывают интервал URL, возвращается (None, None).
+    """
+    if not _covers(previous, start_url):
+        return None, None
+    fingerprint_pages = settings.INCREMENTAL_FINGERPRINT_PAGES if fingerprint_pages is None else fingerprint_pages
+    max_age = settings.INCREMENTAL_MAX_AGE if max_age is None else max_age
+    max_count = max_count if max_count is not None else price_range_utils.target_max_count
+    started = time.monotonic()
+
+    ranges, unchanged = [], set()
+    loads = 0
+    for state in previous:
+        lower, upper = state["lower"] / 100, state["upper"] / 100
+        range_url = build_range_url(start_url, lower, upper)
+        if cancel_event is not None and cancel_event.is_set():
+            raise CrawlCancelled()
+        PROBES.inc(source="refresh")
+        count = backend.count_products(range_url)
+        loads += 1
+        reason = None
+        if count is None:
+            reason = "нет количества"
+        elif count != state["count"]:
+            reason = f"количество {state['count']} → {count}"
+        elif time.time() - state["crawled"] > max_age:
+            reason = "давно не обходился"
+        else:
+            for page_number, expected in enumerate(state["pages"][:fingerprint_pages], start=1):
+                loads += 1
+                try:
+                    products = backend.fetch_page(range_url, page_number)
+                except Exception as e:
+                    reason = f"ошибка загрузки страницы {page_number}: {e}"
+                    break
+                if article_fingerprint(products) != expected:
+                    reason = f"изменилась страница {page_number}"
+                    break
+
+        if reason is None:
+            ranges.append((lower, upper, count))
+            unchanged.add(range_url)
+            continue
+        log.info("range_changed", f"🔄 Диапазон {lower:.2f} – {upper:.2f} RUB: {reason}",
+                 lower=lower, upper=upper, reason=reason, count=count, previous_count=state["count"])
+        replanned = []
+        if count is not None and count > max_count:
+            # Диапазон разросся: разбиваем заново только его интервал
+            replanned = plan_price_ranges(backend, range_url, step=step, min_count=min_count, max_count=max_count,
+                                          cancel_event=cancel_event)
+        ranges.extend(replanned or [(lower, upper, count if count is not None else state["count"])])
+
+    changed = len(ranges) - len(unchanged)
+    log.info("refresh_done", f"🔄 Перепроверка: {len(previous)} диапазонов, без изменений {len(unchanged)}, "
+                             f"к обходу {changed}, загрузок {loads} за {time.monotonic() - started:.1f} с",
+             ranges=len(previous), unchanged=len(unchanged), changed=changed, loads=loads)
+    return ranges, unchanged
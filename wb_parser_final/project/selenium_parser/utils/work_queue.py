@@ -0,0 +1,211 @@
+# selenium_parser/utils/work_queue.py
+import os
+import sqlite3
+import threading
+import time
+
+from selenium_parser import settings
+
+# Виды заданий: планирование диапазонов категории и загрузка одной страницы диапазона
+PLAN = "plan"
+PAGE = "page"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+UNIT_FIELDS = ("id", "run_id", "key", "kind", "category_url", "range_url", "page", "pages", "attempts", "worker")
+
+
+class SqliteWorkQueue:
+    """
+    Общая очередь заданий обхода (категория, диапазон цен, страница) в SQLite.
+
+    Задание выдается воркеру в аренду (lease) на lease_seconds секунд. Завершенное задание
+    подтверждается complete(), неудачное возвращается в очередь с экспоненциальной задержкой
+    (fail), а после max_attempts попыток помечается failed. Аренда, не подтвержденная вовремя
+    (воркер упал или завис), считается неудачной попыткой и задание снова выдается.
+    Повторная постановка задания с тем же ключом в том же запуске (run_id) игнорируется.
+
+    База в режиме WAL, выдача заданий идет в транзакции BEGIN IMMEDIATE, поэтому с очередью
+    одновременно работают несколько процессов одной машины. WAL не работает на сетевых файловых
+    системах (NFS, SMB), поэтому файл очереди должен лежать на локальном диске; для нескольких
+    машин нужно сетевое хранилище (например, Redis), которое подключается реализацией тех же
+    методов: put, lease, extend, complete, fail, stats, active, latest_run.
+    """
+
+    def __init__(self, path=None, lease_seconds=None, max_attempts=None):
+        self.path = path or settings.WORK_QUEUE_PATH
+        self.lease_seconds = lease_seconds or settings.WORK_QUEUE_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.WORK_QUEUE_MAX_ATTEMPTS
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None: транзакциями управляем явно
+        self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, key TEXT NOT NULL, kind TEXT NOT NULL,"
+            " category_url TEXT NOT NULL, range_url TEXT, page INTEGER, pages INTEGER,"
+            " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, worker TEXT,"
+            " lease_until REAL, available_at REAL NOT NULL, error TEXT,"
+            " created REAL NOT NULL, finished REAL,"
+            " UNIQUE (run_id, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS units_status ON units (status, available_at)")
+        # Запуски в порядке постановки категорий: воркеры без явного run_id берут последний
+        self._conn.execute("CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, created REAL NOT NULL)")
+        if self._conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None:
+            # Очередь, созданная до появления таблицы запусков
+            self._conn.execute("INSERT OR IGNORE INTO runs (run_id, created)"
+                               " SELECT run_id, min(created) FROM units WHERE kind = ? GROUP BY run_id", (PLAN,))
+
+    @staticmethod
+    def unit_key(kind, category_url, range_url=None, page=None):
+        if kind == PLAN:
+            return f"{PLAN}:{category_url}"
+        return f"{PAGE}:{range_url}:{page}"
+
+    def put(self, run_id, units):
+        """
+        Ставит задания в очередь. units — словари с kind, category_url и, для страниц, range_url, page, pages.
+        Возвращает число действительно добавленных (дубликаты в пределах run_id пропускаются).
+        """
+        now = time.time()
+        rows = [
+            (run_id, self.unit_key(u["kind"], u["category_url"], u.get("range_url"), u.get("page")), u["kind"],
+             u["category_url"], u.get("range_url"), u.get("page"), u.get("pages"), PENDING, now, now)
+            for u in units
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            if any(u["kind"] == PLAN for u in units):
+                # Постановка категорий делает запуск последним (страницы ставятся в уже известный запуск)
+                self._conn.execute("INSERT INTO runs (run_id, created) VALUES (?, ?)"
+                                   " ON CONFLICT (run_id) DO UPDATE SET created = excluded.created", (run_id, now))
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (run_id, key, kind, category_url, range_url, page, pages,"
+                " status, available_at, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def latest_run(self):
+        """Идентификатор последнего поставленного запуска или None, если очередь пуста."""
+        with self._lock:
+            row = self._conn.execute("SELECT run_id FROM runs ORDER BY created DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def _reclaim(self, now):
+        # Просроченная аренда — неудачная попытка: задание возвращается в очередь или помечается failed
+        return self._conn.execute(
+            "UPDATE units SET attempts = attempts + 1, worker = NULL, lease_until = NULL,"
+            " error = 'аренда истекла',"
+            " status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END"
+            " WHERE status = ? AND lease_until < ?",
+            (self.max_attempts, FAILED, PENDING, LEASED, now)
+        ).rowcount
+
+    def lease(self, worker_id, run_id=None):
+        """
+        Выдает воркеру одно задание в аренду: сначала планирование категорий, затем страницы.
+        Возвращает словарь задания или None, если доступных заданий нет.
+        """
+        now = time.time()
+        query = ("SELECT " + ", ".join(UNIT_FIELDS) + " FROM units WHERE status = ? AND available_at <= ?"
+                 + (" AND run_id = ?" if run_id else "") + " ORDER BY kind = ? DESC, id LIMIT 1")
+        args = (PENDING, now) + ((run_id,) if run_id else ()) + (PLAN,)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._reclaim(now)
+                row = self._conn.execute(query, args).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE units SET status = ?, worker = ?, lease_until = ? WHERE id = ?",
+                        (LEASED, worker_id, now + self.lease_seconds, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        unit = dict(zip(UNIT_FIELDS, row))
+        unit["worker"] = worker_id
+        return unit
+
+    def extend(self, unit_ids, worker_id):
+        """Продлевает аренду заданий, которые воркер еще держит (например, ждут записи в хранилище)."""
+        if not unit_ids:
+            return 0
+        with self._lock:
+            return self._conn.execute(
+                f"UPDATE units SET lease_until = ? WHERE status = ? AND worker = ?"
+                f" AND id IN ({', '.join('?' for _ in unit_ids)})",
+                (time.time() + self.lease_seconds, LEASED, worker_id, *unit_ids)
+            ).rowcount
+
+    def complete(self, unit_ids, worker_id):
+        """Подтверждает выполнение. Задания, аренду которых воркер уже потерял, не меняются."""
+        if not unit_ids:
+            return 0
+        with self._lock:
+            return self._conn.execute(
+                f"UPDATE units SET status = ?, finished = ?, lease_until = NULL WHERE status = ? AND worker = ?"
+                f" AND id IN ({', '.join('?' for _ in unit_ids)})",
+                (DONE, time.time(), LEASED, worker_id, *unit_ids)
+            ).rowcount
+
+    def fail(self, unit_id, worker_id, error):
+        """
+        Неудачная попытка: задание вернется в очередь с задержкой 5, 10, 20... секунд (не больше 5 минут).
+        Возвращает 1 или 0, если воркер уже потерял аренду (задание выдано другому) и оно не изменено.
+        """
+        now = time.time()
+        with self._lock:
+            # Чтение попыток и обновление — в одной транзакции: иначе между ними другой процесс может
+            # вернуть просроченную аренду и выдать задание новому воркеру
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT attempts FROM units WHERE id = ? AND status = ? AND worker = ?",
+                    (unit_id, LEASED, worker_id)
+                ).fetchone()
+                updated = 0
+                if row is not None:
+                    attempts = row[0] + 1
+                    status = FAILED if attempts >= self.max_attempts else PENDING
+                    delay = min(300.0, 5.0 * 2 ** (attempts - 1))
+                    updated = self._conn.execute(
+                        "UPDATE units SET status = ?, attempts = ?, worker = NULL, lease_until = NULL,"
+                        " available_at = ?, error = ? WHERE id = ? AND status = ? AND worker = ?",
+                        (status, attempts, now + delay, str(error)[:500], unit_id, LEASED, worker_id)
+                    ).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return updated
+
+    def stats(self, run_id=None):
+        """Число заданий по состояниям: {"pending": ..., "leased": ..., "done": ..., "failed": ...}."""
+        query = "SELECT status, count(*) FROM units" + (" WHERE run_id = ?" if run_id else "") + " GROUP BY status"
+        with self._lock:
+            rows = self._conn.execute(query, (run_id,) if run_id else ()).fetchall()
+        stats = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        stats.update(rows)
+        return stats
+
+    def active(self, run_id=None):
+        """Сколько заданий еще ждут выполнения или выполняются."""
+        stats = self.stats(run_id)
+        return stats[PENDING] + stats[LEASED]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
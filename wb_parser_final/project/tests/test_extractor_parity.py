@@ -0,0 +1,76 @@
+# tests/test_extractor_parity.py
+"""
+Регрессионная проверка быстрого разбора: parse_products_from_page_regex повторяет правила html.parser,
+поэтому его результат (ссылки, их порядок и повторы) должен совпадать с эталоном BeautifulSoup(..., "html.parser")
+на пограничных страницах из benchmarks/fixtures/edge_cases, сгенерированных страницах каталога
+и случайной смеси конструкций, на которых html.parser ведет себя особо.
+
+Запуск: python -m pytest tests
+"""
+import random
+import warnings
+
+import pytest
+from bs4.builder import ParserRejectedMarkup
+
+from benchmarks.bench_extract import BASE_DOMAIN, EDGE_CASES_DIR, FIXTURES_DIR, generate_catalog_page, read_pages
+from selenium_parser.parsers.wildberries_parser_v2 import (
+    parse_products_from_page_bs4,
+    parse_products_from_page_regex,
+)
+
+# Фрагменты разметки, из которых собираются случайные страницы: варианты тега <a> со ссылкой на товар,
+# комментарии, объявления, CDATA, raw-text элементы, сущности и незакрытые конструкции
+FRAGMENTS = [
+    '<a href="/catalog/{n}/detail.aspx">', "<a href='/catalog/{n}/detail.aspx'>", "<a href=/catalog/{n}/detail.aspx>",
+    '<a/href="/catalog/{n}/detail.aspx"/>', "<A HREF==/catalog/{n}/detail.aspx?x=1&amp;y>",
+    '<a class="x" href="/catalog/{n}/detail.aspx" href="/catalog/9{n}/detail.aspx">',
+    '<a class="product-card__link j-card-link" href="https://www.wildberries.ru/catalog/{n}/detail.aspx?size=0">',
+    "<", ">", "/", '"', "'", "=", " ", "\n", "\t", "-", "!", "?", "[", "]", "&", "&#", "&#12;", "&#x1f;", "&amp;", ";",
+    "<!--", "-->", "--!>", "<!", "<!DOCTYPE html>", "<?", "?>", "<![CDATA[", "]]>", "<![if", "<![endif]>",
+    "<script>", "</script>", '<script src="x">', "<script/>", "</ script >", "<style>", "</style>", "</sTyle>",
+    "</a>", "</", "<div ", "<div>", "</div>", '<p class="<a href=/catalog/7/detail.aspx>">', "<br/>", "<a", "<a ",
+    "href=", '"/catalog/5/detail.aspx"', "<textarea>", "</textarea>", "<img src=x/>", '<a b=="x >"', "\x0b", "ſcript",
+    "<title>", '<span data-x="<a href=/catalog/3/detail.aspx>" >', '<li\x0bclass="a">', '<p\fid="z"\n>',
+]
+RANDOM_PAGES = 3000
+
+
+def _links(extractor, html):
+    """Ссылки, найденные способом разбора, или имя исключения, если разметку отверг html.parser."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return [p.link for p in extractor(html, BASE_DOMAIN, "test")]
+    except ParserRejectedMarkup as exc:
+        return type(exc).__name__
+
+
+def _random_page(rnd):
+    return "".join(rnd.choice(FRAGMENTS).format(n=rnd.randint(1, 99)) for _ in range(rnd.randint(1, 40)))
+
+
+def _assert_same(html):
+    assert _links(parse_products_from_page_regex, html) == _links(parse_products_from_page_bs4, html), repr(html[:300])
+
+
+@pytest.mark.parametrize("html", [pytest.param(html, id=name)
+                                  for name, html in read_pages(EDGE_CASES_DIR) + read_pages(FIXTURES_DIR)])
+def test_fixture_pages(html):
+    _assert_same(html)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_generated_catalog_pages(seed):
+    html = generate_catalog_page(seed=seed)
+    assert parse_products_from_page_regex(html, BASE_DOMAIN, "test")
+    _assert_same(html)
+
+
+@pytest.mark.parametrize("closed", [False, True], ids=["open", "closed"])
+def test_random_markup(closed):
+    # Закрытые страницы проходят весь быстрый путь без отката на эталон из-за незакрытой конструкции в конце
+    rnd = random.Random(int(closed))
+    for _ in range(RANDOM_PAGES):
+        html = _random_page(rnd) + ("</html>" if closed else "")
+        _assert_same(html)